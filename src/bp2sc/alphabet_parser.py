@@ -16,23 +16,36 @@ File format:
 
 from __future__ import annotations
 
+import os
 import re
 from dataclasses import dataclass, field
+from enum import IntEnum
 from pathlib import Path
+from typing import Any, Callable
 
-
-@dataclass
-class HomoRule:
-    """A single homomorphism rule: source --> target."""
-    source: str
-    target: str
+from bp2sc import disk_cache
+from bp2sc.note_converter import note_to_midi
 
 
 @dataclass
 class HomoSection:
     """A named homomorphism section containing rules."""
     name: str
-    rules: list[HomoRule] = field(default_factory=list)
+    # (source, target) pairs, one per "source --> target" line
+    rules: list[tuple[str, str]] = field(default_factory=list)
+    # source -> target dict, built on first use by mapping()
+    _mapping: dict[str, str] | None = field(
+        default=None, init=False, repr=False, compare=False)
+
+    def mapping(self) -> dict[str, str]:
+        """Return the rules as a source -> target dict (built once)."""
+        if self._mapping is None:
+            self._mapping = dict(self.rules)
+        return self._mapping
+
+
+# Terminal that is an Anglo note name (C4, D#5, Bb3)
+_RE_ANGLO_NOTE = re.compile(r'^([A-G])(#|b)?(\d)$')
 
 
 @dataclass
@@ -45,14 +58,94 @@ class AlphabetFile:
     homomorphisms: dict[str, HomoSection] = field(default_factory=dict)
     # File references found (-mi.name, etc.)
     file_refs: list[str] = field(default_factory=list)
+    # terminal -> MIDI dict, built on first use by midi_map()
+    _midi_map: dict[str, int] | None = field(
+        default=None, init=False, repr=False, compare=False)
+
+    def midi_map(self) -> dict[str, int]:
+        """Return the terminals as a terminal -> MIDI dict (built once).
+
+        Anglo note names map to their pitch; any other terminal maps to
+        60 + its position in the list.  A repeated terminal keeps the
+        number of its first occurrence.
+        """
+        if self._midi_map is None:
+            midi_map: dict[str, int] = {}
+            for i, term in enumerate(self.terminals):
+                if term not in midi_map:
+                    m = _RE_ANGLO_NOTE.match(term)
+                    if m:
+                        midi_map[term] = note_to_midi(
+                            m.group(1) + (m.group(2) or ""), int(m.group(3)))
+                    else:
+                        midi_map[term] = 60 + i
+            self._midi_map = midi_map
+        return self._midi_map
+
+
+class _Kind(IntEnum):
+    """Kind of an alphabet line that affects the parse result."""
+    FILE_REF = 0    # value: the "-XX.name" line
+    SEPARATOR = 1   # value: None
+    RULE = 2        # value: (source, target)
+    NAME = 3        # value: the bare name
+
+
+_Classified = tuple[_Kind, Any]
+
+_SEPARATOR: _Classified = (_Kind.SEPARATOR, None)
+
+
+def _classify_comment(line: str) -> _Classified | None:
+    """// comment: ignored."""
+    return None
+
+
+def _classify_dashes(line: str) -> _Classified | None:
+    """Line starting with '--': section separator (--- or more), else text."""
+    if len(line) >= 3 and not line.strip("-"):
+        return _SEPARATOR
+    return _classify_text(line)
+
+
+def _classify_file_ref(line: str) -> _Classified | None:
+    """Line starting with '-' + letter: -XX.name file reference, else text."""
+    prefix = line[1:3]
+    if (len(line) > 4 and line[3] == "." and prefix.isascii()
+            and prefix.isalpha() and prefix.islower()):
+        return (_Kind.FILE_REF, line)
+    return _classify_text(line)
 
 
-# Regex for homomorphism rule: source --> target
-_RE_HOMO_RULE = re.compile(r'^(.+?)\s*-->\s*(.+)$')
-# Regex for file reference: -XX.name
-_RE_FILE_REF = re.compile(r'^-([a-z]{2})\.(.+)$')
-# Regex for section separator: three or more dashes
-_RE_SEPARATOR = re.compile(r'^-{3,}$')
+def _classify_text(line: str) -> _Classified | None:
+    """Homomorphism rule, directive (ignored), or bare name."""
+    # Check for homomorphism rule: source --> target
+    # (search from 1: the source must be non-empty)
+    arrow = line.find("-->", 1)
+    target = line[arrow + 3:].lstrip() if arrow > 0 else ""
+    if target:
+        return (_Kind.RULE, (line[:arrow].rstrip(), target))
+
+    # Check for special keywords
+    if line.lower() in ("sync", "*"):
+        # These are directives, not section names
+        return None
+
+    # Either a section name or a terminal: decided by what follows
+    return (_Kind.NAME, line)
+
+
+# Line classifier keyed by the first two characters of the (stripped)
+# line; anything not listed is classified by _classify_text.
+_PREFIX_CLASSIFIERS: dict[str, Callable[[str], _Classified | None]] = {
+    "//": _classify_comment,
+    "--": _classify_dashes,
+    **{f"-{c}": _classify_file_ref for c in "abcdefghijklmnopqrstuvwxyz"},
+}
+
+
+def _classify(line: str) -> _Classified | None:
+    return _PREFIX_CLASSIFIERS.get(line[:2], _classify_text)(line)
 
 
 def parse_alphabet_file(path: str | Path) -> AlphabetFile:
@@ -71,106 +164,113 @@ def parse_alphabet_file(path: str | Path) -> AlphabetFile:
 
     result = AlphabetFile(name=name)
 
-    with open(path, "r", encoding="utf-8", errors="replace") as f:
-        lines = f.readlines()
+    # Alphabet files are small: read in one go, then strip every line
+    # and drop blank ones in a single C-level pass
+    text = path.read_text(encoding="utf-8", errors="replace")
+    lines = filter(None, map(str.strip, text.split("\n")))
 
     current_section: HomoSection | None = None
     pending_name: str | None = None
 
-    for line in lines:
-        line = line.strip()
-
-        # Skip empty lines
-        if not line:
-            continue
+    # Loop-local bindings for the containers filled on every line
+    file_refs_append = result.file_refs.append
+    terminals_append = result.terminals.append
+    homos = result.homomorphisms
 
-        # Skip comments
-        if line.startswith("//"):
-            continue
+    # Comments and directives classify as None and are skipped
+    for kind, value in filter(None, map(_classify, lines)):
+        if kind is _Kind.FILE_REF:
+            file_refs_append(value)
 
-        # Check for file reference
-        m = _RE_FILE_REF.match(line)
-        if m:
-            result.file_refs.append(f"-{m.group(1)}.{m.group(2)}")
-            continue
-
-        # Check for section separator
-        if _RE_SEPARATOR.match(line):
-            # End current section if any
-            if current_section and current_section.rules:
-                result.homomorphisms[current_section.name] = current_section
+        elif kind is _Kind.SEPARATOR:
+            # End current section if any; a pending name is dropped
+            if current_section is not None:
+                homos[current_section.name] = current_section
             current_section = None
             pending_name = None
-            continue
 
-        # Check for homomorphism rule
-        m = _RE_HOMO_RULE.match(line)
-        if m:
-            source, target = m.group(1).strip(), m.group(2).strip()
+        elif kind is _Kind.RULE:
             if current_section is None:
-                # Need to create a section from pending name
-                if pending_name:
-                    current_section = HomoSection(name=pending_name)
-                else:
-                    # Anonymous section - use "*"
-                    current_section = HomoSection(name="*")
-            current_section.rules.append(HomoRule(source=source, target=target))
-            pending_name = None
-            continue
-
-        # Check for special keywords
-        if line.lower() in ("sync", "*"):
-            # These are directives, not section names
-            continue
-
-        # This is either a section name or a terminal
-        # If we're in a homomorphism context (have rules), it's a section name
-        # Otherwise, it could be a terminal
-        if current_section and current_section.rules:
-            # Save current section and start new one
-            result.homomorphisms[current_section.name] = current_section
-            current_section = None
-
-        # Store as pending name (might be section name or terminal)
-        if pending_name:
-            # Previous pending was a terminal (no --> followed)
-            result.terminals.append(pending_name)
-        pending_name = line
+                # The pending name was a section name, else the section
+                # is anonymous - use "*"
+                current_section = HomoSection(name=pending_name or "*")
+                rules_append = current_section.rules.append
+                pending_name = None
+            rules_append(value)
 
-    # Handle remaining pending name
-    if pending_name:
-        if current_section and not current_section.rules:
-            # Was a section name with no rules
-            pass
         else:
-            result.terminals.append(pending_name)
+            # A section name or a terminal, decided by what follows.
+            # A name after rules closes the current section.
+            if current_section is not None:
+                homos[current_section.name] = current_section
+                current_section = None
+            elif pending_name is not None:
+                # Previous pending was a terminal (no --> followed)
+                terminals_append(pending_name)
+            pending_name = value
+
+    # A trailing pending name never got rules: it is a terminal
+    if pending_name is not None:
+        terminals_append(pending_name)
 
     # Save last section
-    if current_section and current_section.rules:
-        result.homomorphisms[current_section.name] = current_section
+    if current_section is not None:
+        homos[current_section.name] = current_section
 
+    # Build the MIDI map now, so the on-disk cache of parse_alphabet_dir
+    # stores it along with the terminals
+    result.midi_map()
     return result
 
 
 def parse_alphabet_dir(dir_path: str | Path) -> dict[str, AlphabetFile]:
     """Parse all -al.* files in a directory.
 
+    With BP2SC_CACHE=1 the result is cached on disk (see
+    bp2sc.disk_cache), keyed by the resolved directory path and the name,
+    mtime and size of every -al.* file, so a warm run skips parsing
+    altogether.
+
     Args:
         dir_path: Directory containing BP3 files
 
     Returns:
         Dict mapping file names (without -al. prefix) to AlphabetFile
     """
-    dir_path = Path(dir_path)
-    results = {}
+    try:
+        with os.scandir(dir_path) as entries:
+            files = [entry for entry in entries
+                     if entry.name.startswith("-al.") and entry.is_file()]
+    except (FileNotFoundError, NotADirectoryError):
+        return {}
+    if not files:
+        return {}
+
+    key = None
+    if disk_cache.enabled():
+        try:
+            stamps = sorted((entry.name, st.st_mtime_ns, st.st_size)
+                            for entry in files for st in (entry.stat(),))
+        except OSError:
+            pass
+        else:
+            key = disk_cache.make_key(
+                "alphabet", str(Path(dir_path).resolve()), stamps)
+            cached = disk_cache.load(key)
+            if isinstance(cached, dict) and all(
+                    isinstance(af, AlphabetFile) for af in cached.values()):
+                return cached
 
-    for path in dir_path.glob("-al.*"):
+    results = {}
+    for entry in files:
         try:
-            af = parse_alphabet_file(path)
+            af = parse_alphabet_file(entry.path)
             results[af.name] = af
         except Exception:
             pass
 
+    if key is not None:
+        disk_cache.store(key, results)
     return results
 
 
@@ -190,7 +290,30 @@ def get_homomorphism_mapping(
         Dict mapping source symbols to target symbols, or None if not found
     """
     for af in alphabet_files.values():
-        if homo_name in af.homomorphisms:
-            section = af.homomorphisms[homo_name]
-            return {r.source: r.target for r in section.rules}
+        section = af.homomorphisms.get(homo_name)
+        if section is not None:
+            # A copy: callers may mutate it without touching the section
+            return dict(section.mapping())
     return None
+
+
+def index_homomorphisms(
+    alphabet_files: dict[str, AlphabetFile]
+) -> dict[str, dict[str, str]]:
+    """Flatten all homomorphism sections into a single name -> mapping dict.
+
+    When several files define the same section name, the first one wins,
+    as in get_homomorphism_mapping().
+
+    Args:
+        alphabet_files: Dict of parsed alphabet files
+
+    Returns:
+        Dict mapping homomorphism names to source -> target dicts
+    """
+    index: dict[str, dict[str, str]] = {}
+    for af in alphabet_files.values():
+        for homo_name, section in af.homomorphisms.items():
+            if homo_name not in index:
+                index[homo_name] = dict(section.mapping())
+    return index
@@ -1,28 +1,38 @@
 """AST node definitions for BP3 grammar structures.
 
+Symbol-name fields (Note, NonTerminal, Variable, SpecialFn, QuotedSymbol,
+Flag) are interned on construction: grammars reuse a small vocabulary,
+and the emitter keys many dicts on these names.
+
+All nodes except GrammarBlock and BPFile (which the parser fills in
+incrementally) are frozen: fields cannot be reassigned, so the parser can
+share one instance per distinct Flag, Note, Rest, NonTerminal or Lambda,
+and per repeated rule body.  List fields are still plain lists.
+
 See docs/bp3_ast_spec.md for the formal specification.
 """
 
 from __future__ import annotations
 
+import sys
 from dataclasses import dataclass, field
 from enum import Enum
 
 
 # --- Header nodes ---
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class Comment:
     text: str
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class FileRef:
     prefix: str   # "se", "al", "ho", "cs"
     name: str
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class InitDirective:
     text: str     # raw text after "INIT:"
 
@@ -32,7 +42,7 @@ Header = Comment | FileRef | InitDirective
 
 # --- Weight ---
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class Weight:
     value: int
     decrement: int | None = None  # for <50-12>
@@ -40,16 +50,20 @@ class Weight:
 
 # --- Flag ---
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class Flag:
     name: str
     op: str = ""          # "=", "+", "-", ">", "<", or "" (bare condition)
     value: str | None = None  # int or flag name for comparison
 
+    def __post_init__(self) -> None:
+        object.__setattr__(self, "name", sys.intern(self.name))
+
 
 # --- Homomorphism kind enum ---
 
 class HomoApplyKind(Enum):
+    """Kind of a HomoApply node.  Members are singletons: compare with `is`."""
     MASTER = "master"   # (= ...) — defines the pattern
     SLAVE = "slave"     # (: ...) — replicates the master's pattern
     REF = "ref"         # named homomorphism reference
@@ -57,96 +71,111 @@ class HomoApplyKind(Enum):
 
 # --- RHS elements ---
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class Note:
     name: str           # "do", "re", "sa", "fa", "sol", "la", "si", "sib", etc.
     octave: int | None = None
 
+    def __post_init__(self) -> None:
+        object.__setattr__(self, "name", sys.intern(self.name))
+
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class Rest:
     """A silence marker: '-' or '_'."""
     determined: bool = True  # True for '-', False for '_'
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class UndeterminedRest:
     """Undetermined continuation: '...' (distinct from Rest)."""
     pass
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class NonTerminal:
     name: str           # "S", "Tihai", "P4", etc.
 
+    def __post_init__(self) -> None:
+        object.__setattr__(self, "name", sys.intern(self.name))
 
-@dataclass
+
+@dataclass(frozen=True, slots=True)
 class Variable:
     name: str           # without the | delimiters
 
+    def __post_init__(self) -> None:
+        object.__setattr__(self, "name", sys.intern(self.name))
+
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class Wildcard:
     index: int          # ?1, ?2, etc. (0 for anonymous ?)
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class Polymetric:
     tempo_ratio: int | None = None
     voices: list[list[RHSElement]] = field(default_factory=list)
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class SpecialFn:
     name: str           # "transpose", "vel", "ins", "mm", etc.
     args: list[str] = field(default_factory=list)
 
+    def __post_init__(self) -> None:
+        object.__setattr__(self, "name", sys.intern(self.name))
 
-@dataclass
+
+@dataclass(frozen=True, slots=True)
 class Lambda:
     pass
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class HomoApply:
     """Homomorphism application: (= expr) or (: expr)."""
     kind: HomoApplyKind
     elements: list[RHSElement] = field(default_factory=list)
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class TimeSig:
     """Time signature like 4+4+4+4+4+4/4."""
     text: str
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class Annotation:
     """Bracket annotation: [Variant], [?], [text]."""
     text: str
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class QuotedSymbol:
     """Single-quoted symbol: '1', '2' (distinct from Terminal/NonTerminal)."""
     text: str
 
+    def __post_init__(self) -> None:
+        object.__setattr__(self, "text", sys.intern(self.text))
+
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class Tie:
     """Tied note: C4& (start) or &C4 (end)."""
     note: Note
     is_start: bool  # True for start (note&), False for end (&note)
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class ContextMarker:
     """Context-sensitive grammar marker."""
     kind: str  # "distant", "open", "close", "wild", "left"
     symbol: RHSElement | None = None
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class GotoDirective:
     """_goto(grammar, rule) — affects derivation flow."""
     grammar: int
@@ -162,11 +191,17 @@ RHSElement = (
     | Polymetric | SpecialFn | Lambda | HomoApply | TimeSig | Annotation
     | QuotedSymbol | Tie | ContextMarker | GotoDirective
 )
+# Same members as a frozenset, for exact runtime type checks
+_RHS_ELEMENT_TYPES_FROZEN: frozenset[type] = frozenset((
+    Note, Rest, UndeterminedRest, NonTerminal, Variable, Wildcard,
+    Polymetric, SpecialFn, Lambda, HomoApply, TimeSig, Annotation,
+    QuotedSymbol, Tie, ContextMarker, GotoDirective,
+))
 
 
 # --- Rule ---
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class Rule:
     grammar_num: int
     rule_num: int
@@ -179,7 +214,7 @@ class Rule:
 
 # --- Grammar block ---
 
-@dataclass
+@dataclass(slots=True)
 class GrammarBlock:
     mode: str               # "ORD", "RND", "LIN", "SUB1"
     index: int | None = None  # subgrammar number from [N]
@@ -190,7 +225,7 @@ class GrammarBlock:
 
 # --- Top-level file ---
 
-@dataclass
+@dataclass(slots=True)
 class BPFile:
     headers: list[Header] = field(default_factory=list)
     grammars: list[GrammarBlock] = field(default_factory=list)
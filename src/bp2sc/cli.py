@@ -5,9 +5,13 @@ from __future__ import annotations
 import argparse
 import sys
 from pathlib import Path
+from typing import Any, Callable
 
-from bp2sc.grammar.parser import parse_file
-from bp2sc.sc_emitter import emit_scd
+from bp2sc.ast_nodes import (
+    Note, Rest, NonTerminal, Variable, Wildcard,
+    Polymetric, SpecialFn, Lambda, HomoApply, HomoApplyKind, TimeSig,
+    BracketComment,
+)
 
 
 def main(argv: list[str] | None = None) -> None:
@@ -63,7 +67,8 @@ def main(argv: list[str] | None = None) -> None:
         print(f"Error: file not found: {input_path}", file=sys.stderr)
         sys.exit(1)
 
-    # Parse
+    # Parse (imported here so --help does not load the parser/emitter)
+    from bp2sc.grammar.parser import parse_file
     try:
         bp_ast = parse_file(input_path)
     except Exception as e:
@@ -76,6 +81,7 @@ def main(argv: list[str] | None = None) -> None:
         return
 
     # Emit SC code
+    from bp2sc.sc_emitter import emit_scd
     source_name = input_path.name
     scd_code = emit_scd(bp_ast, source_name, args.start_symbol, args.verbose,
                         seed=args.seed, alphabet_dir=args.alphabet_dir,
@@ -91,31 +97,35 @@ def main(argv: list[str] | None = None) -> None:
 
 
 def _print_rules(bp_ast) -> None:
-    """Print all parsed rules in a readable format."""
-    from bp2sc.ast_nodes import (
-        Note, Rest, NonTerminal, Variable, Wildcard,
-        Polymetric, SpecialFn, Lambda, HomoApply, TimeSig,
-    )
+    """Print all parsed rules in a readable format.
 
+    Lines are collected and written to stdout in a single call.
+    """
+    out: list[str] = []
+    out_append = out.append
     for block in bp_ast.grammars:
-        print(f"\n{'='*60}")
-        print(f"Subgrammar {block.index} — Mode: {block.mode}", end="")
+        out_append("")
+        out_append("=" * 60)
+        header = f"Subgrammar {block.index} — Mode: {block.mode}"
         if block.label:
-            print(f" [{block.label}]", end="")
-        print()
+            header += f" [{block.label}]"
+        out_append(header)
         if block.preamble:
-            print(f"  Preamble: {block.preamble}")
-        print(f"  Rules: {len(block.rules)}")
-        print(f"{'='*60}")
+            out_append(f"  Preamble: {block.preamble}")
+        out_append(f"  Rules: {len(block.rules)}")
+        out_append("=" * 60)
 
         for rule in block.rules:
             weight_str = f"<{rule.weight.value}" + (f"-{rule.weight.decrement}" if rule.weight.decrement else "") + ">" if rule.weight else ""
             flag_str = " ".join(f"/{_format_flag(f)}/" for f in rule.flags) if rule.flags else ""
             lhs_str = " ".join(_elem_str(e) for e in rule.lhs)
             rhs_str = " ".join(_elem_str(e) for e in rule.rhs)
-            print(f"  gram#{rule.grammar_num}[{rule.rule_num}] {weight_str} {flag_str} {lhs_str} --> {rhs_str}")
+            out_append(f"  gram#{rule.grammar_num}[{rule.rule_num}] {weight_str} {flag_str} {lhs_str} --> {rhs_str}")
             if rule.comment:
-                print(f"    // {rule.comment}")
+                out_append(f"    // {rule.comment}")
+
+    if out:
+        sys.stdout.write("\n".join(out) + "\n")
 
 
 def _format_flag(f) -> str:
@@ -124,44 +134,46 @@ def _format_flag(f) -> str:
     return f.name
 
 
+def _poly_str(e: Polymetric) -> str:
+    voices = ", ".join(" ".join(_elem_str(x) for x in v) for v in e.voices)
+    if e.tempo_ratio:
+        return f"{{{e.tempo_ratio}, {voices}}}"
+    return f"{{{voices}}}"
+
+
+def _special_fn_str(e: SpecialFn) -> str:
+    if e.args:
+        return f"_{e.name}({','.join(e.args)})"
+    return f"_{e.name}"
+
+
+def _homo_str(e: HomoApply) -> str:
+    inner = " ".join(_elem_str(x) for x in e.elements)
+    if e.kind is HomoApplyKind.MASTER:
+        return f"(= {inner})"
+    if e.kind is HomoApplyKind.SLAVE:
+        return f"(: {inner})"
+    return f"homo:{inner}"
+
+
+# Formatter per AST node type (exact type match: the AST has no subclasses)
+_ELEM_STR: dict[type, Callable[[Any], str]] = {
+    Note: lambda e: f"{e.name}{e.octave}",
+    Rest: lambda e: "-" if e.determined else "_",
+    NonTerminal: lambda e: e.name,
+    Variable: lambda e: f"|{e.name}|",
+    Wildcard: lambda e: f"?{e.index}",
+    Polymetric: _poly_str,
+    SpecialFn: _special_fn_str,
+    Lambda: lambda e: "lambda",
+    HomoApply: _homo_str,
+    TimeSig: lambda e: e.text,
+    BracketComment: lambda e: f"[{e.text}]",
+}
+
+
 def _elem_str(e) -> str:
-    from bp2sc.ast_nodes import (
-        Note, Rest, NonTerminal, Variable, Wildcard,
-        Polymetric, SpecialFn, Lambda, HomoApply, TimeSig, BracketComment,
-    )
-    if isinstance(e, Note):
-        return f"{e.name}{e.octave}"
-    if isinstance(e, Rest):
-        return "-" if e.determined else "_"
-    if isinstance(e, NonTerminal):
-        return e.name
-    if isinstance(e, Variable):
-        return f"|{e.name}|"
-    if isinstance(e, Wildcard):
-        return f"?{e.index}"
-    if isinstance(e, Polymetric):
-        voices = ", ".join(" ".join(_elem_str(x) for x in v) for v in e.voices)
-        if e.tempo_ratio:
-            return f"{{{e.tempo_ratio}, {voices}}}"
-        return f"{{{voices}}}"
-    if isinstance(e, SpecialFn):
-        if e.args:
-            return f"_{e.name}({','.join(e.args)})"
-        return f"_{e.name}"
-    if isinstance(e, Lambda):
-        return "lambda"
-    if isinstance(e, HomoApply):
-        inner = " ".join(_elem_str(x) for x in e.elements)
-        if e.kind == "master":
-            return f"(= {inner})"
-        if e.kind == "slave":
-            return f"(: {inner})"
-        return f"homo:{inner}"
-    if isinstance(e, TimeSig):
-        return e.text
-    if isinstance(e, BracketComment):
-        return f"[{e.text}]"
-    return repr(e)
+    return _ELEM_STR.get(type(e), repr)(e)
 
 
 if __name__ == "__main__":
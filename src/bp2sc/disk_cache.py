@@ -0,0 +1,91 @@
+"""On-disk pickle cache for parsed BP3 files.
+
+The cache is off by default; set BP2SC_CACHE=1 to turn it on.  Entries
+live in $BP2SC_CACHE_DIR, or $XDG_CACHE_HOME/bp2sc (default
+~/.cache/bp2sc), one pickle per key.  Callers build the key from
+whatever invalidates the entry (resolved paths, mtimes, sizes); the
+package version and a hash of the bp2sc sources (.py and .lark) are
+always mixed in, so editing the parser or the AST classes never loads
+pickles written by older code.
+
+Entries are unpickled, and unpickling can run arbitrary code: only
+enable the cache with a directory that no other user can write to.
+
+The cache is best effort: unreadable, corrupt or unwritable entries are
+treated as misses.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import pickle
+import tempfile
+from functools import cache
+from pathlib import Path
+from typing import Any
+
+from bp2sc import __version__
+
+
+def enabled() -> bool:
+    """Return True when BP2SC_CACHE is set to a non-empty value."""
+    return bool(os.environ.get("BP2SC_CACHE"))
+
+
+def cache_dir() -> Path:
+    """Return the directory holding cache entries."""
+    override = os.environ.get("BP2SC_CACHE_DIR")
+    if override:
+        return Path(override)
+    base = os.environ.get("XDG_CACHE_HOME")
+    return (Path(base) if base else Path.home() / ".cache") / "bp2sc"
+
+
+@cache
+def _source_hash() -> str:
+    """Hash the bp2sc source files, so any code change invalidates entries."""
+    package = Path(__file__).resolve().parent
+    h = hashlib.blake2b(digest_size=20)
+    sources = [*package.rglob("*.py"), *package.rglob("*.lark")]
+    for source in sorted(sources):
+        h.update(source.relative_to(package).as_posix().encode())
+        h.update(b"\0")
+        h.update(source.read_bytes())
+    return h.hexdigest()
+
+
+def make_key(kind: str, *parts: object) -> str:
+    """Hash kind, the package version and source, and parts into a key."""
+    h = hashlib.blake2b(digest_size=20)
+    h.update(f"{__version__}|{_source_hash()}|{kind}".encode())
+    for part in parts:
+        h.update(b"|")
+        h.update(repr(part).encode())
+    return f"{kind}-{h.hexdigest()}"
+
+
+def load(key: str) -> Any | None:
+    """Return the cached object for key, or None on a miss."""
+    try:
+        with open(cache_dir() / f"{key}.pkl", "rb") as f:
+            return pickle.load(f)
+    except Exception:
+        return None
+
+
+def store(key: str, value: Any) -> None:
+    """Write value under key atomically (temp file, then rename)."""
+    directory = cache_dir()
+    try:
+        directory.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=directory, prefix=".tmp-", suffix=".pkl")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                pickle.dump(value, f, protocol=5)
+            os.replace(tmp, directory / f"{key}.pkl")
+        except BaseException:
+            os.unlink(tmp)
+            raise
+    except Exception:
+        pass
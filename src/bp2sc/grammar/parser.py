@@ -15,9 +15,14 @@ See docs/bp3_ast_spec.md for the AST node definitions.
 
 from __future__ import annotations
 
+import os
 import re
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
 from pathlib import Path
+from typing import Callable, Iterable, Sequence
 
+from bp2sc import disk_cache
 from bp2sc.ast_nodes import (
     BPFile, GrammarBlock, Rule, Weight, Flag,
     Note, Rest, NonTerminal, Variable, Wildcard,
@@ -45,6 +50,21 @@ RE_RULE = re.compile(r"^\s*gram#(\d+)\[(\d+)\]", re.IGNORECASE)
 # Bare rule: SYMBOL --> ... (no gram# prefix)
 RE_BARE_RULE = re.compile(r"^\s*([A-Z][A-Za-z0-9_'\"]*)\s+-->")
 
+# Line classifier for parse_text: the patterns above as named alternatives,
+# tried in order on the stripped line so one match decides its kind.
+RE_LINE_KIND = re.compile(
+    r"(?P<comment>//(?P<comment_text>.*)$)"
+    r"|(?P<file_ref>-(?P<ref_prefix>\w+)\.(?P<ref_name>.+)$)"
+    r"|(?P<init>INIT:\s*(?P<init_text>.+)$)"
+    r"|(?P<separator>---[-]+\s*$)"
+    r"|(?P<mode>(?P<mode_name>ORD|RND|LIN|SUB1|SUB)"
+    r"(?:\s*\[(?P<mode_index>[^\]]*)\])?"
+    r"(?:\s*\[(?P<mode_label>[^\]]*)\])?"
+    r"\s*$)"
+    r"|(?P<rule>(?i:gram)#(?P<gram_num>\d+)\[(?P<rule_num>\d+)\])"
+    r"|(?P<bare_rule>[A-Z][A-Za-z0-9_'\"]*\s+-->)"
+)
+
 # Tokens inside rules
 RE_WEIGHT = re.compile(r"<(\d+)(?:-(\d+))?>")
 RE_FLAG = re.compile(r"/([^/]+)/")
@@ -53,6 +73,7 @@ RE_SPECIAL_FN = re.compile(r"_([a-zA-Z]\w*)\(([^)]*)\)")
 RE_SPECIAL_FN_BARE = re.compile(r"_([a-zA-Z]\w*)")  # no-parens variant
 RE_POLYMETRIC_OPEN = re.compile(r"\{")
 RE_POLYMETRIC_CLOSE = re.compile(r"\}")
+_RE_POLY_DELIMITER = re.compile(r"[{},]")  # what _split_poly_commas tracks
 RE_VARIABLE = re.compile(r"\|([^|]+)\|")
 RE_WILDCARD = re.compile(r"\?(\d+)")
 RE_HOMO_MASTER = re.compile(r"\(=\s*")
@@ -86,116 +107,149 @@ RE_REST_UNDER = re.compile(r"\b_(?![a-zA-Z])")
 # Striated preamble
 RE_STRIATED = re.compile(r"_striated", re.IGNORECASE)
 
+# One preamble item after optional whitespace: a special function call
+# (RE_SPECIAL_FN) or _striated (RE_STRIATED), tried in that order
+RE_PREAMBLE_ITEM = re.compile(
+    r"\s*(?:_(?P<fn_name>[a-zA-Z]\w*)\((?P<fn_args>[^)]*)\)"
+    r"|(?P<striated>(?i:_striated)))"
+)
+
 
 def parse_file(path: str | Path) -> BPFile:
-    """Parse a BP3 grammar file and return an AST."""
-    text = Path(path).read_text(encoding="utf-8", errors="replace")
-    return parse_text(text)
+    """Parse a BP3 grammar file and return an AST.
+
+    The file is read line by line rather than loaded whole.  With
+    BP2SC_CACHE=1 the AST is cached on disk (see bp2sc.disk_cache), keyed
+    by the resolved path, mtime and size of the file, so unchanged files
+    are not re-parsed across runs.
+    """
+    key = None
+    if disk_cache.enabled():
+        try:
+            st = os.stat(path)
+        except OSError:
+            pass  # let open() below raise the usual error
+        else:
+            key = disk_cache.make_key(
+                "grammar", str(Path(path).resolve()), st.st_mtime_ns, st.st_size)
+            cached = disk_cache.load(key)
+            if isinstance(cached, BPFile):
+                return cached
+
+    with open(path, "r", encoding="utf-8", errors="replace") as f:
+        ast = _parse_lines(filter(None, map(str.strip, f)))
+
+    if key is not None:
+        disk_cache.store(key, ast)
+    return ast
+
+
+# Below this many files, parse_files() stays in-process: starting worker
+# processes costs more than parsing a handful of grammars.
+_PARALLEL_MIN_FILES = 8
+
+
+def parse_files(
+    paths: Sequence[str | Path], max_workers: int | None = None,
+) -> dict[str | Path, BPFile]:
+    """Parse several BP3 grammar files, in worker processes when worthwhile.
+
+    Files are independent, so large batches are spread over a process
+    pool (max_workers defaults to the CPU count); small batches, or
+    max_workers=1, are parsed in the calling process.
+
+    Returns:
+        Dict mapping each given path (as passed in) to its AST
+    """
+    if max_workers == 1 or len(paths) < _PARALLEL_MIN_FILES:
+        return {path: parse_file(path) for path in paths}
+    workers = max_workers or os.cpu_count() or 1
+    # Batch files to amortize pickling round trips, but keep every worker busy
+    chunksize = max(1, min(8, len(paths) // (4 * workers)))
+    with ProcessPoolExecutor(max_workers=max_workers) as ex:
+        return dict(zip(paths, ex.map(parse_file, paths, chunksize=chunksize)))
 
 
 def parse_text(text: str) -> BPFile:
     """Parse BP3 grammar text and return an AST."""
-    lines = text.split("\n")
+    return _parse_lines(filter(None, map(str.strip, text.split("\n"))))
+
+
+def _parse_lines(lines: Iterable[str]) -> BPFile:
+    """Parse stripped, non-empty grammar lines into an AST.
+
+    Callers strip and drop blank lines with map/filter, so that work
+    stays in C.
+    """
     headers: list[Header] = []
     grammars: list[GrammarBlock] = []
     current_block: GrammarBlock | None = None
     in_headers = True
 
-    i = 0
-    while i < len(lines):
-        line = lines[i]
-        stripped = line.strip()
-
-        # Skip empty lines
-        if not stripped:
-            i += 1
+    for stripped in lines:
+        m = RE_LINE_KIND.match(stripped)
+        if m is None:
+            # Preamble (special functions before rules, like _mm(88) _striated)
+            if current_block is not None:
+                preamble_items = _try_parse_preamble(stripped)
+                if preamble_items:
+                    current_block.preamble.extend(preamble_items)
+            # Anything else is an unknown line -- skip
             continue
+        kind = m.lastgroup
 
         # Comments (can appear anywhere)
-        m = RE_COMMENT.match(stripped)
-        if m:
+        if kind == "comment":
             if in_headers:
-                headers.append(Comment(m.group(1).strip()))
-            i += 1
+                headers.append(Comment(m.group("comment_text").strip()))
             continue
 
         # File references (header only)
-        m = RE_FILE_REF.match(stripped)
-        if m and in_headers:
-            headers.append(FileRef(m.group(1), m.group(2)))
-            i += 1
+        if kind == "file_ref":
+            if in_headers:
+                headers.append(FileRef(m.group("ref_prefix"), m.group("ref_name")))
             continue
 
         # INIT directive
-        m = RE_INIT.match(stripped)
-        if m:
-            headers.append(InitDirective(m.group(1).strip()))
-            i += 1
+        if kind == "init":
+            headers.append(InitDirective(m.group("init_text").strip()))
             continue
 
         # Separator line
-        if RE_SEPARATOR.match(stripped):
-            i += 1
+        if kind == "separator":
             continue
 
         # Mode line -> new grammar block
-        m = RE_MODE.match(stripped)
-        if m:
+        if kind == "mode":
             in_headers = False
-            mode = m.group(1)
-            index_str = m.group(2)
-            label = m.group(3)
+            mode = m.group("mode_name")
+            index_str = m.group("mode_index")
+            label = m.group("mode_label")
             index = int(index_str) if index_str and index_str.isdigit() else None
             if label is None and index_str and not index_str.isdigit():
                 label = index_str
                 index = None
             current_block = GrammarBlock(mode=mode, index=index, label=label)
             grammars.append(current_block)
-            i += 1
             continue
 
-        # Preamble (special functions before rules, like _mm(88) _striated)
-        if (current_block is not None
-                and not RE_RULE.match(stripped)
-                and not RE_BARE_RULE.match(stripped)):
-            # Could be preamble items
-            preamble_items = _try_parse_preamble(stripped)
-            if preamble_items:
-                current_block.preamble.extend(preamble_items)
-                i += 1
-                continue
-
-        # Rule line
-        m = RE_RULE.match(stripped)
-        if m:
+        # Rule line: gram#N[M] ... or bare SYMBOL --> ... (no gram# prefix)
+        if kind == "rule" or kind == "bare_rule":
             in_headers = False
             if current_block is None:
                 # Auto-create a block
                 current_block = GrammarBlock(mode="ORD")
                 grammars.append(current_block)
 
-            rule = _parse_rule_line(stripped, int(m.group(1)), int(m.group(2)))
-            current_block.rules.append(rule)
-            i += 1
-            continue
-
-        # Bare rule line: SYMBOL --> ... (no gram# prefix)
-        m = RE_BARE_RULE.match(stripped)
-        if m:
-            in_headers = False
-            if current_block is None:
-                current_block = GrammarBlock(mode="ORD")
-                grammars.append(current_block)
-            # Infer grammar_num from current block, rule_num incremental
-            gram_num = current_block.index or 1
-            rule_num = len(current_block.rules) + 1
-            rule = _parse_bare_rule_line(stripped, gram_num, rule_num)
+            if kind == "rule":
+                rule = _make_rule(stripped[m.end():].strip(),
+                                  int(m.group("gram_num")), int(m.group("rule_num")))
+            else:
+                # Infer grammar_num from current block, rule_num incremental
+                gram_num = current_block.index or 1
+                rule_num = len(current_block.rules) + 1
+                rule = _make_rule(stripped, gram_num, rule_num)
             current_block.rules.append(rule)
-            i += 1
-            continue
-
-        # Unknown line -- skip
-        i += 1
 
     # Auto-assign grammar block indices if not specified
     for idx, block in enumerate(grammars, 1):
@@ -206,110 +260,56 @@ def parse_text(text: str) -> BPFile:
 
 
 def _try_parse_preamble(line: str) -> list[SpecialFn]:
-    """Try to parse a line as preamble items (special fns, _striated)."""
+    """Try to parse a line as preamble items (special fns, _striated).
+
+    Items are matched in place from a moving position; nothing is sliced.
+    """
     items: list[SpecialFn] = []
-    remaining = line.strip()
+    match = RE_PREAMBLE_ITEM.match
+    pos = 0
+    end = len(line.rstrip())
 
-    while remaining:
-        remaining = remaining.lstrip()
-        if not remaining:
+    while pos < end:
+        m = match(line, pos)
+        if m is None:
+            # Not a preamble line (no items), or stop at the first non-item
             break
-
-        # Special function
-        m = RE_SPECIAL_FN.match(remaining)
-        if m:
-            items.append(SpecialFn(name=m.group(1), args=_split_args(m.group(2))))
-            remaining = remaining[m.end():]
-            continue
-
-        # _striated
-        m = RE_STRIATED.match(remaining)
-        if m:
+        if m.group("striated"):
             items.append(SpecialFn(name="striated", args=[]))
-            remaining = remaining[m.end():]
-            continue
-
-        # Not a preamble line
-        if not items:
-            return []
-        break
-
-    return items
-
-
-def _parse_rule_line(line: str, gram_num: int, rule_num: int) -> Rule:
-    """Parse a single rule line into a Rule AST node."""
-    # Remove the gram#N[M] prefix
-    m = RE_RULE.match(line)
-    rest = line[m.end():].strip()
-
-    # Parse weight
-    weight = None
-    m = RE_WEIGHT.match(rest)
-    if m:
-        val = int(m.group(1))
-        dec = int(m.group(2)) if m.group(2) else None
-        weight = Weight(value=val, decrement=dec)
-        rest = rest[m.end():].strip()
-
-    # Parse flag conditions (before the arrow)
-    flags: list[Flag] = []
-    while rest.startswith("/"):
-        m = RE_FLAG.match(rest)
-        if m:
-            flag = _parse_flag_expr(m.group(1).strip())
-            flags.append(flag)
-            rest = rest[m.end():].strip()
         else:
-            break
-
-    # Split on arrow
-    arrow_m = RE_ARROW.search(rest)
-    if arrow_m is None:
-        # Malformed rule -- return with what we have
-        return Rule(
-            grammar_num=gram_num, rule_num=rule_num,
-            weight=weight, flags=flags,
-            lhs=[NonTerminal("?")], rhs=[]
-        )
+            items.append(SpecialFn(name=m.group("fn_name"),
+                                   args=_split_args(m.group("fn_args"))))
+        pos = m.end()
 
-    lhs_text = rest[:arrow_m.start()].strip()
-    rhs_text = rest[arrow_m.end():].strip()
+    return items
 
-    # Remove trailing inline annotations from RHS
-    comment = None
-    bracket_parts = list(RE_ANNOTATION.finditer(rhs_text))
-    trailing_comments = []
-    for bp in reversed(bracket_parts):
-        if bp.end() >= len(rhs_text.rstrip()):
-            trailing_comments.insert(0, bp.group(1))
-            rhs_text = rhs_text[:bp.start()] + rhs_text[bp.end():]
-            rhs_text = rhs_text.rstrip()
-        else:
-            break
-    if trailing_comments:
-        comment = " ".join(trailing_comments)
 
-    # Extract flag operations from RHS text before symbol parsing
-    rhs_flags, rhs_text = _extract_flags_from_text(rhs_text)
-    flags.extend(rhs_flags)
-
-    # Parse LHS and RHS
-    lhs_elements = _parse_symbol_sequence(lhs_text, is_lhs=True)
-    rhs_elements = _parse_symbol_sequence(rhs_text, is_lhs=False)
+def _make_rule(body: str, gram_num: int, rule_num: int) -> Rule:
+    """Build a numbered Rule from the (cached) parse of its body.
 
+    Each Rule gets its own flags/lhs/rhs lists; the nodes inside them are
+    shared between rules with identical bodies.
+    """
+    weight, flags, lhs, rhs, comment = _parse_rule_body(body)
     return Rule(
         grammar_num=gram_num, rule_num=rule_num,
-        weight=weight, flags=flags,
-        lhs=lhs_elements, rhs=rhs_elements,
+        weight=weight, flags=list(flags),
+        lhs=list(lhs), rhs=list(rhs),
         comment=comment,
     )
 
 
-def _parse_bare_rule_line(line: str, gram_num: int, rule_num: int) -> Rule:
-    """Parse a bare rule line (no gram#N[M] prefix) like 'B --> x a'."""
-    rest = line.strip()
+_RuleBody = tuple[Weight | None, tuple[Flag, ...], tuple[RHSElement, ...],
+                  tuple[RHSElement, ...], str | None]
+
 
+@lru_cache(maxsize=4096)
+def _parse_rule_body(rest: str) -> _RuleBody:
+    """Parse 'weight flags LHS --> RHS [annotations]' (without gram#N[M]).
+
+    The result depends only on the text, so it is cached: grammars repeat
+    identical rule bodies across blocks.
+    """
     # Parse weight
     weight = None
     m = RE_WEIGHT.match(rest)
@@ -333,30 +333,16 @@ def _parse_bare_rule_line(line: str, gram_num: int, rule_num: int) -> Rule:
     # Split on arrow
     arrow_m = RE_ARROW.search(rest)
     if arrow_m is None:
-        return Rule(
-            grammar_num=gram_num, rule_num=rule_num,
-            weight=weight, flags=flags,
-            lhs=[NonTerminal("?")], rhs=[]
-        )
+        # Malformed rule -- return with what we have
+        return weight, tuple(flags), (_nt("?"),), (), None
 
     lhs_text = rest[:arrow_m.start()].strip()
     rhs_text = rest[arrow_m.end():].strip()
 
     # Remove trailing inline annotations from RHS
-    comment = None
-    bracket_parts = list(RE_ANNOTATION.finditer(rhs_text))
-    trailing_comments = []
-    for bp in reversed(bracket_parts):
-        if bp.end() >= len(rhs_text.rstrip()):
-            trailing_comments.insert(0, bp.group(1))
-            rhs_text = rhs_text[:bp.start()] + rhs_text[bp.end():]
-            rhs_text = rhs_text.rstrip()
-        else:
-            break
-    if trailing_comments:
-        comment = " ".join(trailing_comments)
+    rhs_text, comment = _split_trailing_annotations(rhs_text)
 
-    # Extract flag operations from RHS text
+    # Extract flag operations from RHS text before symbol parsing
     rhs_flags, rhs_text = _extract_flags_from_text(rhs_text)
     flags.extend(rhs_flags)
 
@@ -364,14 +350,34 @@ def _parse_bare_rule_line(line: str, gram_num: int, rule_num: int) -> Rule:
     lhs_elements = _parse_symbol_sequence(lhs_text, is_lhs=True)
     rhs_elements = _parse_symbol_sequence(rhs_text, is_lhs=False)
 
-    return Rule(
-        grammar_num=gram_num, rule_num=rule_num,
-        weight=weight, flags=flags,
-        lhs=lhs_elements, rhs=rhs_elements,
-        comment=comment,
-    )
+    return (weight, tuple(flags), tuple(lhs_elements), tuple(rhs_elements),
+            comment)
+
+
+def _split_trailing_annotations(text: str) -> tuple[str, str | None]:
+    """Split trailing [annotation] groups off text.
+
+    Returns (text without them, their contents joined by spaces or None).
+    Walks back from the end with str.rfind/find and slices once.  Like
+    RE_ANNOTATION, an annotation ending at a ']' starts at the first '['
+    after the previous ']'.
+    """
+    end = len(text.rstrip())
+    comments = []
+    while end and text[end - 1] == "]":
+        close = end - 1
+        open_pos = text.find("[", text.rfind("]", 0, close) + 1, close)
+        if open_pos == -1:
+            break
+        comments.append(text[open_pos + 1:close])
+        end = len(text[:open_pos].rstrip())
+    if not comments:
+        return text, None
+    comments.reverse()
+    return text[:end], " ".join(comments)
 
 
+@lru_cache(maxsize=1024)
 def _parse_flag_expr(expr: str) -> Flag:
     """Parse a flag expression like 'Ideas-1', 'NumR+1', 'Ideas=20', 'Ideas'."""
     # flag_name OP value (or flag_name OP flag_name)
@@ -383,209 +389,240 @@ def _parse_flag_expr(expr: str) -> Flag:
 
 
 def _extract_flags_from_text(text: str) -> tuple[list[Flag], str]:
-    """Extract /flag/ operations from text, returning (flags, cleaned_text)."""
-    flags = []
-    clean = text
-    for m in RE_FLAG.finditer(text):
-        flag = _parse_flag_expr(m.group(1).strip())
-        flags.append(flag)
-    # Remove all flag patterns from text
-    clean = RE_FLAG.sub("", clean).strip()
+    """Extract /flag/ operations from text, returning (flags, cleaned_text).
+
+    A single RE_FLAG.sub pass both collects the flags and removes them.
+    """
+    flags: list[Flag] = []
+    append = flags.append
+
+    def capture(m: re.Match[str]) -> str:
+        append(_parse_flag_expr(m.group(1).strip()))
+        return ""
+
+    clean = RE_FLAG.sub(capture, text).strip()
     return flags, clean
 
 
 def _parse_symbol_sequence(text: str, is_lhs: bool = False) -> list[RHSElement]:
-    """Parse a sequence of symbols from LHS or RHS text."""
+    """Parse a sequence of symbols from LHS or RHS text.
+
+    RE_ELEMENT_START finds the next character that can begin an element;
+    only the alternatives for that character are then tried.  Everything
+    else (whitespace, stray punctuation) is skipped in C.
+    """
     elements: list[RHSElement] = []
-    pos = 0
+    append = elements.append
     text = text.strip()
+    find_start = RE_ELEMENT_START.search
+    matchers = _ELEMENT_MATCHERS
+    builders = _ELEMENT_BUILDERS
+    pos = 0
 
-    while pos < len(text):
-        # Skip whitespace
-        if text[pos] in " \t":
+    while True:
+        start = find_start(text, pos)
+        if start is None:
+            break
+        pos = start.start()
+        m = matchers[text[pos]](text, pos)
+        if m is None:
             pos += 1
             continue
-
-        consumed, elem = _try_parse_element(text, pos, is_lhs)
+        pos, elem = builders[m.lastgroup](text, m)
         if elem is not None:
-            if isinstance(elem, list):
-                elements.extend(elem)
-            else:
-                elements.append(elem)
-            pos += consumed
-        else:
-            # Skip unrecognized character
-            pos += 1
+            append(elem)
 
     return elements
 
 
-def _try_parse_element(text: str, pos: int, is_lhs: bool) -> tuple[int, RHSElement | list[RHSElement] | None]:
-    """Try to parse a single element starting at pos. Returns (chars consumed, element)."""
-    remaining = text[pos:]
-
-    # Flag in RHS (e.g. /Ideas=20/)
-    m = RE_FLAG.match(remaining)
-    if m:
-        # Skip flags in the symbol stream -- they're already parsed
-        return m.end(), None
+# ---------- Element scanner ----------
+#
+# One named alternative per element kind, with the characters it can
+# start with, in the priority order BP3 requires: at a given position the
+# first alternative that matches wins.  Guards on the following character
+# are lookarounds; a leading \b is not needed because an element always
+# starts a token.  Alternatives whose remaining guards are checked by
+# their builder are the last ones that can match their first character,
+# so rejecting simply skips it.
 
-    # Lambda
-    m = RE_LAMBDA.match(remaining)
-    if m:
-        return m.end(), Lambda()
+_LOWER = "abcdefghijklmnopqrstuvwxyz"
+_UPPER = _LOWER.upper()
+_DIGITS = "0123456789"
+_FR_NAMES = r"(?:do|re|mi|fa|sol|la|si)"
 
+_ELEMENT_ALTERNATIVES: tuple[tuple[str, str, str], ...] = (
+    ("lambda", "l", r"lambda\b"),
     # Tempo inline: ||N|| (MusicXML import BPM marker)
-    m = RE_TEMPO_INLINE.match(remaining)
-    if m:
-        bpm = m.group(1)
-        return m.end(), SpecialFn(name="mm_inline", args=[bpm])
-
-    # Special function
-    m = RE_SPECIAL_FN.match(remaining)
-    if m:
-        return m.end(), SpecialFn(name=m.group(1), args=_split_args(m.group(2)))
-
-    # Bare special function (no parens): _striated, _pitchcont, _pitchstep, _velcont, _retro, _destru, etc.
-    m = RE_SPECIAL_FN_BARE.match(remaining)
-    if m and not remaining[m.end():m.end()+1] == "(":
-        # Must be followed by whitespace, end-of-string, or non-alnum
-        if m.end() >= len(remaining) or not remaining[m.end()].isalnum():
-            return m.end(), SpecialFn(name=m.group(1), args=[])
-
-    # Homomorphism master (= ...) or (= ...)
-    m = RE_HOMO_MASTER.match(remaining)
-    if m:
-        close_pos = _find_matching_paren(text, pos)
-        if close_pos is not None:
-            inner = text[pos + m.end():close_pos].strip()
-            inner_elems = _parse_symbol_sequence(inner, is_lhs=False)
-            return close_pos - pos + 1, HomoApply(kind=HomoApplyKind.MASTER, elements=inner_elems)
-
-    # Homomorphism slave (: ...) or (: ...)
-    m = RE_HOMO_SLAVE.match(remaining)
-    if m:
-        close_pos = _find_matching_paren(text, pos)
-        if close_pos is not None:
-            inner = text[pos + m.end():close_pos].strip()
-            inner_elems = _parse_symbol_sequence(inner, is_lhs=False)
-            return close_pos - pos + 1, HomoApply(kind=HomoApplyKind.SLAVE, elements=inner_elems)
-
-    # Polymetric expression
-    if remaining.startswith("{"):
-        close_pos = _find_matching_brace(text, pos)
-        if close_pos is not None:
-            inner = text[pos + 1:close_pos]
-            poly = _parse_polymetric(inner)
-            return close_pos - pos + 1, poly
-
-    # Variable |name|
-    m = RE_VARIABLE.match(remaining)
-    if m:
-        return m.end(), Variable(name=m.group(1))
-
-    # Wildcard ?N
-    m = RE_WILDCARD.match(remaining)
-    if m:
-        return m.end(), Wildcard(index=int(m.group(1)))
-
+    ("tempo", "|", r"\|\|(?P<bpm>\d+(?:\.\d+)?)\|\|"),
+    ("fn", "_", r"_(?P<fn_name>[a-zA-Z]\w*)\((?P<fn_args>[^)]*)\)"),
+    # Bare special function (no parens): _striated, _retro, _destru, etc.
+    ("fn_bare", "_", r"_(?P<bare_name>[a-zA-Z]\w*+)(?!\()"),
+    # Homomorphisms (= ...) / (: ...) and polymetry {...}: the builder
+    # finds the matching bracket
+    ("homo_master", "(", r"\(=\s*"),
+    ("homo_slave", "(", r"\(:\s*"),
+    ("poly", "{", r"\{"),
+    ("var", "|", r"\|(?P<var_name>[^|]+)\|"),
+    ("wildcard", "?", r"\?(?P<wild_index>\d+)"),
     # Time signature (e.g., 4+4+4+4+4+4/4)
-    m = RE_TIME_SIG.match(remaining)
-    if m:
-        return m.end(), TimeSig(text=m.group(1))
-
-    # Annotation [...]
-    if remaining.startswith("["):
-        m = RE_ANNOTATION.match(remaining)
-        if m:
-            return m.end(), Annotation(text=m.group(1))
-
+    ("time_sig", _DIGITS, r"(?P<sig>\d+(?:\+\d+)+/\d+)\b"),
+    ("annotation", "[", r"\[(?P<annotation_text>[^\]]*)\]"),
     # Homomorphism name (bare word like "mineur")
-    m = RE_HOMO_NAME.match(remaining)
-    if m and (pos + m.end() >= len(text) or not text[pos + m.end()].isalnum()):
-        return m.end(), HomoApply(kind=HomoApplyKind.REF, elements=[NonTerminal(m.group(1))])
-
-    # Tied notes: &note (tie end), note& (tie start)
-    # Check for French tied notes first (e.g., &do4, fa4&)
-    m = RE_TIED_NOTE_FR.match(remaining)
-    if m:
-        tie_start_prefix = m.group(1)  # & before note
-        note_name = m.group(2)
-        if m.group(3):
-            note_name += m.group(3)  # accidental
-        octave = int(m.group(4))
-        tie_end_suffix = m.group(5)  # & after note
-
-        if tie_start_prefix or tie_end_suffix:
-            note = Note(name=note_name, octave=octave)
-            # tie_start_prefix means this note ENDS a tie (&C4)
-            # tie_end_suffix means this note STARTS a tie (C4&)
-            is_start = bool(tie_end_suffix)
-            return m.end(), Tie(note=note, is_start=is_start)
-        # No tie markers, fall through to regular note parsing
-
+    ("homo_ref", "mt", r"(?P<homo_name>mineur|majeur|trn)\b"),
+    # Tied French notes (&do4, fa4&): only with at least one tie marker
+    ("tie_fr", "&dflmrs", rf"(?=&|{_FR_NAMES}[b#]?\d&)&?"
+                          rf"(?P<tie_fr_name>{_FR_NAMES}[b#]?)(?P<tie_fr_octave>\d)"
+                          r"(?P<tie_fr_start>&)?"),
     # Notes: French solfege (always unambiguous: do4, re5, sib4, etc.)
-    m = RE_NOTE_FR.match(remaining)
-    if m:
-        name = m.group(1)
-        if m.group(2):
-            name += m.group(2)
-        return m.end(), Note(name=name, octave=int(m.group(3)))
-
+    ("note_fr", "dflmrs", rf"(?P<fr_name>{_FR_NAMES}[b#]?)(?P<fr_octave>\d)\b"),
     # Notes: Indian sargam (unambiguous: sa6, re6, ga6, etc.)
-    m = RE_NOTE_INDIAN.match(remaining)
-    if m:
-        return m.end(), Note(name=m.group(1), octave=int(m.group(2)))
-
-    # Rest: dash
-    if remaining[0] == "-" and (pos == 0 or text[pos - 1] in " \t{,"):
-        next_pos = pos + 1
-        if next_pos >= len(text) or text[next_pos] in " \t}\n,":
-            return 1, Rest(determined=True)
-
-    # Rest: underscore (standalone)
-    if remaining[0] == "_" and (pos + 1 >= len(text) or not remaining[1:2].isalpha()):
-        return 1, Rest(determined=False)
-
+    ("note_indian", "dgmnprs",
+     r"(?P<indian_name>sa|re|ga|ma|pa|dha|ni)(?P<indian_octave>\d)\b"),
+    # Rest: standalone dash
+    ("rest_dash", "-", r"(?<![^ \t{,])-(?![^ \t}\n,])"),
+    # Rest: standalone underscore (builder checks it is not before a letter)
+    ("rest_under", "_", r"_"),
     # Anglo tied notes: &C4, C4&, &C#4, C#4& etc.
-    # Must be checked BEFORE NonTerminals because C4& would otherwise match as NonTerminal "C4"
-    m = RE_TIED_NOTE_ANGLO.match(remaining)
-    if m:
-        tie_start_prefix = m.group(1)  # & before note
-        note_base = m.group(2)
-        accidental = m.group(3) or ""
-        octave = int(m.group(4))
-        tie_end_suffix = m.group(5)  # & after note
-
-        if tie_start_prefix or tie_end_suffix:
-            note = Note(name=note_base + accidental, octave=octave)
-            is_start = bool(tie_end_suffix)
-            return m.end(), Tie(note=note, is_start=is_start)
-        # No tie markers, fall through to NonTerminal parsing
-
+    # Must come BEFORE NonTerminals because C4& would otherwise match as NonTerminal "C4"
+    ("tie_anglo", "&ABCDEFG", r"(?=&|[A-G][#b]?\d&)&?"
+                              r"(?P<tie_anglo_name>[A-G][#b]?)(?P<tie_anglo_octave>\d)"
+                              r"(?P<tie_anglo_start>&)?"),
     # Nonterminal (uppercase start): A8, B"8, Tihai, P4, etc.
     # Must come BEFORE Anglo notes since most BP3 grammars use solfege
-    m = RE_NONTERMINAL.match(remaining)
-    if m:
-        name = m.group(1)
-        if name not in ("ORD", "RND", "LIN", "SUB1", "SUB", "INIT"):
-            return m.end(), NonTerminal(name=name)
-
+    ("nonterminal", _UPPER, r"(?P<nt_name>[A-Z][A-Za-z0-9_'\"]*)\b"),
     # Anglo notes: only unambiguous when they have accidentals (C#4, Bb3)
-    # Plain A4, C8 etc. are caught as NonTerminals above
-    m = RE_NOTE_ANGLO.match(remaining)
-    if m and m.group(2):  # only match if accidental present
-        name = m.group(1) + m.group(2)
-        return m.end(), Note(name=name, octave=int(m.group(3)))
-
+    ("note_anglo", "ABCDEFG", r"(?P<anglo_name>[A-G][#b])(?P<anglo_octave>\d)\b"),
     # Plain terminals (lowercase identifiers like 'ek', 'do', 'tin')
-    m = re.match(r"[a-z][a-z0-9_'\"]*", remaining)
-    if m:
-        word = m.group(0)
-        if word != "lambda" and word not in ("mineur", "majeur", "trn"):
-            return m.end(), NonTerminal(name=word)
+    ("terminal", _LOWER, r"[a-z][a-z0-9_'\"]*"),
+)
+
 
-    return 1, None
+def _compile_element_matchers() -> dict[str, Callable[[str, int], re.Match[str] | None]]:
+    """Map each possible first character to a bound match() of the
+    alternatives that can start with it (shared between characters that
+    have the same alternatives)."""
+    compiled: dict[tuple[str, ...], Callable[[str, int], re.Match[str] | None]] = {}
+    matchers = {}
+    first_chars = "".join(first for _, first, _ in _ELEMENT_ALTERNATIVES)
+    for ch in dict.fromkeys(first_chars):
+        alternatives = tuple(f"(?P<{kind}>{pattern})"
+                             for kind, first, pattern in _ELEMENT_ALTERNATIVES
+                             if ch in first)
+        if alternatives not in compiled:
+            compiled[alternatives] = re.compile("|".join(alternatives)).match
+        matchers[ch] = compiled[alternatives]
+    return matchers
+
+
+_ELEMENT_MATCHERS = _compile_element_matchers()
+RE_ELEMENT_START = re.compile(
+    "[" + "".join(map(re.escape, _ELEMENT_MATCHERS)) + "]")
+
+# Shared instances of the frozen value nodes (see ast_nodes)
+_LAMBDA = Lambda()
+_REST_DETERMINED = Rest(determined=True)
+_REST_UNDETERMINED = Rest(determined=False)
+
+
+@lru_cache(maxsize=None)
+def _nt(name: str) -> NonTerminal:
+    """Return the shared NonTerminal for name."""
+    return NonTerminal(name=name)
+
+
+@lru_cache(maxsize=None)
+def _note(name: str, octave: str) -> Note:
+    """Return the shared Note for a matched name and octave digit."""
+    return Note(name=name, octave=int(octave))
+
+
+# (text, match) -> (position after the element, element or None to skip)
+_ElementBuilder = Callable[[str, re.Match[str]], tuple[int, RHSElement | None]]
+
+_MODE_KEYWORDS = frozenset(("ORD", "RND", "LIN", "SUB1", "SUB", "INIT"))
+_RESERVED_WORDS = frozenset(("lambda", "mineur", "majeur", "trn"))
+
+
+def _build_homo(kind: HomoApplyKind) -> _ElementBuilder:
+    def build(text: str, m: re.Match[str]) -> tuple[int, RHSElement | None]:
+        close_pos = _find_matching_paren(text, m.start())
+        if close_pos is None:
+            return m.start() + 1, None
+        inner = text[m.end():close_pos].strip()
+        inner_elems = _parse_symbol_sequence(inner, is_lhs=False)
+        return close_pos + 1, HomoApply(kind=kind, elements=inner_elems)
+    return build
+
+
+def _build_polymetric(text: str, m: re.Match[str]) -> tuple[int, RHSElement | None]:
+    close_pos = _find_matching_brace(text, m.start())
+    if close_pos is None:
+        return m.start() + 1, None
+    return close_pos + 1, _parse_polymetric(text[m.start() + 1:close_pos])
+
+
+def _build_rest_under(text: str, m: re.Match[str]) -> tuple[int, RHSElement | None]:
+    end = m.end()
+    # str.isalpha, not an ASCII table: "_é" must stay a non-rest
+    return end, None if text[end:end + 1].isalpha() else _REST_UNDETERMINED
+
+
+def _build_nonterminal(text: str, m: re.Match[str]) -> tuple[int, RHSElement | None]:
+    name = m.group("nt_name")
+    if name in _MODE_KEYWORDS:
+        return m.start() + 1, None
+    return m.end(), _nt(name)
+
+
+def _build_terminal(text: str, m: re.Match[str]) -> tuple[int, RHSElement | None]:
+    word = m.group()
+    if word in _RESERVED_WORDS:
+        return m.start() + 1, None
+    return m.end(), _nt(word)
+
+
+# Element builders by alternative name (the match's lastgroup).  For
+# ties, a leading & (&C4) means the note ENDS a tie and a trailing &
+# (C4&) means it STARTS one.
+_ELEMENT_BUILDERS: dict[str | None, _ElementBuilder] = {
+    "lambda": lambda text, m: (m.end(), _LAMBDA),
+    "tempo": lambda text, m: (
+        m.end(), SpecialFn(name="mm_inline", args=[m.group("bpm")])),
+    "fn": lambda text, m: (
+        m.end(), SpecialFn(name=m.group("fn_name"),
+                           args=_split_args(m.group("fn_args")))),
+    "fn_bare": lambda text, m: (
+        m.end(), SpecialFn(name=m.group("bare_name"), args=[])),
+    "homo_master": _build_homo(HomoApplyKind.MASTER),
+    "homo_slave": _build_homo(HomoApplyKind.SLAVE),
+    "poly": _build_polymetric,
+    "var": lambda text, m: (m.end(), Variable(name=m.group("var_name"))),
+    "wildcard": lambda text, m: (
+        m.end(), Wildcard(index=int(m.group("wild_index")))),
+    "time_sig": lambda text, m: (m.end(), TimeSig(text=m.group("sig"))),
+    "annotation": lambda text, m: (
+        m.end(), Annotation(text=m.group("annotation_text"))),
+    "homo_ref": lambda text, m: (
+        m.end(), HomoApply(kind=HomoApplyKind.REF,
+                           elements=[_nt(m.group("homo_name"))])),
+    "tie_fr": lambda text, m: (
+        m.end(), Tie(note=_note(m.group("tie_fr_name"), m.group("tie_fr_octave")),
+                     is_start=m.group("tie_fr_start") is not None)),
+    "note_fr": lambda text, m: (
+        m.end(), _note(m.group("fr_name"), m.group("fr_octave"))),
+    "note_indian": lambda text, m: (
+        m.end(), _note(m.group("indian_name"), m.group("indian_octave"))),
+    "rest_dash": lambda text, m: (m.end(), _REST_DETERMINED),
+    "rest_under": _build_rest_under,
+    "tie_anglo": lambda text, m: (
+        m.end(), Tie(note=_note(m.group("tie_anglo_name"),
+                                m.group("tie_anglo_octave")),
+                     is_start=m.group("tie_anglo_start") is not None)),
+    "nonterminal": _build_nonterminal,
+    "note_anglo": lambda text, m: (
+        m.end(), _note(m.group("anglo_name"), m.group("anglo_octave"))),
+    "terminal": _build_terminal,
+}
 
 
 def _parse_polymetric(inner: str) -> Polymetric:
@@ -599,71 +636,85 @@ def _parse_polymetric(inner: str) -> Polymetric:
     # Check if first part is a number (tempo ratio)
     first = parts[0].strip()
     ratio = None
-    if re.match(r"^\d+$", first):
+    if first.isdecimal():  # same test as re.match(r"^\d+$", first)
         ratio = int(first)
         parts = parts[1:]
 
-    voices = []
-    for part in parts:
-        elems = _parse_symbol_sequence(part.strip(), is_lhs=False)
-        if elems:
-            voices.append(elems)
+    # Empty voices are dropped
+    voices = [elems for part in parts
+              if (elems := _parse_symbol_sequence(part.strip(), is_lhs=False))]
 
     return Polymetric(tempo_ratio=ratio, voices=voices)
 
 
 def _split_poly_commas(text: str) -> list[str]:
-    """Split text on commas, respecting nested braces."""
-    parts = []
-    depth = 0
-    current = []
-
-    for ch in text:
-        if ch == "{":
-            depth += 1
-            current.append(ch)
-        elif ch == "}":
-            depth -= 1
-            current.append(ch)
-        elif ch == "," and depth == 0:
-            parts.append("".join(current))
-            current = []
-        else:
-            current.append(ch)
-
-    if current:
-        parts.append("".join(current))
+    """Split text on commas, respecting nested braces.
+
+    An empty last part (trailing comma or empty text) is dropped.
+    """
+    if "{" not in text and "}" not in text:
+        parts = text.split(",")
+    else:
+        # Visit only the delimiters; text between them is sliced once
+        parts = []
+        depth = 0
+        start = 0
+        for m in _RE_POLY_DELIMITER.finditer(text):
+            ch = m.group()
+            if ch == "{":
+                depth += 1
+            elif ch == "}":
+                depth -= 1
+            elif depth == 0:
+                parts.append(text[start:m.start()])
+                start = m.end()
+        parts.append(text[start:])
+
+    if not parts[-1]:
+        parts.pop()
     return parts
 
 
 def _find_matching_brace(text: str, open_pos: int) -> int | None:
     """Find the matching closing brace for '{' at open_pos."""
-    depth = 0
-    for i in range(open_pos, len(text)):
-        if text[i] == "{":
-            depth += 1
-        elif text[i] == "}":
-            depth -= 1
-            if depth == 0:
-                return i
-    return None
+    return _find_matching(text, open_pos, "{", "}")
 
 
 def _find_matching_paren(text: str, open_pos: int) -> int | None:
     """Find the matching closing paren for '(' at open_pos."""
+    return _find_matching(text, open_pos, "(", ")")
+
+
+def _find_matching(text: str, open_pos: int, open_ch: str, close_ch: str) -> int | None:
+    """Find the close_ch balancing the open_ch at open_pos.
+
+    Jumps from delimiter to delimiter with str.find instead of visiting
+    every character.
+    """
+    find = text.find
     depth = 0
-    for i in range(open_pos, len(text)):
-        if text[i] == "(":
+    next_open = find(open_ch, open_pos)
+    next_close = find(close_ch, open_pos)
+    while next_close != -1:
+        if next_open != -1 and next_open < next_close:
             depth += 1
-        elif text[i] == ")":
+            next_open = find(open_ch, next_open + 1)
+        else:
             depth -= 1
             if depth == 0:
-                return i
+                return next_close
+            next_close = find(close_ch, next_close + 1)
     return None
 
 
 def _split_args(args_str: str) -> list[str]:
     """Split function arguments on commas."""
+    return list(_split_args_cached(args_str))
+
+
+@lru_cache(maxsize=512)
+def _split_args_cached(args_str: str) -> tuple[str, ...]:
+    """Cached split; a tuple so callers cannot alter the shared result."""
     if not args_str.strip():
-        return []
-    return [a.strip() for a in args_str.split(",")]
+        return ()
+    return tuple(a.strip() for a in args_str.split(","))
@@ -11,11 +11,13 @@ produces the same AST node types.
 
 from __future__ import annotations
 
+from typing import Iterator
+
 from bp2sc.ast_nodes import (
     BPFile, GrammarBlock, Rule,
     Note, Rest, NonTerminal, Variable, Wildcard,
     Polymetric, SpecialFn, Lambda, HomoApply, HomoApplyKind,
-    TimeSig, Annotation, RHSElement,
+    TimeSig, Annotation, RHSElement, _RHS_ELEMENT_TYPES_FROZEN,
 )
 
 
@@ -50,7 +52,12 @@ def _validate_elements(
 ) -> None:
     """Validate RHS elements recursively."""
     for elem in elements:
-        if isinstance(elem, HomoApply):
+        if type(elem) not in _RHS_ELEMENT_TYPES_FROZEN:
+            warnings.append(
+                f"Rule gram#{rule.grammar_num}[{rule.rule_num}]: "
+                f"unexpected element type {type(elem).__name__}"
+            )
+        elif isinstance(elem, HomoApply):
             if not isinstance(elem.kind, HomoApplyKind):
                 warnings.append(
                     f"Rule gram#{rule.grammar_num}[{rule.rule_num}]: "
@@ -91,14 +98,15 @@ def collect_terminal_symbols(bp_file: BPFile) -> set[str]:
     return terminals
 
 
-def _walk_rhs(elements: list[RHSElement]) -> list[RHSElement]:
-    """Recursively walk all RHS elements including nested ones."""
-    result: list[RHSElement] = []
+def _walk_rhs(elements: list[RHSElement]) -> Iterator[RHSElement]:
+    """Recursively walk all RHS elements including nested ones (pre-order).
+
+    A generator, so callers that only scan the elements never build a list.
+    """
     for elem in elements:
-        result.append(elem)
+        yield elem
         if isinstance(elem, Polymetric):
             for voice in elem.voices:
-                result.extend(_walk_rhs(voice))
+                yield from _walk_rhs(voice)
         elif isinstance(elem, HomoApply):
-            result.extend(_walk_rhs(elem.elements))
-    return result
+            yield from _walk_rhs(elem.elements)
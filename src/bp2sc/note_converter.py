@@ -20,6 +20,8 @@ apply that offset separately if needed.
 
 from __future__ import annotations
 
+from typing import Iterable
+
 # --- French solfege (do = C) ---
 _FR_BASE: dict[str, int] = {
     "do": 0, "re": 2, "mi": 4, "fa": 5,
@@ -55,6 +57,18 @@ _FR_NAMES = set(_FR_BASE.keys())
 _INDIAN_NAMES = set(_INDIAN_BASE.keys())
 _ANGLO_NAMES = set(_ANGLO_BASE.keys())
 
+# All names in one table.  French and Indian keys are lowercase and Anglo
+# keys start uppercase, so no key is shared across case; "re" is both
+# French and Indian (same semitone), French listed last so it wins.
+_ALL_SEMITONES: dict[str, int] = {**_ANGLO_BASE, **_INDIAN_BASE, **_FR_BASE}
+
+# Precomputed MIDI number for every name (as written) in octaves -1..9
+_NOTE_MIDI_TABLE: dict[tuple[str, int], int] = {
+    (name, octave): (octave + 1) * 12 + semitone
+    for name, semitone in _ALL_SEMITONES.items()
+    for octave in range(-1, 10)
+}
+
 
 def note_to_midi(name: str, octave: int, base_octave: int = 4) -> int:
     """Convert a note name + octave to a MIDI note number.
@@ -68,48 +82,65 @@ def note_to_midi(name: str, octave: int, base_octave: int = 4) -> int:
     Returns:
         MIDI note number (0-127)
     """
-    # Try French solfege first
-    # All conventions use (octave + 1) * 12 in BP3: do4 = C4 = 60
-    if name.lower() in _FR_BASE:
-        semitone = _FR_BASE[name.lower()]
-        return (octave + 1) * 12 + semitone
-
-    # Try Indian sargam
-    if name.lower() in _INDIAN_BASE:
-        semitone = _INDIAN_BASE[name.lower()]
-        # Indian octave numbering: in mohanam, sa6 corresponds roughly to C5 (MIDI 72)
-        # BP3 Indian convention: sa4 = C4 = 60 by default
-        # But in trial.mohanam, notes use octave 6-7 range
-        return (octave + 1) * 12 + semitone
+    midi = _NOTE_MIDI_TABLE.get((name, octave))
+    if midi is not None:
+        return midi
+
+    # French/Indian names are matched case-insensitively, Anglo names
+    # exactly; lowercase only when the name is not found as written.
+    # All conventions use (octave + 1) * 12 in BP3: do4 = C4 = sa4 = 60
+    semitone = _ALL_SEMITONES.get(name)
+    if semitone is None:
+        semitone = _ALL_SEMITONES.get(name.lower())
+        if semitone is None:
+            raise ValueError(f"Unknown note name: {name!r}")
+    return (octave + 1) * 12 + semitone
+
+
+def notes_to_midi(names: Iterable[str], octaves: Iterable[int]) -> list[int]:
+    """Convert parallel sequences of note names and octaves to MIDI numbers.
+
+    Batch form of note_to_midi(): pairs in the precomputed table are
+    looked up inline; anything else goes through note_to_midi() (case
+    folding, other octaves, ValueError for unknown names).
+
+    Raises:
+        ValueError: on an unknown name or if the sequences differ in length
+    """
+    get = _NOTE_MIDI_TABLE.get
+    return [
+        midi if (midi := get((name, octave))) is not None
+        else note_to_midi(name, octave)
+        for name, octave in zip(names, octaves, strict=True)
+    ]
 
-    # Try Anglo
-    if name in _ANGLO_BASE:
-        semitone = _ANGLO_BASE[name]
-        return (octave + 1) * 12 + semitone
 
-    raise ValueError(f"Unknown note name: {name!r}")
+# Names that identify a convention on their own
+_FRENCH_ONLY = frozenset({"do", "sol", "si", "sib", "fa"})
+_INDIAN_ONLY = frozenset({"sa", "ga", "ma", "pa", "dha", "ni"})
 
 
 def detect_convention(names: list[str]) -> str:
     """Detect the naming convention from a list of note names.
 
+    French names take precedence over Indian ones, which take precedence
+    over capitalized (Anglo) names.  The scan stops at the first French
+    name; otherwise the whole list is needed to rule French out.
+
     Returns: "french", "indian", "anglo", or "unknown"
     """
-    lower_names = {n.lower() for n in names}
-
-    # Check for distinctly French names
-    french_only = {"do", "sol", "si", "sib", "fa"}
-    if lower_names & french_only:
-        return "french"
-
-    # Check for distinctly Indian names
-    indian_only = {"sa", "ga", "ma", "pa", "dha", "ni"}
-    if lower_names & indian_only:
+    indian = anglo = False
+    for n in names:
+        ln = n.lower()
+        if ln in _FRENCH_ONLY:
+            return "french"
+        if ln in _INDIAN_ONLY:
+            indian = True
+        elif not anglo and n[0:1].isupper():
+            anglo = True
+
+    if indian:
         return "indian"
-
-    # Check for Anglo
-    anglo_names = {n for n in names if n[0:1].isupper()}
-    if anglo_names:
+    if anglo:
         return "anglo"
-
     return "unknown"
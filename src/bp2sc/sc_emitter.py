@@ -15,10 +15,13 @@ INVARIANTS:
 from __future__ import annotations
 
 import re
-from collections import Counter
+import sys
+from collections import Counter, defaultdict
 from dataclasses import dataclass, field
+from functools import lru_cache
 
 from pathlib import Path
+from typing import Any, Callable, Iterator
 
 from bp2sc.ast_nodes import (
     BPFile, GrammarBlock, Rule, Weight, Flag,
@@ -33,19 +36,83 @@ from bp2sc.note_converter import note_to_midi
 from bp2sc.scale_map import resolve_scale
 from bp2sc.alphabet_parser import (
     parse_alphabet_file, parse_alphabet_dir, AlphabetFile,
-    get_homomorphism_mapping,
+    index_homomorphisms,
 )
 from bp2sc.sc_templates import (
     sc_header, sc_footer, sc_synthdef_default, sc_tempo,
-    sc_pdef, sc_pbind, sc_pseq, sc_ppar, sc_prand, sc_pwrand,
+    sc_pdef, sc_pbind, sc_pbind_note, sc_pseq, sc_ppar, sc_prand, sc_pwrand,
     sc_pn, sc_rest, sc_comment, sc_play, sc_pseed, sc_pfindur,
     _sc_name, _indent,
 )
 
 
-@dataclass
+# First and optional second character of an Anglo note name (C4, D#5, Bb3)
+_ANGLO_LETTERS = frozenset("ABCDEFG")
+_ANGLO_ACCIDENTALS = frozenset("#b")
+
+# A rest as a standalone event, for pattern-level (non-Pbind) contexts
+_EVENT_SILENT = "Event.silent(0.25)"
+
+# Valid MIDI note numbers as emitted (str(int)), see _is_midi_number
+_MIDI_NUMBERS = frozenset(map(str, range(128)))
+
+_RE_MIDI_PROGRAM = re.compile(r"MIDI program (\d+)")
+
+# French note names by pitch class, as used by homomorphism mappings
+_FRENCH_NAMES = ('do', 'dop', 're', 'rep', 'mi', 'fa',
+                 'fap', 'sol', 'solp', 'la', 'lap', 'si')
+# Alternate (flat) spellings of the sharp French names
+_FRENCH_ALT_NAMES = {
+    'dop': 'reb', 'rep': 'mib', 'fap': 'solb', 'solp': 'lab', 'lap': 'sib',
+}
+# Either spelling -> pitch class
+_FRENCH_PITCH_CLASS = {name: i for i, name in enumerate(_FRENCH_NAMES)}
+_FRENCH_PITCH_CLASS.update(
+    (alt, _FRENCH_PITCH_CLASS[name]) for name, alt in _FRENCH_ALT_NAMES.items())
+
+
+def _french_note_names(midi: int) -> tuple[str, str | None]:
+    """French name of a MIDI note (do4 = 60) and its alternate spelling."""
+    octave = (midi // 12) - 1
+    base = _FRENCH_NAMES[midi % 12]
+    alt = _FRENCH_ALT_NAMES.get(base)
+    return f"{base}{octave}", f"{alt}{octave}" if alt else None
+
+
+_MIDI_FRENCH_NAMES = {midi: _french_note_names(midi) for midi in range(128)}
+
+# Leading lowercase letters of a French note name (the rest is the octave)
+_RE_FRENCH_PREFIX = re.compile(r"[a-z]*")
+_RE_NON_SYMBOL_CHAR = re.compile(r"[^a-zA-Z0-9_]")
+
+
+@lru_cache(maxsize=256)
+def _midi_code(name: str, octave: int) -> str:
+    """MIDI number of a note as SC code (e.g. "60" for do4)."""
+    return str(note_to_midi(name, octave))
+
+
+@lru_cache(maxsize=256)
+def _instrument_symbol(arg: str) -> str:
+    """Sanitize an _ins() instrument name into a SC symbol name."""
+    sym = _RE_NON_SYMBOL_CHAR.sub("_", arg.lower())
+    if sym and sym[0].isdigit():
+        sym = "inst_" + sym
+    if not sym:
+        sym = "bp2sc_default"
+    return sym
+
+
+# What _emit_element returns for one RHS element (see its docstring)
+_ElementResult = str | tuple[str, str] | dict[str, str] | None
+
+
+@dataclass(frozen=True, slots=True)
 class EmitWarning:
-    """A diagnostic warning produced during SC emission."""
+    """A diagnostic warning produced during SC emission.
+
+    Frozen: repeats of a warning share one instance (see _warn).
+    """
     category: str       # e.g. "unsupported_node", "flag_ignored"
     message: str        # human-readable description
     grammar: int | None = None   # grammar block index
@@ -71,7 +138,8 @@ class SCEmitter:
                  max_dur: float | None = None):
         self.bp = bp_file
         self.source_name = source_name
-        self.start_symbol = start_symbol
+        # Interned like the AST symbol names it is compared against
+        self.start_symbol = sys.intern(start_symbol)
         self.verbose = verbose
         self.seed = seed  # Deterministic seed for RND grammars
         self.alphabet_dir = alphabet_dir  # Directory containing -al.* files
@@ -80,11 +148,24 @@ class SCEmitter:
         # Load alphabet files for terminal mapping and homomorphisms
         self._alphabet_files: dict[str, AlphabetFile] = {}
         self._alphabet_terminal_map: dict[str, int] = {}  # symbol -> MIDI
+        self._homo_mappings: dict[str, dict[str, str]] = {}  # label -> mapping
         self._load_alphabet_files()
 
         # Collect all rules indexed by LHS symbol name
         self._rules_by_lhs: dict[str, list[tuple[GrammarBlock, Rule]]] = {}
-        self._collect_rules()
+        # Per grammar block (same order): primary LHS name -> its rules
+        self._lhs_groups: list[dict[str, list[Rule]]] = []
+        # Map symbol name -> sorted list of block indices that define it
+        self._symbol_blocks: dict[str, list[int]] = {}
+        # Detect homomorphism labels (NonTerminals before HomoApply, no rules)
+        self._homo_labels: set[str] = set()
+        # NonTerminal names referenced in RHS, in order of first appearance
+        self._rhs_symbols: dict[str, None] = {}
+        # Every flag name used by a rule, and the initial values assigned
+        # (op='=') on the start symbol's first rule
+        self._flag_names: set[str] = set()
+        self._flag_init_values: dict[str, str] = {}
+        self._index_ast()
 
         # Track which symbols are defined as LHS (nonterminals with rules)
         self._defined_symbols: set[str] = set(self._rules_by_lhs.keys())
@@ -93,19 +174,32 @@ class SCEmitter:
         self._tempo_bpm: float | None = None
 
         # Track which symbols appear in multiple blocks (need disambiguation)
-        self._multi_block_symbols: set[str] = set()
-        # Map symbol name -> sorted list of block indices that define it
-        self._symbol_blocks: dict[str, list[int]] = {}
-        self._detect_multi_block()
+        self._multi_block_symbols: set[str] = {
+            name for name, blocks in self._symbol_blocks.items()
+            if len(blocks) > 1
+        }
 
         # Current block being emitted (set during _emit_block)
         self._current_block: GrammarBlock | None = None
+        # Multi-block symbol -> Pdef name an RHS reference to it resolves
+        # to, one table per block index (see _rhs_refs_for); _rhs_refs is
+        # the table for the current block
+        self._rhs_refs_by_block: dict[int | None, dict[str, str]] = {}
+        self._rhs_refs: dict[str, str] = self._rhs_refs_for(None)
+        # Symbol name -> its emitted Pdef reference in the current block
+        self._pdef_refs: dict[str, str] = {}
+        # Special function name as written -> (lowercased name, entry of
+        # _SPECIAL_FN_EMITTERS or None)
+        self._special_fn_lookup: dict[
+            str, tuple[str, tuple[int, Callable[..., _ElementResult]] | None]
+        ] = {}
 
         # Pending repeat count for _repeat(N) implementation
         self._pending_repeat: int | None = None
 
-        # Detect homomorphism labels (NonTerminals before HomoApply, no rules)
-        self._homo_labels: set[str] = self._detect_homo_labels()
+        # id(Note) -> (note, MIDI code): notes are immutable and shared
+        # by the parser, and the entry keeps the node (and so its id) alive
+        self._note_codes: dict[int, tuple[Note, str]] = {}
 
         # Collect terminal symbols (NonTerminals without production rules)
         # and assign them MIDI notes so they produce playable events
@@ -114,6 +208,10 @@ class SCEmitter:
 
         # Diagnostic warnings collected during emission
         self.warnings: list[EmitWarning] = []
+        # (category, message, grammar, rule) -> the one EmitWarning that
+        # every repeat of that warning shares, see _warn
+        self._warning_pool: dict[tuple[str, str, int | None, int | None],
+                                 EmitWarning] = {}
         self._current_rule: Rule | None = None
 
         # Velocity state for _rndvel support
@@ -124,7 +222,7 @@ class SCEmitter:
         self._rndtime_range: float = 0.0  # Percentage of timing variation (0-100)
 
         # Tie tracking for tied notes (MusicXML import)
-        self._pending_tie_midi: int | None = None  # MIDI of note starting a tie
+        self._tie_stack: list[str] = []  # MIDI of notes with an open tie
 
         # Pedal state tracking (MusicXML import)
         self._sustain_pedal: bool = False
@@ -133,6 +231,12 @@ class SCEmitter:
 
         # Current homomorphism context (set by REF, applied by MASTER/SLAVE)
         self._current_homo_label: str | None = None
+        # Symbol name -> (inlined MIDI notes, rule tree height) for symbols
+        # that resolve without hitting the depth limit, see
+        # _resolve_symbol_midi_at
+        self._symbol_midi_cache: dict[str, tuple[list[int] | None, int]] = {}
+        # Homomorphism label -> {MIDI: transformed MIDI code}, filled on demand
+        self._homo_midi_tables: dict[str, dict[int, str]] = {}
 
         # Pre-scan for warnings on structure (before emit)
         self._prescan_warnings()
@@ -156,59 +260,94 @@ class SCEmitter:
 
         # Load all alphabet files in the directory
         self._alphabet_files = parse_alphabet_dir(dir_path)
+        self._homo_mappings = index_homomorphisms(self._alphabet_files)
 
         # Build terminal -> MIDI mapping from alphabet files
         # Look for file references in the BP file headers to determine which alphabet to use
         for ref in self.bp.headers:
             if isinstance(ref, FileRef) and ref.prefix == "al":
-                al_name = ref.name
-                if al_name in self._alphabet_files:
-                    af = self._alphabet_files[al_name]
-                    # Map terminal names to sequential MIDI starting from 60
-                    for i, term in enumerate(af.terminals):
-                        if term not in self._alphabet_terminal_map:
-                            # Try to parse as note name first
-                            m = self._RE_ANGLO_NOTE.match(term)
-                            if m:
-                                self._alphabet_terminal_map[term] = note_to_midi(
-                                    m.group(1) + (m.group(2) or ""),
-                                    int(m.group(3))
-                                )
-                            else:
-                                self._alphabet_terminal_map[term] = 60 + i
-
-    def _collect_rules(self) -> None:
-        """Index all rules by their LHS symbol name."""
+                af = self._alphabet_files.get(ref.name)
+                if af is not None:
+                    # Note names map to their pitch, other terminals to
+                    # sequential MIDI from 60; earlier files take precedence
+                    self._alphabet_terminal_map = (
+                        af.midi_map() | self._alphabet_terminal_map)
+
+    def _index_ast(self) -> None:
+        """Index the AST in a single pass over all rules.
+
+        Fills _rules_by_lhs (every named LHS symbol of a rule, including
+        context symbols), _lhs_groups and _symbol_blocks (keyed by the
+        primary LHS name), _homo_labels, _rhs_symbols, _flag_names and
+        _flag_init_values.
+
+        Homomorphism labels come from HomoApply(kind=REF) nodes: the
+        parser wraps homomorphism identifiers (e.g. 'mineur') in
+        HomoApply(kind=REF, elements=[NonTerminal('mineur')]).  These are
+        not playable sounds — they tell BP3 which mapping from the -ho.
+        file to use.
+        """
+        rules_by_lhs: defaultdict[str, list[tuple[GrammarBlock, Rule]]] = (
+            defaultdict(list))
+        labels = self._homo_labels
+        rhs_symbols = self._rhs_symbols
+        flag_names = self._flag_names
+        block_for_symbol: dict[str, set[int]] = defaultdict(set)
         for block in self.bp.grammars:
+            lhs_groups: defaultdict[str, list[Rule]] = defaultdict(list)
+            self._lhs_groups.append(lhs_groups)
+            block_index = block.index or 0
             for rule in block.rules:
+                primary = None
                 for elem in rule.lhs:
                     name = self._symbol_name(elem)
                     if name:
-                        if name not in self._rules_by_lhs:
-                            self._rules_by_lhs[name] = []
-                        self._rules_by_lhs[name].append((block, rule))
+                        if primary is None:
+                            primary = name
+                        rules_by_lhs[name].append((block, rule))
+                if primary is None:
+                    primary = f"gram{rule.grammar_num}_rule{rule.rule_num}"
+                lhs_groups[primary].append(rule)
+                block_for_symbol[primary].add(block_index)
 
-    def _detect_homo_labels(self) -> set[str]:
-        """Detect homomorphism label names from HomoApply(kind=REF) nodes.
+                for f in rule.flags:
+                    flag_names.add(f.name)
 
-        The parser wraps homomorphism identifiers (e.g. 'mineur') in
-        HomoApply(kind=REF, elements=[NonTerminal('mineur')]).
-        These are not playable sounds — they tell BP3 which mapping
-        from the -ho. file to use.
-        """
-        labels: set[str] = set()
-        for block in self.bp.grammars:
-            for rule in block.rules:
                 for elem in rule.rhs:
                     if (isinstance(elem, HomoApply)
-                            and elem.kind == HomoApplyKind.REF):
+                            and elem.kind is HomoApplyKind.REF):
                         for inner in elem.elements:
                             if isinstance(inner, NonTerminal):
                                 labels.add(inner.name)
-        return labels
+                for elem in self._iter_rhs_elements(rule.rhs):
+                    if isinstance(elem, NonTerminal):
+                        rhs_symbols[elem.name] = None
+            lhs_groups.default_factory = None
+
+        # Plain dict behaviour from here on: a missing key is a KeyError
+        rules_by_lhs.default_factory = None
+        self._rules_by_lhs = rules_by_lhs
+        for name, blocks in block_for_symbol.items():
+            self._symbol_blocks[name] = sorted(blocks)
 
-    # Regex for detecting Anglo note names among NonTerminals
-    _RE_ANGLO_NOTE = re.compile(r'^([A-G])(#|b)?(\d)$')
+        start_rules = rules_by_lhs.get(self.start_symbol)
+        if flag_names and start_rules:
+            for f in start_rules[0][1].flags:
+                if f.op == "=" and f.value is not None:
+                    self._flag_init_values[f.name] = f.value
+
+    @staticmethod
+    def _anglo_note_midi(name: str) -> int | None:
+        """MIDI number for an Anglo note name (C4, D#5, Bb3), else None.
+
+        Same test as alphabet_parser._RE_ANGLO_NOTE, done with a length
+        check and set lookups: most symbols are rejected on length alone.
+        """
+        n = len(name)
+        if ((n == 2 or (n == 3 and name[1] in _ANGLO_ACCIDENTALS))
+                and name[0] in _ANGLO_LETTERS and name[-1].isdecimal()):
+            return note_to_midi(name[:-1], int(name[-1]))
+        return None
 
     def _collect_terminals(self) -> None:
         """Find terminal symbols and assign MIDI notes for playback.
@@ -222,46 +361,47 @@ class SCEmitter:
         (because the parser prioritizes NonTerminal over Anglo notes)
         are detected here and mapped to correct MIDI via note_to_midi().
 
-        Homomorphism labels (detected by _detect_homo_labels) are
+        Homomorphism labels (collected by _index_ast) are
         excluded — they are not sounds.
 
         Alphabet mappings (from -al.* files) take precedence when loaded.
         """
         midi = 60  # start from middle C
-        for block in self.bp.grammars:
-            for rule in block.rules:
-                for elem in self._walk_rhs_elements(rule.rhs):
-                    if (isinstance(elem, NonTerminal)
-                            and elem.name not in self._defined_symbols
-                            and elem.name not in self._terminal_midi
-                            and elem.name not in self._homo_labels):
-                        # First check if alphabet mapping exists
-                        if elem.name in self._alphabet_terminal_map:
-                            self._terminal_midi[elem.name] = self._alphabet_terminal_map[elem.name]
-                        # Then check if this is an Anglo note (C4, D#5, Bb3, etc.)
-                        elif m := self._RE_ANGLO_NOTE.match(elem.name):
-                            note_name = m.group(1) + (m.group(2) or "")
-                            octave = int(m.group(3))
-                            self._terminal_midi[elem.name] = note_to_midi(
-                                note_name, octave
-                            )
-                        else:
-                            self._terminal_midi[elem.name] = midi
-                            midi += 1
+        for name in self._rhs_symbols:
+            if (name not in self._defined_symbols
+                    and name not in self._homo_labels):
+                # First check if alphabet mapping exists
+                if (alpha_midi := self._alphabet_terminal_map.get(name)) is not None:
+                    self._terminal_midi[name] = alpha_midi
+                # Then check if this is an Anglo note (C4, D#5, Bb3, etc.)
+                elif (note_midi := self._anglo_note_midi(name)) is not None:
+                    self._terminal_midi[name] = note_midi
+                else:
+                    self._terminal_midi[name] = midi
+                    midi += 1
 
     # ------------------------------------------------------------------
     # Warning / diagnostic infrastructure
     # ------------------------------------------------------------------
 
     def _warn(self, category: str, message: str) -> None:
-        """Record a diagnostic warning with current location context."""
+        """Record a diagnostic warning with current location context.
+
+        A warning repeated at the same location (e.g. the same
+        approximation in a rule emitted several times) is recorded
+        again, but as the same EmitWarning instance.
+        """
         gram = None
         rule_num = None
         if self._current_block is not None:
             gram = self._current_block.index
         if self._current_rule is not None:
             rule_num = self._current_rule.rule_num
-        self.warnings.append(EmitWarning(category, message, gram, rule_num))
+        key = (category, message, gram, rule_num)
+        warning = self._warning_pool.get(key)
+        if warning is None:
+            warning = self._warning_pool[key] = EmitWarning(*key)
+        self.warnings.append(warning)
 
     def _prescan_warnings(self) -> None:
         """Pre-scan the AST for structural warnings before emission."""
@@ -284,12 +424,22 @@ class SCEmitter:
         return "\n".join(lines)
 
     def warnings_report(self) -> str:
-        """Return a detailed listing of all warnings."""
+        """Return a detailed listing of all warnings.
+
+        Identical warnings are listed once, in first-seen order, with
+        their number of occurrences when more than one.
+        """
         if not self.warnings:
             return "No warnings."
         lines = [f"=== {len(self.warnings)} warning(s) ==="]
+        repeats: dict[tuple[str, str, int | None, int | None],
+                      tuple[EmitWarning, int]] = {}
         for w in self.warnings:
-            lines.append(str(w))
+            key = (w.category, w.message, w.grammar, w.rule)
+            first, n = repeats.get(key, (w, 0))
+            repeats[key] = (first, n + 1)
+        for w, n in repeats.values():
+            lines.append(f"{w} (x{n})" if n > 1 else str(w))
         # Summary by category
         counts: Counter[str] = Counter(w.category for w in self.warnings)
         lines.append("")
@@ -298,36 +448,32 @@ class SCEmitter:
             lines.append(f"  {cat}: {n}")
         return "\n".join(lines)
 
-    def _walk_rhs_elements(self, elements: list) -> list:
-        """Recursively yield all RHS elements (including nested ones).
+    @staticmethod
+    def _iter_rhs_elements(elements: list) -> Iterator[RHSElement]:
+        """Yield all RHS elements (including nested ones), depth first.
 
         Skips contents of HomoApply(kind=REF) since those contain
         homomorphism label names, not playable sounds.
+
+        Uses a stack of iterators rather than recursion: a nested voice
+        or HomoApply body is pushed on top and drained before the
+        enclosing sequence resumes, so the order is the same as a
+        recursive pre-order walk.
         """
-        result = []
-        for elem in elements:
-            result.append(elem)
-            if isinstance(elem, Polymetric):
-                for voice in elem.voices:
-                    result.extend(self._walk_rhs_elements(voice))
-            elif isinstance(elem, HomoApply):
-                if elem.kind != HomoApplyKind.REF:
-                    result.extend(self._walk_rhs_elements(elem.elements))
-        return result
-
-    def _detect_multi_block(self) -> None:
-        """Detect symbols defined in multiple grammar blocks."""
-        block_for_symbol: dict[str, set[int]] = {}
-        for block in self.bp.grammars:
-            for rule in block.rules:
-                name = self._lhs_name(rule)
-                if name not in block_for_symbol:
-                    block_for_symbol[name] = set()
-                block_for_symbol[name].add(block.index or 0)
-        for name, blocks in block_for_symbol.items():
-            self._symbol_blocks[name] = sorted(blocks)
-            if len(blocks) > 1:
-                self._multi_block_symbols.add(name)
+        stack = [iter(elements)]
+        while stack:
+            for elem in stack[-1]:
+                yield elem
+                kind = type(elem)
+                if kind is Polymetric:
+                    # First voice on top
+                    stack.extend(map(iter, reversed(elem.voices)))
+                    break
+                if kind is HomoApply and elem.kind is not HomoApplyKind.REF:
+                    stack.append(iter(elem.elements))
+                    break
+            else:
+                stack.pop()
 
     def _pdef_name(self, name: str, block: GrammarBlock | None = None) -> str:
         """Get a unique Pdef name, adding block index suffix if ambiguous."""
@@ -342,21 +488,39 @@ class SCEmitter:
         must use the disambiguated name. Resolution order:
         1. If current block defines it, use current block's version
         2. Otherwise, use the first block that defines it
+
+        Names defined in a single block are not in the table and resolve
+        to themselves.
         """
-        if name not in self._multi_block_symbols:
-            return name
+        return self._rhs_refs.get(name, name)
+
+    def _rhs_refs_for(self, block: GrammarBlock | None) -> dict[str, str]:
+        """Return the RHS reference table for block, built once per index."""
+        cur_idx = None if block is None else (block.index or 0)
+        refs = self._rhs_refs_by_block.get(cur_idx)
+        if refs is None:
+            refs = self._rhs_refs_by_block[cur_idx] = {
+                name: self._resolve_multi_block_ref(name, cur_idx)
+                for name in self._multi_block_symbols
+            }
+        return refs
+
+    def _resolve_multi_block_ref(self, name: str, cur_idx: int | None) -> str:
+        """Resolve a multi-block symbol from the block with index cur_idx."""
         blocks = self._symbol_blocks.get(name, [])
         if not blocks:
             return name
-        if self._current_block is not None:
-            cur_idx = self._current_block.index or 0
-            if cur_idx in blocks:
-                return f"{name}_g{cur_idx}"
+        if cur_idx is not None and cur_idx in blocks:
+            return f"{name}_g{cur_idx}"
         # Fall back to first block that defines it
         return f"{name}_g{blocks[0]}"
 
     def emit(self) -> str:
-        """Generate complete .scd file content."""
+        """Generate complete .scd file content.
+
+        Every emitter helper appends its lines to the one shared output
+        list, which is joined with newlines once at the end.
+        """
         parts: list[str] = []
 
         # Header
@@ -391,29 +555,23 @@ class SCEmitter:
         parts.append("")
 
         # Emit flag variable initializations
-        flag_init = self._emit_flag_init_block()
-        if flag_init:
-            parts.append(flag_init)
+        self._emit_flag_init_block(parts)
 
         # Emit Pdefs for terminal sound-objects (auto-mapped to MIDI)
         if self._terminal_midi:
             parts.append(sc_comment("--- Terminal sound-objects (customize to change sounds) ---"))
             for tname, midi in self._terminal_midi.items():
-                sc_n = _sc_name(tname)
                 parts.append(
-                    f"Pdef(\\{sc_n}, Pbind("
-                    f"\\instrument, \\bp2sc_default, "
-                    f"\\midinote, Pseq([{midi}], 1), \\dur, 0.25));"
-                )
+                    f"Pdef(\\{_sc_name(tname)}, {sc_pbind_note(str(midi))});")
             parts.append("")
 
         # Emit Pdefs for each grammar block
-        for block in self.bp.grammars:
+        for block, lhs_groups in zip(self.bp.grammars, self._lhs_groups):
             parts.append(sc_comment(f"--- Subgrammar {block.index} ({block.mode}) ---"))
             if block.label:
                 parts.append(sc_comment(f"Label: {block.label}"))
             parts.append("")
-            parts.extend(self._emit_block(block))
+            self._emit_block(block, lhs_groups, parts)
             parts.append("")
 
         # Emit main play command
@@ -430,64 +588,62 @@ class SCEmitter:
         parts.append(sc_footer())
         return "\n".join(parts)
 
-    def _emit_block(self, block: GrammarBlock) -> list[str]:
-        """Emit all rules in a grammar block."""
-        self._current_block = block
-        parts: list[str] = []
-
-        # Group rules by LHS symbol
-        lhs_groups: dict[str, list[Rule]] = {}
-        for rule in block.rules:
-            name = self._lhs_name(rule)
-            if name not in lhs_groups:
-                lhs_groups[name] = []
-            lhs_groups[name].append(rule)
-
-        for lhs_name, rules in lhs_groups.items():
-            pdef_name = self._pdef_name(lhs_name, block)
-            pdef_code = self._emit_rules_for_symbol(pdef_name, rules, block)
-            parts.append(pdef_code)
-            parts.append("")
+    def _emit_block(self, block: GrammarBlock,
+                    lhs_groups: dict[str, list[Rule]], out: list[str]) -> None:
+        """Emit all rules in a grammar block, appending lines to out.
 
-        return parts
+        lhs_groups maps each primary LHS name to its rules (see _index_ast).
+        """
+        self._current_block = block
+        self._rhs_refs = self._rhs_refs_for(block)
+        self._pdef_refs = {}
 
-    def _emit_rules_for_symbol(self, name: str, rules: list[Rule],
-                                block: GrammarBlock) -> str:
-        """Emit a Pdef for a symbol with one or more production rules."""
-        # Filter out rules with weight 0 (disabled)
-        active_rules = [r for r in rules if r.weight is None or r.weight.value > 0]
-        if not active_rules:
-            active_rules = rules  # keep all if all are disabled
-
-        # Check if any rules have flags → use Prout-based flagged emission
-        has_flags = any(r.flags for r in active_rules)
-        if has_flags:
-            return self._emit_flagged_rules(name, active_rules, block)
-
-        # Single rule -> direct pattern
-        if len(active_rules) == 1:
-            pre_comments = []
-            if active_rules[0].comment:
-                pre_comments.append(active_rules[0].comment)
-
-            pattern = self._emit_rhs(active_rules[0])
-            comment = ""
-            if pre_comments:
-                comment = f"  {sc_comment(' | '.join(pre_comments))}\n"
-            return comment + sc_pdef(name, pattern)
-
-        # Multiple rules -> select based on grammar mode
+        # Unflagged symbols with several rules: the mode decides, once
+        # per block, how one of them is picked
         if block.mode in ("RND", "LIN"):
-            return self._emit_weighted_choice(name, active_rules)
+            emit_multi = self._emit_weighted_choice
         else:
             # ORD / SUB1: sequential application
-            patterns = [self._emit_rhs(r) for r in active_rules]
-            if len(patterns) == 1:
-                return sc_pdef(name, patterns[0])
-            seq = sc_pseq(patterns)
-            return sc_pdef(name, seq)
+            emit_multi = self._emit_sequential_rules
+
+        # Bound once: called for every symbol of the block
+        pdef_name_of = self._pdef_name
+        active_of = self._active_rules
+        emit_flagged = self._emit_flagged_rules
+        emit_single = self._emit_single_rule
+        append = out.append
+        for lhs_name, rules in lhs_groups.items():
+            pdef_name = pdef_name_of(lhs_name, block)
+            active_rules = active_of(rules)
+            if any(r.flags for r in active_rules):
+                # Flags → Prout-based flagged emission
+                emit_flagged(pdef_name, active_rules, block, out)
+            elif len(active_rules) == 1:
+                emit_single(pdef_name, active_rules[0], out)
+            else:
+                emit_multi(pdef_name, active_rules, out)
+            append("")
 
-    def _emit_weighted_choice(self, name: str, rules: list[Rule]) -> str:
+    @staticmethod
+    def _active_rules(rules: list[Rule]) -> list[Rule]:
+        """Filter out rules with weight 0 (disabled); keep all if all are."""
+        active_rules = [r for r in rules if r.weight is None or r.weight.value > 0]
+        return active_rules or rules
+
+    def _emit_single_rule(self, name: str, rule: Rule, out: list[str]) -> None:
+        """Emit a Pdef for a symbol with one rule: the pattern directly."""
+        pattern = self._emit_rhs(rule)
+        comment = f"  {sc_comment(rule.comment)}\n" if rule.comment else ""
+        out.append(comment + sc_pdef(name, pattern))
+
+    def _emit_sequential_rules(self, name: str, rules: list[Rule],
+                               out: list[str]) -> None:
+        """Emit a Pdef applying several rules in sequence (ORD / SUB1)."""
+        patterns = [self._emit_rhs(r) for r in rules]
+        out.append(sc_pdef(name, sc_pseq(patterns)))
+
+    def _emit_weighted_choice(self, name: str, rules: list[Rule],
+                              out: list[str]) -> None:
         """Emit a weighted random choice (Prand or Pwrand).
 
         If any rule has a weight decrement, delegates to
@@ -497,19 +653,18 @@ class SCEmitter:
             r.weight and r.weight.decrement is not None for r in rules
         )
         if has_decrement:
-            return self._emit_decrement_choice(name, rules)
+            self._emit_decrement_choice(name, rules, out)
+            return
 
         patterns = []
         weights = []
         has_weights = any(r.weight is not None for r in rules)
 
+        emit_rhs = self._emit_rhs
         for r in rules:
-            pat = self._emit_rhs(r)
-            patterns.append(pat)
-            if r.weight:
-                weights.append(str(r.weight.value))
-            else:
-                weights.append("1")
+            patterns.append(emit_rhs(r))
+            w = r.weight
+            weights.append(str(w.value) if w else "1")
 
         if has_weights and any(w != "1" for w in weights):
             body = sc_pwrand(patterns, weights, "1")
@@ -520,16 +675,16 @@ class SCEmitter:
         if self.seed is not None:
             body = sc_pseed(self.seed, body)
 
-        return sc_pdef(name, body)
+        out.append(sc_pdef(name, body))
 
-    def _emit_decrement_choice(self, name: str, rules: list[Rule]) -> str:
+    def _emit_decrement_choice(self, name: str, rules: list[Rule],
+                               out: list[str]) -> None:
         """Emit a Prout-based Pdef with mutable weights for decrement rules.
 
         <50-12> means: initial weight 50, decrement by 12 after each use.
         Implemented as SC Prout with var declarations and weighted selection.
         """
-        lines: list[str] = []
-        lines.append(f"Pdef(\\{_sc_name(name)}, Prout({{ |ev|")
+        out.append(f"Pdef(\\{_sc_name(name)}, Prout({{ |ev|")
 
         # Declare weight variables
         for i, r in enumerate(rules):
@@ -537,49 +692,62 @@ class SCEmitter:
             val = w.value if w else 1
             dec = w.decrement if w and w.decrement is not None else 0
             dec_comment = f"  // decrement: {dec}" if dec > 0 else ""
-            lines.append(f"\tvar w{i} = {val};{dec_comment}")
+            out.append(f"\tvar w{i} = {val};{dec_comment}")
 
-        lines.append("\tinf.do {")
-        lines.append(f"\t\tvar total = {' + '.join(f'w{i}' for i in range(len(rules)))};")
+        out.append("\tinf.do {")
+        out.append(f"\t\tvar total = {' + '.join(f'w{i}' for i in range(len(rules)))};")
 
         # Build cumulative threshold checks
         # Weighted random selection: pick random in [0, total), check thresholds
-        lines.append("\t\tvar r = total.rand;")
+        out.append("\t\tvar r = total.rand;")
 
-        cum = "0"
+        emit_rhs = self._emit_rhs
+        append = out.append
+        last = len(rules) - 1
+        cum_expr = "w0"  # w0 + ... + wi, extended one term per rule
         for i, r in enumerate(rules):
             self._current_rule = r
-            pattern = self._emit_rhs(r)
-            if i == len(rules) - 1:
+            pattern = emit_rhs(r)
+            if i == last:
                 # Last rule: no condition needed (else branch)
-                lines.append("\t\t{")
+                append("\t\t{")
+            elif i == 0:
+                append(f"\t\tif(r < w0) {{")
             else:
-                if i == 0:
-                    lines.append(f"\t\tif(r < w0) {{")
-                else:
-                    cum_expr = " + ".join(f"w{j}" for j in range(i + 1))
-                    lines.append(f"\t\t}} {{ if(r < ({cum_expr})) {{")
+                cum_expr += f" + w{i}"
+                append(f"\t\t}} {{ if(r < ({cum_expr})) {{")
 
-            lines.append(f"\t\t\t{pattern}.embedInStream(ev);")
+            append(f"\t\t\t{pattern}.embedInStream(ev);")
 
             # Apply decrement if applicable
             w = r.weight
             if w and w.decrement is not None and w.decrement > 0:
-                lines.append(f"\t\t\tw{i} = (w{i} - {w.decrement}).max(0);")
+                append(f"\t\t\tw{i} = (w{i} - {w.decrement}).max(0);")
 
         # Close all if blocks
         # We have len(rules) - 1 nested if blocks to close
         for i in range(len(rules) - 1):
-            lines.append("\t\t}")
-        lines.append("\t}")
-        lines.append("}));")
-        lines.append("")
-        return "\n".join(lines)
+            out.append("\t\t}")
+        out.append("\t}")
+        out.append("}));")
+        out.append("")
 
     # ------------------------------------------------------------------
     # Flag-based conditional rules (Prout/embedInStream)
     # ------------------------------------------------------------------
 
+    # SC code per flag op, formatted with n=flag name, v=flag value
+    _FLAG_CONDITION_FORMATS: dict[str, str] = {
+        "": "(~{n} > 0)",
+        ">": "(~{n} > {v})",
+        "<": "(~{n} < {v})",
+    }
+    _FLAG_OPERATION_FORMATS: dict[str, str] = {
+        "=": "~{n} = {v};",
+        "+": "~{n} = ~{n} + {v};",
+        "-": "~{n} = ~{n} - {v};",
+    }
+
     @staticmethod
     def _is_flag_condition(flag: Flag) -> bool:
         """True if this flag is a guard condition (tested before -->).
@@ -587,117 +755,100 @@ class SCEmitter:
         Conditions: bare name (/Ideas/), comparisons (>N, <N).
         Operations: assignments (=N), increments (+N), decrements (-N).
         """
-        return flag.op in ("", ">", "<")
+        return flag.op in SCEmitter._FLAG_CONDITION_FORMATS
 
     @staticmethod
     def _is_flag_operation(flag: Flag) -> bool:
         """True if this flag is a side-effect operation (in RHS)."""
-        return flag.op in ("=", "+", "-")
+        return flag.op in SCEmitter._FLAG_OPERATION_FORMATS
 
     def _emit_flag_condition(self, flag: Flag) -> str:
         """Emit a SC condition expression for a flag guard."""
-        name = f"~{flag.name}"
-        if flag.op == "":
-            return f"({name} > 0)"
-        elif flag.op == ">":
-            return f"({name} > {flag.value})"
-        elif flag.op == "<":
-            return f"({name} < {flag.value})"
-        return f"({name} > 0)"
+        fmt = self._FLAG_CONDITION_FORMATS.get(flag.op, "(~{n} > 0)")
+        return fmt.format(n=flag.name, v=flag.value)
 
     def _emit_flag_operation(self, flag: Flag) -> str:
         """Emit a SC statement for a flag operation."""
-        name = f"~{flag.name}"
-        if flag.op == "=":
-            return f"{name} = {flag.value};"
-        elif flag.op == "+":
-            return f"{name} = {name} + {flag.value};"
-        elif flag.op == "-":
-            return f"{name} = {name} - {flag.value};"
-        return ""
-
-    def _collect_all_flag_names(self) -> set[str]:
-        """Collect all unique flag names from all rules."""
-        names: set[str] = set()
-        for block in self.bp.grammars:
-            for rule in block.rules:
-                for f in rule.flags:
-                    names.add(f.name)
-        return names
+        fmt = self._FLAG_OPERATION_FORMATS.get(flag.op)
+        if fmt is None:
+            return ""
+        return fmt.format(n=flag.name, v=flag.value)
 
-    def _emit_flag_init_block(self) -> str:
-        """Emit initialization for all flag variables.
+    def _emit_flag_init_block(self, out: list[str]) -> None:
+        """Emit initialization for all flag variables (nothing if none).
 
-        Scans for initial assignment flags (op='=') on the start symbol's
-        first rule to set their initial values. All other flags default to 0.
+        Flags assigned (op='=') on the start symbol's first rule start at
+        that value; all other flags default to 0.  Both come from
+        _index_ast.
         """
-        names = sorted(self._collect_all_flag_names())
-        if not names:
-            return ""
+        if not self._flag_names:
+            return
 
-        # Scan for initial values from start symbol's first rule
-        init_values: dict[str, str] = {}
-        if self.start_symbol in self._rules_by_lhs:
-            pairs = self._rules_by_lhs[self.start_symbol]
-            if pairs:
-                first_rule = pairs[0][1]
-                for f in first_rule.flags:
-                    if f.op == "=" and f.value is not None:
-                        init_values[f.name] = f.value
-
-        lines = [sc_comment("--- Flag variables ---")]
-        for n in names:
+        init_values = self._flag_init_values
+        out.append(sc_comment("--- Flag variables ---"))
+        for n in sorted(self._flag_names):
             val = init_values.get(n, "0")
-            lines.append(f"~{n} = {val};")
-        lines.append("")
-        return "\n".join(lines)
+            out.append(f"~{n} = {val};")
+        out.append("")
 
     def _emit_flagged_rules(self, name: str, rules: list[Rule],
-                            block: GrammarBlock) -> str:
+                            block: GrammarBlock, out: list[str]) -> None:
         """Emit a Prout-based Pdef with if/else chains for flagged rules.
 
         Rules with conditions become if-guards; flag operations become
         assignments before or after the pattern is streamed.
         """
-        # Separate flagged and unflagged rules
-        flagged = [r for r in rules if r.flags]
-        unflagged = [r for r in rules if not r.flags]
+        # Separate flagged and unflagged rules in one pass
+        flagged: list[Rule] = []
+        unflagged: list[Rule] = []
+        for r in rules:
+            (flagged if r.flags else unflagged).append(r)
 
-        lines: list[str] = []
-        lines.append(f"Pdef(\\{_sc_name(name)}, Prout({{ |ev|")
-        lines.append("\tinf.do {")
+        out.append(f"Pdef(\\{_sc_name(name)}, Prout({{ |ev|")
+        out.append("\tinf.do {")
+
+        emit_rhs = self._emit_rhs
+        is_cond = self._is_flag_condition
+        is_op = self._is_flag_operation
+        emit_cond = self._emit_flag_condition
+        emit_op = self._emit_flag_operation
+        append = out.append
 
         first = True
         for r in flagged:
             self._current_rule = r
-            conditions = [f for f in r.flags if self._is_flag_condition(f)]
-            operations = [f for f in r.flags if self._is_flag_operation(f)]
-
-            if conditions:
-                cond_exprs = [self._emit_flag_condition(c) for c in conditions]
-                cond_str = " and: { ".join(cond_exprs)
-                if len(cond_exprs) > 1:
+            # Classify each flag once: conditions build the guard string
+            # as they are seen, operations are formatted for after it
+            cond_str = ""
+            n_conds = 0
+            op_lines: list[str] = []
+            for f in r.flags:
+                if is_cond(f):
+                    if n_conds:
+                        cond_str += " and: { "
+                    cond_str += emit_cond(f)
+                    n_conds += 1
+                elif is_op(f):
+                    op_code = emit_op(f)
+                    if op_code:
+                        op_lines.append(f"\t\t\t{op_code}")
+
+            if n_conds:
+                if n_conds > 1:
                     cond_str += " }"
-                keyword = "if" if first else "} {"
                 if first:
-                    lines.append(f"\t\tif({cond_str}) {{")
+                    append(f"\t\tif({cond_str}) {{")
                 else:
-                    lines.append(f"\t\t}} {{ if({cond_str}) {{")
+                    append(f"\t\t}} {{ if({cond_str}) {{")
                 first = False
-            else:
-                # Operations-only rule (no guard) — emit unconditionally
-                # but still within the Prout
-                pass
+            # else: operations-only rule (no guard) — emit unconditionally
+            # but still within the Prout
 
             # Emit operations
-            for op in operations:
-                op_code = self._emit_flag_operation(op)
-                if op_code:
-                    lines.append(f"\t\t\t{op_code}")
+            out.extend(op_lines)
 
             # Emit the rule pattern via embedInStream
-            pattern = self._emit_rhs(r)
-            lines.append(f"\t\t\t{pattern}.embedInStream(ev);")
+            append(f"\t\t\t{emit_rhs(r)}.embedInStream(ev);")
 
         # Default fallback for unflagged rules
         if unflagged:
@@ -705,29 +856,28 @@ class SCEmitter:
                 # No flagged rules had conditions — shouldn't happen, but handle
                 for r in unflagged:
                     pattern = self._emit_rhs(r)
-                    lines.append(f"\t\t{pattern}.embedInStream(ev);")
+                    out.append(f"\t\t{pattern}.embedInStream(ev);")
             else:
-                lines.append("\t\t} {")
+                out.append("\t\t} {")
                 if len(unflagged) == 1:
                     pattern = self._emit_rhs(unflagged[0])
-                    lines.append(f"\t\t\t{pattern}.embedInStream(ev);")
+                    out.append(f"\t\t\t{pattern}.embedInStream(ev);")
                 else:
                     # Multiple unflagged: use random selection
                     patterns = [self._emit_rhs(r) for r in unflagged]
                     inner = ", ".join(patterns)
-                    lines.append(f"\t\t\t[{inner}].choose.embedInStream(ev);")
-                lines.append("\t\t}")
+                    out.append(f"\t\t\t[{inner}].choose.embedInStream(ev);")
+                out.append("\t\t}")
         else:
             if not first:
                 # Close last if block with a fallback silence
-                lines.append("\t\t} {")
-                lines.append("\t\t\tEvent.silent(0.25).embedInStream(ev);")
-                lines.append("\t\t}")
+                out.append("\t\t} {")
+                out.append("\t\t\tEvent.silent(0.25).embedInStream(ev);")
+                out.append("\t\t}")
 
-        lines.append("\t}")
-        lines.append("}));")
-        lines.append("")
-        return "\n".join(lines)
+        out.append("\t}")
+        out.append("}));")
+        out.append("")
 
     def _strip_passthrough_rhs(self, rule: Rule) -> list[RHSElement]:
         """Strip pass-through context symbols from multi-symbol LHS rules.
@@ -751,42 +901,53 @@ class SCEmitter:
             return rule.rhs
 
         # Collect context symbol names from LHS[1:]
+        symbol_name = self._symbol_name
         context_names: list[str] = []
         for elem in rule.lhs[1:]:
-            name = self._symbol_name(elem)
+            name = symbol_name(elem)
             if name:
                 context_names.append(name)
 
         if not context_names:
             return rule.rhs
 
-        # Remove matching symbols from the end of RHS
-        filtered_rhs = list(rule.rhs)
-        for ctx_name in reversed(context_names):
-            for i in range(len(filtered_rhs) - 1, -1, -1):
-                rhs_name = self._symbol_name(filtered_rhs[i])
-                if rhs_name == ctx_name:
-                    filtered_rhs.pop(i)
-                    self._warn("context_stripped",
-                               f"Pass-through '{ctx_name}' stripped "
-                               f"from multi-symbol LHS rule")
-                    break
+        # Positions in the RHS of each context symbol, in one forward pass
+        positions: dict[str, list[int]] = {name: [] for name in context_names}
+        for i, elem in enumerate(rule.rhs):
+            found = positions.get(symbol_name(elem))  # type: ignore[arg-type]
+            if found is not None:
+                found.append(i)
 
-        return filtered_rhs
+        # Each context symbol removes its last remaining occurrence (the
+        # last k of a name given k times), last context symbol first
+        drop: set[int] = set()
+        for ctx_name in reversed(context_names):
+            found = positions[ctx_name]
+            if found:
+                drop.add(found.pop())
+                self._warn("context_stripped",
+                           f"Pass-through '{ctx_name}' stripped "
+                           f"from multi-symbol LHS rule")
+
+        if not drop:
+            return rule.rhs
+        return [elem for i, elem in enumerate(rule.rhs) if i not in drop]
 
     def _emit_rhs(self, rule: Rule) -> str:
         """Emit the RHS of a rule as a SC pattern expression.
 
         BP3 modifiers (_transpose, _vel, _pitchbend, etc.) are stateful:
         each modifier sets the state for all subsequent elements until
-        changed again.  We walk elements left-to-right, snapshot the
-        current modifier state for each real element, then group
-        consecutive elements that share the same modifier state.
+        changed again.  We walk elements left-to-right and group
+        consecutive real elements that share the same modifier state,
+        then wrap each group with that state.
 
         INVARIANT: Comments are collected separately and emitted outside
         arrays to satisfy INV-1.
         """
         self._current_rule = rule
+        # Ties cannot cross rules: drop any tie left open by an earlier rule
+        self._tie_stack.clear()
         elements = self._strip_passthrough_rhs(rule)
 
         if not elements:
@@ -796,62 +957,79 @@ class SCEmitter:
         if len(elements) == 1 and isinstance(elements[0], Lambda):
             return sc_rest()
 
+        # Fast path: notes and rests only.  There is no modifier, so the
+        # pipeline below would make a single group with empty mods.
+        if self._pending_repeat is None:
+            codes = self._plain_note_codes(elements)
+            if codes is not None:
+                return sc_pbind([("midinote", sc_pseq(codes)),
+                                 ("dur", "0.25")])
+
         # --- Phase 1: walk elements, track stateful modifiers ---
         current_mods: dict[str, str] = {}
-        # Each item is (sc_code, mods_snapshot)
+        # Read-only copy of current_mods, shared by every element emitted
+        # until the next modifier (None: out of date).  A modifier that
+        # leaves the state unchanged keeps the previous snapshot.
+        snapshot: dict[str, str] | None = None
+        last_snapshot: dict[str, str] | None = None
+        # Consecutive real elements with the same modifier state are
+        # grouped as they are emitted: one (codes, snapshot) per group
+        groups: list[tuple[list[str], dict[str, str]]] = []
+        add_code: Callable[[str], None] | None = None
         # Comments are collected separately to satisfy INV-1
-        items: list[tuple[str, dict[str, str]]] = []
         pre_comments: list[str] = []
+        # Hoisted out of the per-element loop
+        emit_element = self._emit_element
+        sanitize = self._sanitize_sc_number
+        add_comment = pre_comments.append
 
+        # Dispatch on the exact result type, most common (SC code) first
         for elem in elements:
-            result = self._emit_element(elem)
+            result = emit_element(elem)
             if result is None:
                 continue
-            if isinstance(result, dict):
-                # Multi-key modifier (e.g., _scale returns {scale, root})
-                for key, val in result.items():
-                    current_mods[key] = self._sanitize_sc_number(val)
-            elif isinstance(result, tuple):
-                # Modifier -- update running state
-                key, val = result
-                current_mods[key] = self._sanitize_sc_number(val)
-            elif isinstance(result, str) and result.startswith("//"):
-                # INV-1: collect comments separately, never put in arrays
-                pre_comments.append(result)
-            else:
+            if type(result) is str:
+                if result.startswith("//"):
+                    # INV-1: collect comments separately, never put in arrays
+                    add_comment(result)
+                    continue
                 # Apply pending _repeat(N) wrapper
                 if self._pending_repeat is not None:
                     result = sc_pn(result, str(self._pending_repeat))
                     self._pending_repeat = None
-                items.append((result, dict(current_mods)))
+                if snapshot is None:
+                    snapshot = dict(current_mods)
+                    if snapshot == last_snapshot:
+                        snapshot = last_snapshot
+                    else:
+                        # New modifier state: start a new group
+                        group_codes: list[str] = []
+                        groups.append((group_codes, snapshot))
+                        add_code = group_codes.append
+                        last_snapshot = snapshot
+                add_code(result)  # type: ignore[misc]
+            elif type(result) is tuple:
+                # Modifier -- update running state; re-setting a value
+                # leaves the snapshot valid
+                key, val = result
+                val = sanitize(val)
+                if current_mods.get(key) != val:
+                    current_mods[key] = val
+                    snapshot = None
+            elif type(result) is dict:
+                # Multi-key modifier (e.g., _scale returns {scale, root})
+                for key, val in result.items():
+                    val = sanitize(val)
+                    if current_mods.get(key) != val:
+                        current_mods[key] = val
+                        snapshot = None
 
-        if not items:
+        if not groups:
             return sc_rest()
 
-        # --- Phase 2: group consecutive real elements with same mods ---
-        sc_parts: list[str] = []
-        group_elems: list[str] = []
-        group_mods: dict[str, str] | None = None
-
-        def flush_group() -> None:
-            nonlocal group_elems, group_mods
-            if not group_elems:
-                return
-            sc_parts.append(
-                self._wrap_element_group(group_elems, group_mods or {})
-            )
-            group_elems = []
-            group_mods = None
-
-        for code, mods in items:
-            if group_mods is not None and mods == group_mods:
-                group_elems.append(code)
-            else:
-                flush_group()
-                group_elems = [code]
-                group_mods = mods
-
-        flush_group()
+        # --- Phase 2: wrap each group with its modifier state ---
+        wrap = self._wrap_element_group
+        sc_parts = [wrap(group, mods) for group, mods in groups]
 
         # --- Phase 3: assemble final expression ---
         if not sc_parts:
@@ -861,88 +1039,101 @@ class SCEmitter:
 
         return sc_pseq(sc_parts)
 
+    def _plain_note_codes(self, elements: list[RHSElement]) -> list[str] | None:
+        """Return the codes of an RHS made of notes and rests only.
+
+        Returns None if any other element is present, or if there is no
+        note at all (a group of rests is not a midinote Pbind).
+        """
+        emit_note = self._emit_note
+        rest = sc_rest()
+        codes: list[str] = []
+        add = codes.append
+        has_note = False
+        for elem in elements:
+            kind = type(elem)
+            if kind is Note:
+                add(emit_note(elem))  # type: ignore[arg-type]
+                has_note = True
+            elif kind is Rest:
+                add(rest)
+            else:
+                return None
+        return codes if has_note else None
+
     def _wrap_element_group(self, elems: list[str],
                             mods: dict[str, str]) -> str:
         """Wrap a group of elements sharing the same modifier state.
 
         INV-2: MIDI integers are always wrapped in Pbind, never bare.
         """
-        # Pre-process tied note markers
-        processed_elems = []
+        # One pass: classify each element as a MIDI number, a rest-like event (Rest, Event.silent, Pbind)
+        # or other SC code (Pdef refs, symbols, etc.)
+        processed_elems: list[str] = []
+        add = processed_elems.append
+        midi_numbers = _MIDI_NUMBERS
+        has_midi = False
+        has_other = False
         for e in elems:
-            if e.startswith("TIE_START:"):
-                # Tied note start: emit with extended legato (2.0 = sustain through next beat)
-                midi = e.split(":")[1]
-                processed_elems.append(
-                    f"Pbind(\\instrument, \\bp2sc_default, "
-                    f"\\midinote, Pseq([{midi}], 1), \\dur, 0.25, \\legato, 2.0)"
-                )
-            elif e == "TIE_END":
-                # Tied note end: silent event (note already being held)
-                processed_elems.append("Event.silent(0.25)")
+            # Notes first: by far the most common element
+            if e in midi_numbers:
+                has_midi = True
+            elif e.startswith(("Rest", "Event.silent", "Pbind")):
+                # Also covers tied notes, already emitted as Pbind / silent
+                pass
             else:
-                processed_elems.append(e)
+                has_other = True
+            add(e)
         elems = processed_elems
 
-        # Check if all non-Rest, non-Event.silent elements are MIDI note numbers
-        non_rest = [e for e in elems
-                    if not e.startswith("Rest") and not e.startswith("Event.silent")
-                    and not e.startswith("Pbind")]
-        all_midi = bool(non_rest) and all(
-            self._is_midi_number(e) for e in non_rest
-        )
-
-        if all_midi and non_rest:
+        if has_midi and not has_other:
             # Pure MIDI notes -> Pbind with \midinote for playability (INV-2)
-            seq = sc_pseq(elems)
-            pairs: list[tuple[str, str]] = [("midinote", seq)]
-            for k, v in mods.items():
-                pairs.append((k, v))
-            if not any(k == "dur" for k, _ in pairs):
+            pairs = [("midinote", sc_pseq(elems)), *mods.items()]
+            if "dur" not in mods:
                 pairs.append(("dur", "0.25"))
             return sc_pbind(pairs)
 
-        # Check if we have a mix of MIDI integers and non-MIDI elements
-        has_midi = any(self._is_midi_number(e) for e in elems
-                       if not e.startswith("Rest") and not e.startswith("Event.silent")
-                       and not e.startswith("Pbind"))
-        if has_midi:
-            # Wrap bare MIDI integers in Pbind to satisfy INV-2
-            # Use Pseq([n], 1) so Pbind produces exactly 1 event (not infinite)
-            wrapped_elems = []
-            for e in elems:
-                if self._is_midi_number(e):
-                    wrapped_elems.append(
-                        f"Pbind(\\instrument, \\bp2sc_default, "
-                        f"\\midinote, Pseq([{e}], 1), \\dur, 0.25)"
-                    )
-                else:
-                    wrapped_elems.append(e)
-            elems = wrapped_elems
-
-        # Non-MIDI elements (Pdef refs, symbols, etc.)
-        # In pattern-level Pseq, Rest() is not a valid event.
-        elems = self._rest_for_pattern_ctx(elems)
+        # Pattern context: wrap bare MIDI integers in one-event Pbinds
+        # (INV-2) and turn Rest() into a rest event, which is the only
+        # valid form in a pattern-level Pseq
+        elems = [
+            sc_pbind_note(e) if e in midi_numbers
+            else _EVENT_SILENT if e == "Rest()" else e
+            for e in elems
+        ]
         if len(elems) == 1:
             inner = elems[0]
         else:
             inner = sc_pseq(elems)
 
         if mods:
-            mod_args = ", ".join(
-                f"\\{k}, {v}" for k, v in mods.items()
-            )
-            return f"Pbindf({inner}, {mod_args})"
+            # Pbindf(inner, \\k1, v1, \\k2, v2...), joined once
+            parts = ["Pbindf(", inner]
+            for k, v in mods.items():
+                parts += (", \\", k, ", ", v)
+            parts.append(")")
+            return "".join(parts)
         return inner
 
     @staticmethod
     def _is_midi_number(s: str) -> bool:
-        """Check if a string represents a valid MIDI note number (0-127)."""
-        try:
-            n = int(s)
-            return 0 <= n <= 127
-        except ValueError:
-            return False
+        """Check if a string represents a valid MIDI note number (0-127).
+
+        Element codes only ever spell numbers as str(int), so this is a
+        set lookup rather than an int() parse.
+        """
+        return s in _MIDI_NUMBERS
+
+    @staticmethod
+    def _is_all_midi(elems: list[str]) -> bool:
+        """True if elems holds MIDI numbers and otherwise only rests."""
+        has_midi = False
+        for e in elems:
+            if e in _MIDI_NUMBERS:
+                has_midi = True
+            elif not e.startswith("Rest"):
+                return False
+        return has_midi
 
     @staticmethod
     def _sanitize_sc_number(val: str) -> str:
@@ -951,98 +1142,97 @@ class SCEmitter:
             return val[1:]
         return val
 
-    def _emit_element(self, elem: RHSElement) -> str | tuple[str, str] | dict[str, str] | None:
+    def _emit_element(self, elem: RHSElement) -> _ElementResult:
         """Emit a single RHS element.
 
+        Dispatches on the exact node type through _ELEMENT_EMITTERS (AST
+        node classes are never subclassed).
+
         Returns:
             str: SC code (pattern expression or comment)
             tuple[str, str]: Single modifier (key, value)
             dict[str, str]: Multi-key modifier (e.g., scale + root)
             None: Element consumed (e.g., Lambda, consumed modifier state)
         """
-        if isinstance(elem, Note):
-            midi = note_to_midi(elem.name, elem.octave)
-            return str(midi)
-
-        if isinstance(elem, Rest):
-            return sc_rest()
-
-        if isinstance(elem, UndeterminedRest):
+        handler = self._ELEMENT_EMITTERS.get(type(elem))
+        if handler is None:
+            # Unknown element type
             self._warn("unsupported_node",
-                       "UndeterminedRest '...' emitted as Rest()")
-            return sc_rest()
-
-        if isinstance(elem, NonTerminal):
-            resolved = self._resolve_rhs_ref(elem.name)
-            return f"Pdef(\\{_sc_name(resolved)})"
-
-        if isinstance(elem, Variable):
-            resolved = self._resolve_rhs_ref(elem.name)
-            return f"Pdef(\\{_sc_name(resolved)})"
-
-        if isinstance(elem, Wildcard):
-            self._warn("approximation",
-                       f"Wildcard ?{elem.index} emitted as Rest()")
-            return sc_rest()
-
-        if isinstance(elem, Polymetric):
-            return self._emit_polymetric(elem)
-
-        if isinstance(elem, SpecialFn):
-            return self._emit_special_fn(elem)
-
-        if isinstance(elem, Lambda):
+                       f"Unknown element type {type(elem).__name__} skipped")
             return None
+        return handler(self, elem)
 
-        if isinstance(elem, HomoApply):
-            return self._emit_homo(elem)
+    def _emit_note(self, elem: Note) -> str:
+        hit = self._note_codes.get(id(elem))
+        if hit is not None:
+            return hit[1]
+        code = _midi_code(elem.name, elem.octave)
+        self._note_codes[id(elem)] = (elem, code)
+        return code
 
-        if isinstance(elem, TimeSig):
-            self._warn("time_sig_ignored",
-                       f"Time signature '{elem.text}' not used for duration")
-            return sc_comment(f"time sig: {elem.text}")
+    def _emit_rest(self, elem: Rest) -> str:
+        return sc_rest()
 
-        if isinstance(elem, Annotation):
-            return None
+    def _emit_undetermined_rest(self, elem: UndeterminedRest) -> str:
+        self._warn("unsupported_node",
+                   "UndeterminedRest '...' emitted as Rest()")
+        return sc_rest()
 
-        if isinstance(elem, Tie):
-            midi = note_to_midi(elem.note.name, elem.note.octave)
-            if elem.is_start:
-                # Note starting a tie (C4&): emit with extended legato
-                # Track this note for potential tie end matching
-                self._pending_tie_midi = midi
-                # Return as special tied note marker that will be handled in _wrap_element_group
-                return f"TIE_START:{midi}"
-            else:
-                # Note ending a tie (&C4): check if it matches pending tie
-                if self._pending_tie_midi == midi:
-                    self._pending_tie_midi = None
-                    # This note is already being held, emit as silent
-                    return "TIE_END"
-                # No matching tie start, just emit the note normally
-                return str(midi)
-
-        if isinstance(elem, QuotedSymbol):
-            self._warn("unsupported_node",
-                       f"QuotedSymbol '{elem.text}' emitted as terminal")
-            # Treat as terminal name
-            if elem.text not in self._terminal_midi:
-                self._terminal_midi[elem.text] = 60 + len(self._terminal_midi)
-            return f"Pdef(\\{_sc_name(elem.text)})"
+    def _emit_symbol_ref(self, elem: NonTerminal | Variable) -> str:
+        code = self._pdef_refs.get(elem.name)
+        if code is None:
+            resolved = self._resolve_rhs_ref(elem.name)
+            code = self._pdef_refs[elem.name] = f"Pdef(\\{_sc_name(resolved)})"
+        return code
 
-        if isinstance(elem, ContextMarker):
-            self._warn("unsupported_node",
-                       f"ContextMarker ({elem.kind}) skipped")
-            return None
+    def _emit_wildcard(self, elem: Wildcard) -> str:
+        self._warn("approximation",
+                   f"Wildcard ?{elem.index} emitted as Rest()")
+        return sc_rest()
 
-        if isinstance(elem, GotoDirective):
-            self._warn("unsupported_fn",
-                       f"_goto({elem.grammar},{elem.rule}) not implemented")
-            return None
+    def _emit_nothing(self, elem: Lambda | Annotation) -> None:
+        return None
 
-        # Unknown element type
+    def _emit_time_sig(self, elem: TimeSig) -> str:
+        self._warn("time_sig_ignored",
+                   f"Time signature '{elem.text}' not used for duration")
+        return sc_comment(f"time sig: {elem.text}")
+
+    def _emit_tie(self, elem: Tie) -> str:
+        midi = _midi_code(elem.note.name, elem.note.octave)
+        if elem.is_start:
+            # Note starting a tie (C4&): emit with extended legato
+            # (2.0 = sustain through next beat) and keep it open for
+            # the matching tie end
+            self._tie_stack.append(midi)
+            return sc_pbind_note(midi, tied=True)
+        # Note ending a tie (&C4): close the open tie on this pitch, if
+        # any (overlapping ties on other pitches stay open)
+        if midi in self._tie_stack:
+            self._tie_stack.remove(midi)
+            # This note is already being held, emit as silent
+            return _EVENT_SILENT
+        # No matching tie start, just emit the note normally
+        return midi
+
+    def _emit_quoted_symbol(self, elem: QuotedSymbol) -> str:
         self._warn("unsupported_node",
-                   f"Unknown element type {type(elem).__name__} skipped")
+                   f"QuotedSymbol '{elem.text}' emitted as terminal")
+        # Treat as terminal name
+        if elem.text not in self._terminal_midi:
+            self._terminal_midi[elem.text] = 60 + len(self._terminal_midi)
+            # A new terminal can change how symbols resolve to MIDI
+            self._symbol_midi_cache.clear()
+        return f"Pdef(\\{_sc_name(elem.text)})"
+
+    def _emit_context_marker(self, elem: ContextMarker) -> None:
+        self._warn("unsupported_node",
+                   f"ContextMarker ({elem.kind}) skipped")
+        return None
+
+    def _emit_goto(self, elem: GotoDirective) -> None:
+        self._warn("unsupported_fn",
+                   f"_goto({elem.grammar},{elem.rule}) not implemented")
         return None
 
     @staticmethod
@@ -1054,25 +1244,22 @@ class SCEmitter:
         rest Event, otherwise SC raises 'Message at not understood'.
         """
         return [
-            "Event.silent(0.25)" if e == "Rest()" else e
+            _EVENT_SILENT if e == "Rest()" else e
             for e in elems
         ]
 
     def _emit_polymetric(self, poly: Polymetric) -> str:
         """Emit a polymetric expression."""
         if not poly.voices:
-            return "Event.silent(0.25)"
+            return _EVENT_SILENT
 
         # Single voice with tempo ratio
         if len(poly.voices) == 1:
             voice_elems = self._emit_voice_elements(poly.voices[0])
             if not voice_elems:
-                return "Event.silent(0.25)"
+                return _EVENT_SILENT
             # Check if all non-Rest elements are MIDI
-            non_rest = [e for e in voice_elems if not e.startswith("Rest")]
-            all_midi = bool(non_rest) and all(
-                self._is_midi_number(e) for e in non_rest
-            )
+            all_midi = self._is_all_midi(voice_elems)
             if not all_midi:
                 # Pattern context: fix Rest() and bare MIDI
                 voice_elems = self._rest_for_pattern_ctx(voice_elems)
@@ -1094,10 +1281,7 @@ class SCEmitter:
             elems = self._emit_voice_elements(voice)
             if elems:
                 # Check if all elements are MIDI numbers
-                non_rest = [e for e in elems if not e.startswith("Rest")]
-                all_midi = bool(non_rest) and all(
-                    self._is_midi_number(e) for e in non_rest
-                )
+                all_midi = self._is_all_midi(elems)
                 if len(elems) == 1 and not all_midi:
                     elems = self._rest_for_pattern_ctx(elems)
                     voice_patterns.append(elems[0])
@@ -1134,10 +1318,11 @@ class SCEmitter:
 
         for i, e in enumerate(voice):
             if isinstance(e, SpecialFn):
-                if e.name.lower() == "retro":
+                name = e.name.lower()
+                if name == "retro":
                     do_retro = True
                     start_idx = i + 1
-                elif e.name.lower() == "rotate" and e.args:
+                elif name == "rotate" and e.args:
                     try:
                         rotate_amount = int(e.args[0])
                     except ValueError:
@@ -1151,24 +1336,28 @@ class SCEmitter:
 
         # Emit elements starting from start_idx
         elems = []
+        emit_element = self._emit_element
+        add = elems.append
         for e in voice[start_idx:]:
-            result = self._emit_element(e)
+            result = emit_element(e)
             if result is not None and not isinstance(result, tuple):
                 # INV-1: skip comments inside polymetric expressions
                 if not result.startswith("//"):
-                    elems.append(result)
+                    add(result)
             elif isinstance(result, tuple):
                 # Modifiers inside voice - skip for now (applied elsewhere)
                 pass
 
-        # Apply transformations
-        if do_retro and elems:
-            elems = list(reversed(elems))
+        # Apply transformations, in place (elems is our own list)
+        if do_retro:
+            elems.reverse()
         if rotate_amount and elems:
             # Python rotate: negative = left, positive = right
             # BP3 _rotate(N) rotates N positions to the left
-            n = rotate_amount % len(elems) if elems else 0
-            elems = elems[n:] + elems[:n]
+            n = rotate_amount % len(elems)
+            if n:
+                elems += elems[:n]
+                del elems[:n]
 
         return elems
 
@@ -1178,331 +1367,298 @@ class SCEmitter:
         Only wraps if there is a mix of MIDI and non-MIDI elements.
         Pure MIDI groups are handled by _wrap_element_group.
         """
-        has_midi = any(self._is_midi_number(e) for e in elems if not e.startswith("Rest"))
-        has_non_midi = any(
-            not self._is_midi_number(e) and not e.startswith("Rest")
-            for e in elems
-        )
+        has_midi = has_non_midi = False
+        for e in elems:
+            if e in _MIDI_NUMBERS:
+                has_midi = True
+            elif not e.startswith("Rest"):
+                has_non_midi = True
 
         if has_midi and has_non_midi:
             wrapped = []
             for e in elems:
                 if self._is_midi_number(e):
-                    # Use Pseq([n], 1) so Pbind produces exactly 1 event
-                    wrapped.append(
-                        f"Pbind(\\instrument, \\bp2sc_default, "
-                        f"\\midinote, Pseq([{e}], 1), \\dur, 0.25)"
-                    )
+                    # One-event Pbind (Pseq([n], 1))
+                    wrapped.append(sc_pbind_note(e))
                 else:
                     wrapped.append(e)
             return wrapped
         return elems
 
-    def _emit_special_fn(self, fn: SpecialFn) -> str | tuple[str, str] | None:
-        """Emit a special function as SC code."""
-        name = fn.name.lower()
-
-        if name == "transpose" and fn.args:
-            return ("ctranspose", fn.args[0])
-
-        if name == "vel" and fn.args:
-            try:
-                vel = int(fn.args[0])
-                self._last_vel = vel
-                if self._rndvel_range:
-                    lo = max(0, vel - self._rndvel_range)
-                    hi = min(127, vel + self._rndvel_range)
-                    return ("amp", f"Pwhite({round(lo/127, 3)}, {round(hi/127, 3)})")
-                return ("amp", str(round(vel / 127, 3)))
-            except ValueError:
-                return ("amp", fn.args[0])
-
-        if name == "mm" and fn.args:
-            return sc_comment(f"tempo: {fn.args[0]} BPM")
-
-        if name == "mm_inline" and fn.args:
-            # Inline tempo marker ||N|| from MusicXML import
-            # In RHS context, emit as stretch modifier relative to base tempo
-            try:
-                bpm = float(fn.args[0])
-                # Base tempo is 60 BPM, so stretch = 60/bpm
-                # e.g., ||120|| = stretch 0.5 (2x faster)
-                base_tempo = 60.0
-                stretch = round(base_tempo / bpm, 4)
-                return ("stretch", str(stretch))
-            except (ValueError, ZeroDivisionError):
-                return sc_comment(f"tempo inline: {fn.args[0]} BPM")
-
-        if name == "ins" and fn.args:
-            # Sanitize instrument name for SC symbol
-            arg = fn.args[0]
-            sym = re.sub(r"[^a-zA-Z0-9_]", "_", arg.lower())
-            if sym and sym[0].isdigit():
-                sym = "inst_" + sym
-            if not sym:
-                sym = "bp2sc_default"
-            return ("instrument", f"\\{sym}")
-
-        if name == "pitchrange" and fn.args:
-            self._warn("approximation",
-                       f"_pitchrange({fn.args[0]}) emitted as comment")
-            return sc_comment(f"pitchrange: {fn.args[0]}")
-
-        if name == "pitchbend" and fn.args:
-            return ("detune", fn.args[0])
+    def _emit_special_fn(self, fn: SpecialFn) -> _ElementResult:
+        """Emit a special function as SC code.
 
-        if name == "pitchcont":
-            self._warn("approximation",
-                       "_pitchcont emitted as comment")
-            return sc_comment("pitchcont (continuous pitch)")
+        Dispatches on the lowercased name through _SPECIAL_FN_EMITTERS.
+        A name that is unknown, or given fewer arguments than its emitter
+        needs, is emitted as a comment with a warning.
+        """
+        # Raw name -> (lowercased name, emitter entry), resolved once
+        hit = self._special_fn_lookup.get(fn.name)
+        if hit is None:
+            name = fn.name.lower()
+            hit = self._special_fn_lookup[fn.name] = (
+                name, self._SPECIAL_FN_EMITTERS.get(name))
+        name, entry = hit
+        if entry is not None and len(fn.args) >= entry[0]:
+            return entry[1](self, fn, name)
 
-        if name == "striated":
-            self._warn("approximation",
-                       "_striated emitted as comment (time mode ignored)")
-            return sc_comment("striated time mode")
+        self._warn("unsupported_fn",
+                   f"_{fn.name}({', '.join(fn.args)}) unknown, "
+                   f"emitted as comment")
+        return sc_comment(f"_{fn.name}({', '.join(fn.args)})")
 
-        if name == "goto" and fn.args:
-            self._warn("unsupported_fn",
-                       f"_goto({', '.join(fn.args)}) not implemented")
-            return sc_comment(f"TODO: _goto({', '.join(fn.args)})")
+    def _vel_amp(self, vel: int) -> tuple[str, str]:
+        """Amp modifier for a velocity, randomized by the _rndvel range."""
+        if self._rndvel_range:
+            lo = max(0, vel - self._rndvel_range)
+            hi = min(127, vel + self._rndvel_range)
+            return ("amp", f"Pwhite({round(lo/127, 3)}, {round(hi/127, 3)})")
+        return ("amp", str(round(vel / 127, 3)))
 
-        if name == "failed" and fn.args:
-            self._warn("unsupported_fn",
-                       f"_failed({', '.join(fn.args)}) not implemented")
-            return sc_comment(f"TODO: _failed({', '.join(fn.args)})")
+    def _sf_transpose(self, fn: SpecialFn, name: str) -> _ElementResult:
+        return ("ctranspose", fn.args[0])
 
-        if name == "repeat" and fn.args:
-            try:
-                n = int(fn.args[0])
-                self._pending_repeat = n
-            except ValueError:
-                self._pending_repeat = None
-            return None  # consumed; wraps the next element
+    def _sf_vel(self, fn: SpecialFn, name: str) -> _ElementResult:
+        # _vel(N) and _volume(N)
+        try:
+            vel = int(fn.args[0])
+        except ValueError:
+            return ("amp", fn.args[0])
+        self._last_vel = vel
+        return self._vel_amp(vel)
 
-        if name == "destru":
-            self._warn("approximation",
-                       "_destru emitted as comment")
-            return sc_comment("_destru (remove structural markers)")
+    def _sf_mm(self, fn: SpecialFn, name: str) -> _ElementResult:
+        return sc_comment(f"tempo: {fn.args[0]} BPM")
 
-        if name == "script" and fn.args:
-            # Check for MIDI program pattern
-            arg = fn.args[0]
-            m = re.match(r"MIDI program (\d+)", arg)
-            if m:
-                return ("program", m.group(1))
-            # Other _script types remain unsupported
-            self._warn("unsupported_fn",
-                       f"_script({' '.join(fn.args)}) not implemented")
-            return sc_comment(f"TODO: _script({' '.join(fn.args)})")
-
-        if name == "staccato" and fn.args:
-            try:
-                val = int(fn.args[0])
-                return ("legato", str(round(val / 100, 3)))
-            except ValueError:
-                return ("legato", fn.args[0])
+    def _sf_mm_inline(self, fn: SpecialFn, name: str) -> _ElementResult:
+        # Inline tempo marker ||N|| from MusicXML import
+        # In RHS context, emit as stretch modifier relative to base tempo
+        try:
+            bpm = float(fn.args[0])
+            # Base tempo is 60 BPM, so stretch = 60/bpm
+            # e.g., ||120|| = stretch 0.5 (2x faster)
+            base_tempo = 60.0
+            stretch = round(base_tempo / bpm, 4)
+            return ("stretch", str(stretch))
+        except (ValueError, ZeroDivisionError):
+            return sc_comment(f"tempo inline: {fn.args[0]} BPM")
+
+    def _sf_ins(self, fn: SpecialFn, name: str) -> _ElementResult:
+        return ("instrument", f"\\{_instrument_symbol(fn.args[0])}")
+
+    def _sf_detune(self, fn: SpecialFn, name: str) -> _ElementResult:
+        # _pitchbend(N) and _mod(N)
+        return ("detune", fn.args[0])
+
+    def _sf_arg_as_comment(self, fn: SpecialFn, name: str) -> _ElementResult:
+        # _pitchrange(N), _step(N), _keyxpand(N)
+        self._warn("approximation",
+                   f"_{name}({fn.args[0]}) emitted as comment")
+        return sc_comment(f"{name}: {fn.args[0]}")
+
+    def _sf_pitchcont(self, fn: SpecialFn, name: str) -> _ElementResult:
+        self._warn("approximation",
+                   "_pitchcont emitted as comment")
+        return sc_comment("pitchcont (continuous pitch)")
+
+    def _sf_striated(self, fn: SpecialFn, name: str) -> _ElementResult:
+        self._warn("approximation",
+                   "_striated emitted as comment (time mode ignored)")
+        return sc_comment("striated time mode")
+
+    def _sf_not_implemented(self, fn: SpecialFn, name: str) -> _ElementResult:
+        # _goto(...) and _failed(...)
+        self._warn("unsupported_fn",
+                   f"_{name}({', '.join(fn.args)}) not implemented")
+        return sc_comment(f"TODO: _{name}({', '.join(fn.args)})")
 
-        if name == "legato" and fn.args:
-            try:
-                val = int(fn.args[0])
-                return ("legato", str(round(val / 100, 3)))
-            except ValueError:
-                return ("legato", fn.args[0])
+    def _sf_repeat(self, fn: SpecialFn, name: str) -> _ElementResult:
+        try:
+            n = int(fn.args[0])
+            self._pending_repeat = n
+        except ValueError:
+            self._pending_repeat = None
+        return None  # consumed; wraps the next element
+
+    def _sf_destru(self, fn: SpecialFn, name: str) -> _ElementResult:
+        self._warn("approximation",
+                   "_destru emitted as comment")
+        return sc_comment("_destru (remove structural markers)")
+
+    def _sf_script(self, fn: SpecialFn, name: str) -> _ElementResult:
+        # Check for MIDI program pattern
+        arg = fn.args[0]
+        m = _RE_MIDI_PROGRAM.match(arg)
+        if m:
+            return ("program", m.group(1))
+        # Other _script types remain unsupported
+        self._warn("unsupported_fn",
+                   f"_script({' '.join(fn.args)}) not implemented")
+        return sc_comment(f"TODO: _script({' '.join(fn.args)})")
 
-        # --- Phase 1: Easy special functions ---
+    def _sf_legato(self, fn: SpecialFn, name: str) -> _ElementResult:
+        # _legato(N) and _staccato(N)
+        try:
+            val = int(fn.args[0])
+            return ("legato", str(round(val / 100, 3)))
+        except ValueError:
+            return ("legato", fn.args[0])
 
-        if name == "chan" and fn.args:
-            return ("chan", fn.args[0])
+    # --- Phase 1: Easy special functions ---
 
-        if name == "volume" and fn.args:
-            try:
-                vol = int(fn.args[0])
-                self._last_vel = vol
-                if self._rndvel_range:
-                    lo = max(0, vol - self._rndvel_range)
-                    hi = min(127, vol + self._rndvel_range)
-                    return ("amp", f"Pwhite({round(lo/127, 3)}, {round(hi/127, 3)})")
-                return ("amp", str(round(vol / 127, 3)))
-            except ValueError:
-                return ("amp", fn.args[0])
+    def _sf_chan(self, fn: SpecialFn, name: str) -> _ElementResult:
+        return ("chan", fn.args[0])
 
-        if name == "mod" and fn.args:
-            return ("detune", fn.args[0])
+    def _sf_rndvel(self, fn: SpecialFn, name: str) -> _ElementResult:
+        # Random velocity variation: _rndvel(N) adds ±N to velocity
+        try:
+            self._rndvel_range = int(fn.args[0])
+        except ValueError:
+            self._rndvel_range = 0
+        # Recalculate amp with last velocity and new range (fixed
+        # velocity if the range is 0)
+        return self._vel_amp(self._last_vel)
 
-        if name == "rndvel" and fn.args:
-            # Random velocity variation: _rndvel(N) adds ±N to velocity
-            try:
-                self._rndvel_range = int(fn.args[0])
-            except ValueError:
-                self._rndvel_range = 0
-            # Recalculate amp with last velocity and new range
-            if self._rndvel_range:
-                lo = max(0, self._last_vel - self._rndvel_range)
-                hi = min(127, self._last_vel + self._rndvel_range)
-                return ("amp", f"Pwhite({round(lo/127, 3)}, {round(hi/127, 3)})")
-            # Range is 0: reset to fixed velocity
-            return ("amp", str(round(self._last_vel / 127, 3)))
-
-        if name == "rndtime":
-            # Random timing variation: _rndtime(N) adds ±N% variation to duration
-            try:
-                self._rndtime_range = float(fn.args[0]) if fn.args else 0.0
-            except ValueError:
-                self._rndtime_range = 0.0
-
-            if self._rndtime_range > 0:
-                # Variation of ±N% around base duration (0.25)
-                base_dur = 0.25
-                lo = base_dur * (1 - self._rndtime_range / 100)
-                hi = base_dur * (1 + self._rndtime_range / 100)
-                return ("dur", f"Pwhite({round(lo, 4)}, {round(hi, 4)})")
-            # Range is 0: reset to fixed duration
-            return ("dur", "0.25")
-
-        if name == "rest":
-            return sc_rest()
+    def _sf_rndtime(self, fn: SpecialFn, name: str) -> _ElementResult:
+        # Random timing variation: _rndtime(N) adds ±N% variation to duration
+        try:
+            self._rndtime_range = float(fn.args[0]) if fn.args else 0.0
+        except ValueError:
+            self._rndtime_range = 0.0
 
-        if name == "velcont":
-            return sc_comment("velcont (continuous velocity — SC handles natively)")
+        if self._rndtime_range > 0:
+            # Variation of ±N% around base duration (0.25)
+            base_dur = 0.25
+            lo = base_dur * (1 - self._rndtime_range / 100)
+            hi = base_dur * (1 + self._rndtime_range / 100)
+            return ("dur", f"Pwhite({round(lo, 4)}, {round(hi, 4)})")
+        # Range is 0: reset to fixed duration
+        return ("dur", "0.25")
 
-        if name == "press" and fn.args:
-            # Aftertouch pressure (0-127) -> normalized 0-1
-            try:
-                val = int(fn.args[0])
-                return ("aftertouch", str(round(val / 127, 3)))
-            except ValueError:
-                return ("aftertouch", fn.args[0])
+    def _sf_rest(self, fn: SpecialFn, name: str) -> _ElementResult:
+        return sc_rest()
 
-        if name == "step" and fn.args:
-            self._warn("approximation",
-                       f"_step({fn.args[0]}) emitted as comment")
-            return sc_comment(f"step: {fn.args[0]}")
+    def _sf_velcont(self, fn: SpecialFn, name: str) -> _ElementResult:
+        return sc_comment("velcont (continuous velocity — SC handles natively)")
 
-        if name == "keyxpand" and fn.args:
-            self._warn("approximation",
-                       f"_keyxpand({fn.args[0]}) emitted as comment")
-            return sc_comment(f"keyxpand: {fn.args[0]}")
+    def _sf_press(self, fn: SpecialFn, name: str) -> _ElementResult:
+        # Aftertouch pressure (0-127) -> normalized 0-1
+        try:
+            val = int(fn.args[0])
+            return ("aftertouch", str(round(val / 127, 3)))
+        except ValueError:
+            return ("aftertouch", fn.args[0])
 
-        if name == "part":
-            # Informational marker from MusicXML import - no warning needed
-            if fn.args:
-                return sc_comment(f"part: {fn.args[0]}")
-            return None
+    def _sf_part(self, fn: SpecialFn, name: str) -> _ElementResult:
+        # Informational marker from MusicXML import - no warning needed
+        if fn.args:
+            return sc_comment(f"part: {fn.args[0]}")
+        return None
 
-        if name == "pitchstep":
-            self._warn("approximation",
-                       "_pitchstep emitted as comment")
-            return sc_comment("pitchstep (discrete pitch)")
+    def _sf_pitchstep(self, fn: SpecialFn, name: str) -> _ElementResult:
+        self._warn("approximation",
+                   "_pitchstep emitted as comment")
+        return sc_comment("pitchstep (discrete pitch)")
 
-        # --- Phase 2: Medium special functions ---
+    # --- Phase 2: Medium special functions ---
 
-        if name == "tempo" and fn.args:
-            try:
-                # _tempo(N) = relative multiplier: N× faster
-                # _tempo(2) → stretch 0.5, _tempo(2/3) → stretch 1.5
-                arg = fn.args[0]
-                if "/" in arg:
-                    parts = arg.split("/")
-                    ratio = float(parts[0]) / float(parts[1])
-                else:
-                    ratio = float(arg)
-                stretch = round(1.0 / ratio, 4)
-                return ("stretch", str(stretch))
-            except (ValueError, ZeroDivisionError):
-                return ("stretch", fn.args[0])
-
-        if name == "scale":
-            # Resolve scale name to SC Scale/Tuning with root
-            if len(fn.args) >= 2:
-                result = resolve_scale(fn.args[0], fn.args[1])
-            elif len(fn.args) == 1:
-                result = resolve_scale(fn.args[0], "0")
+    def _sf_tempo(self, fn: SpecialFn, name: str) -> _ElementResult:
+        try:
+            # _tempo(N) = relative multiplier: N× faster
+            # _tempo(2) → stretch 0.5, _tempo(2/3) → stretch 1.5
+            arg = fn.args[0]
+            if "/" in arg:
+                parts = arg.split("/")
+                ratio = float(parts[0]) / float(parts[1])
             else:
-                result = {"scale": "Scale.chromatic", "root": "0"}
-
-            if result.pop("_unknown", None):
-                self._warn("approximation",
-                           f"_scale({', '.join(fn.args)}) unknown scale name, "
-                           f"using Scale.chromatic")
-            return result  # dict -> multi-modifier
-
-        if name == "value" and len(fn.args) >= 2:
-            key = fn.args[0]
-            val = fn.args[1]
-            return (key, val)
-
-        if name == "retro":
-            # Handled in _emit_voice_elements for polymetric context
-            # Returns None to be consumed (like _repeat)
-            return None
-
-        if name == "rotate":
-            # Handled in _emit_voice_elements for polymetric context
-            # Returns None to be consumed (like _repeat)
-            return None
+                ratio = float(arg)
+            stretch = round(1.0 / ratio, 4)
+            return ("stretch", str(stretch))
+        except (ValueError, ZeroDivisionError):
+            return ("stretch", fn.args[0])
+
+    def _sf_scale(self, fn: SpecialFn, name: str) -> _ElementResult:
+        # Resolve scale name to SC Scale/Tuning with root
+        if len(fn.args) >= 2:
+            result = resolve_scale(fn.args[0], fn.args[1])
+        elif len(fn.args) == 1:
+            result = resolve_scale(fn.args[0], "0")
+        else:
+            result = {"scale": "Scale.chromatic", "root": "0"}
 
-        if name in ("switchon", "switchoff") and fn.args:
+        if result.pop("_unknown", None):
             self._warn("approximation",
-                       f"_{name}({', '.join(fn.args)}) MIDI switch emitted as comment")
-            return sc_comment(f"MIDI _{name}({', '.join(fn.args)})")
+                       f"_scale({', '.join(fn.args)}) unknown scale name, "
+                       f"using Scale.chromatic")
+        return result  # dict -> multi-modifier
+
+    def _sf_value(self, fn: SpecialFn, name: str) -> _ElementResult:
+        key = fn.args[0]
+        val = fn.args[1]
+        return (key, val)
+
+    def _sf_consumed(self, fn: SpecialFn, name: str) -> _ElementResult:
+        # _retro and _rotate: handled in _emit_voice_elements for
+        # polymetric context; consumed here (like _repeat)
+        return None
 
-        # --- MusicXML Import: Pedal markers ---
+    def _sf_switch(self, fn: SpecialFn, name: str) -> _ElementResult:
+        # _switchon(...) and _switchoff(...)
+        self._warn("approximation",
+                   f"_{name}({', '.join(fn.args)}) MIDI switch emitted as comment")
+        return sc_comment(f"MIDI _{name}({', '.join(fn.args)})")
 
-        # Sustain pedal
-        if name in ("sustainstart", "sustainstart_"):
-            self._sustain_pedal = True
-            return ("sustain", "1")
+    # --- MusicXML Import: Pedal markers (also spelled with a trailing _) ---
 
-        if name in ("sustainstop", "sustainstop_"):
-            self._sustain_pedal = False
-            return ("sustain", "0")
+    # Sustain pedal
+    def _sf_sustain_start(self, fn: SpecialFn, name: str) -> _ElementResult:
+        self._sustain_pedal = True
+        return ("sustain", "1")
 
-        if name in ("sustainstopstart", "sustainstopstart_"):
-            # Stop then start = remains at 1
-            return ("sustain", "1")
+    def _sf_sustain_stop(self, fn: SpecialFn, name: str) -> _ElementResult:
+        self._sustain_pedal = False
+        return ("sustain", "0")
 
-        # Sostenuto pedal
-        if name in ("sostenutostart", "sostenutostart_"):
-            self._sostenuto_pedal = True
-            return ("sostenuto", "1")
+    def _sf_sustain_stop_start(self, fn: SpecialFn, name: str) -> _ElementResult:
+        # Stop then start = remains at 1
+        return ("sustain", "1")
 
-        if name in ("sostenutostop", "sostenutostop_"):
-            self._sostenuto_pedal = False
-            return ("sostenuto", "0")
+    # Sostenuto pedal
+    def _sf_sostenuto_start(self, fn: SpecialFn, name: str) -> _ElementResult:
+        self._sostenuto_pedal = True
+        return ("sostenuto", "1")
 
-        # Soft pedal (una corda)
-        if name in ("softstart", "softstart_"):
-            self._soft_pedal = True
-            return ("softPedal", "1")
+    def _sf_sostenuto_stop(self, fn: SpecialFn, name: str) -> _ElementResult:
+        self._sostenuto_pedal = False
+        return ("sostenuto", "0")
 
-        if name in ("softstop", "softstop_"):
-            self._soft_pedal = False
-            return ("softPedal", "0")
+    # Soft pedal (una corda)
+    def _sf_soft_start(self, fn: SpecialFn, name: str) -> _ElementResult:
+        self._soft_pedal = True
+        return ("softPedal", "1")
 
-        # --- MusicXML Import: Slur markers ---
+    def _sf_soft_stop(self, fn: SpecialFn, name: str) -> _ElementResult:
+        self._soft_pedal = False
+        return ("softPedal", "0")
 
-        if name in ("legato_",):
-            # Slur start: extended legato
-            return ("legato", "1.5")
+    # --- MusicXML Import: Slur markers ---
 
-        if name in ("nolegato_",):
-            # Slur end: shorter legato (slight staccato)
-            return ("legato", "0.8")
+    def _sf_slur_start(self, fn: SpecialFn, name: str) -> _ElementResult:
+        # Slur start: extended legato
+        return ("legato", "1.5")
 
-        self._warn("unsupported_fn",
-                   f"_{fn.name}({', '.join(fn.args)}) unknown, "
-                   f"emitted as comment")
-        return sc_comment(f"_{fn.name}({', '.join(fn.args)})")
+    def _sf_slur_end(self, fn: SpecialFn, name: str) -> _ElementResult:
+        # Slur end: shorter legato (slight staccato)
+        return ("legato", "0.8")
 
     def _get_homo_mapping(self, label: str) -> dict[str, str] | None:
         """Get homomorphism mapping by label name.
 
-        Searches alphabet files for a homomorphism section with the given name.
-        Returns dict mapping source note names to target note names.
+        Looks the label up in the homomorphism index built from the loaded
+        alphabet files. Returns dict mapping source note names to target
+        note names.
         """
-        if not self._alphabet_files:
-            return None
-        return get_homomorphism_mapping(self._alphabet_files, label)
+        return self._homo_mappings.get(label)
 
     def _resolve_symbol_to_midi(self, name: str, depth: int = 0) -> list[int] | None:
         """Resolve a symbol to its MIDI notes by inlining its rules.
@@ -1517,44 +1673,65 @@ class SCEmitter:
         Returns:
             List of MIDI notes, or None if symbol can't be resolved to notes
         """
+        return self._resolve_symbol_midi_at(name, depth)[0]
+
+    def _resolve_symbol_midi_at(
+        self, name: str, depth: int
+    ) -> tuple[list[int] | None, int | None]:
+        """Resolve *name* at recursion *depth*, memoizing complete results.
+
+        Returns the notes and the height of the inlined rule tree, or None
+        as height when the depth limit cut the expansion short (a
+        recursive rule, or a very deep chain).  Cut-short results depend
+        on the depth they were reached at and are never cached; a cached
+        result is reused only where its whole tree still fits under the
+        limit, so the outcome never depends on resolution order.
+        """
         if depth > 10:
-            return None  # Prevent infinite recursion
+            return None, None  # Prevent infinite recursion
+
+        cache = self._symbol_midi_cache
+        hit = cache.get(name)
+        if hit is not None and depth + hit[1] <= 10:
+            return hit
 
         # Check if it's a terminal with known MIDI
-        if name in self._terminal_midi:
-            return [self._terminal_midi[name]]
+        terminal = self._terminal_midi.get(name)
+        if terminal is not None:
+            cache[name] = ([terminal], 0)
+            return cache[name]
 
         # Check if it's a defined symbol with rules
-        if name not in self._rules_by_lhs:
-            return None
-
-        rules = self._rules_by_lhs[name]
+        rules = self._rules_by_lhs.get(name)
         if not rules:
-            return None
+            return None, 0
 
         # Take the first rule (for deterministic resolution)
         _, rule = rules[0]
         midi_notes: list[int] = []
+        height: int | None = 0
 
+        # Exact type tests: AST node classes are never subclassed
         for elem in rule.rhs:
-            if isinstance(elem, Note):
+            if type(elem) is Note:
                 midi = note_to_midi(elem.name, elem.octave)
                 midi_notes.append(midi)
-            elif isinstance(elem, NonTerminal):
-                # Recursively resolve
-                sub_notes = self._resolve_symbol_to_midi(elem.name, depth + 1)
-                if sub_notes:
-                    midi_notes.extend(sub_notes)
-            elif isinstance(elem, Variable):
-                # Try to resolve variable too
-                sub_notes = self._resolve_symbol_to_midi(elem.name, depth + 1)
+            elif type(elem) is NonTerminal or type(elem) is Variable:
+                # Recursively resolve (variables too)
+                sub_notes, sub_height = self._resolve_symbol_midi_at(
+                    elem.name, depth + 1)
                 if sub_notes:
                     midi_notes.extend(sub_notes)
-            elif isinstance(elem, Rest):
-                pass  # Skip rests
-            # Skip other element types (SpecialFn, etc.)
+                if sub_height is None:
+                    height = None
+                elif height is not None and sub_height + 1 > height:
+                    height = sub_height + 1
+            # Skip rests and other element types (SpecialFn, etc.)
 
-        return midi_notes if midi_notes else None
+        notes = midi_notes if midi_notes else None
+        if height is not None:
+            cache[name] = (notes, height)
+        return notes, height
 
     def _apply_homo_to_midi(self, midi: int, mapping: dict[str, str]) -> int:
         """Apply homomorphism transformation to a MIDI note.
@@ -1563,50 +1740,29 @@ class SCEmitter:
         We convert MIDI to note name, apply transformation, convert back.
         """
         # Convert MIDI to French note name (most common in BP3 homos)
-        french_names = ['do', 'dop', 're', 'rep', 'mi', 'fa',
-                        'fap', 'sol', 'solp', 'la', 'lap', 'si']
-        octave = (midi // 12) - 1  # MIDI 60 = do4 in French convention
-        note_idx = midi % 12
-        note_name = f"{french_names[note_idx]}{octave}"
-
-        # Also try without 'p' suffix (alternate spellings)
-        alt_names = {
-            'dop': 'reb', 'rep': 'mib', 'fap': 'solb',
-            'solp': 'lab', 'lap': 'sib'
-        }
+        names = _MIDI_FRENCH_NAMES.get(midi)
+        if names is None:
+            names = _french_note_names(midi)
+        note_name, alt_note = names
 
-        # Check if note is in mapping
+        # Check if note is in mapping, else try the alternate name
         target = mapping.get(note_name)
-        if not target:
-            # Try alternate name
-            base = french_names[note_idx]
-            if base in alt_names:
-                alt_note = f"{alt_names[base]}{octave}"
-                target = mapping.get(alt_note)
+        if not target and alt_note is not None:
+            target = mapping.get(alt_note)
 
         if not target:
             return midi  # No transformation
 
-        # Parse target note name back to MIDI
+        # Parse target note name back to MIDI: French name (either
+        # spelling) followed by the octave
         target = target.strip()
-        # Try French notation
-        for i, fname in enumerate(french_names):
-            if target.startswith(fname) and len(target) > len(fname):
-                try:
-                    t_oct = int(target[len(fname):])
-                    return (t_oct + 1) * 12 + i
-                except ValueError:
-                    pass
-
-        # Try alternate French (sib, mib, etc.)
-        alt_to_idx = {'reb': 1, 'mib': 3, 'solb': 6, 'lab': 8, 'sib': 10}
-        for alt, idx in alt_to_idx.items():
-            if target.startswith(alt) and len(target) > len(alt):
-                try:
-                    t_oct = int(target[len(alt):])
-                    return (t_oct + 1) * 12 + idx
-                except ValueError:
-                    pass
+        prefix = _RE_FRENCH_PREFIX.match(target).group()  # type: ignore[union-attr]
+        pitch_class = _FRENCH_PITCH_CLASS.get(prefix)
+        if pitch_class is not None:
+            try:
+                return (int(target[len(prefix):]) + 1) * 12 + pitch_class
+            except ValueError:
+                pass
 
         return midi  # Couldn't parse target
 
@@ -1618,7 +1774,7 @@ class SCEmitter:
         The comment is emitted outside arrays (INV-1).
         """
         # REF = homomorphism identifier, sets context for subsequent MASTER/SLAVE
-        if homo.kind == HomoApplyKind.REF:
+        if homo.kind is HomoApplyKind.REF:
             names = [self._symbol_name(e) or "?" for e in homo.elements]
             if names:
                 self._current_homo_label = names[0]
@@ -1635,44 +1791,48 @@ class SCEmitter:
 
         # MASTER/SLAVE: apply transformation if we have a current homo label
         mapping = None
-        if self._current_homo_label:
-            mapping = self._get_homo_mapping(self._current_homo_label)
+        label = self._current_homo_label
+        if label:
+            mapping = self._get_homo_mapping(label)
 
         # If we have a mapping, try to resolve elements to MIDI and transform
-        if mapping:
+        if label and mapping:
+            # One pass over the elements: notes and inlined symbols
+            # become MIDI numbers, rests are skipped, anything else
+            # cannot be transformed
             midi_notes: list[int] = []
+            add_note = midi_notes.append
+            resolve = self._resolve_symbol_to_midi
             can_transform = True
 
             for elem in homo.elements:
-                if isinstance(elem, Note):
-                    midi = note_to_midi(elem.name, elem.octave)
-                    midi_notes.append(midi)
-                elif isinstance(elem, (NonTerminal, Variable)):
+                if type(elem) is Note:
+                    add_note(note_to_midi(elem.name, elem.octave))
+                elif type(elem) is NonTerminal or type(elem) is Variable:
                     # Try to inline this symbol's MIDI notes
-                    resolved = self._resolve_symbol_to_midi(
-                        elem.name if isinstance(elem, NonTerminal) else elem.name
-                    )
-                    if resolved:
-                        midi_notes.extend(resolved)
-                    else:
+                    resolved = resolve(elem.name)
+                    if not resolved:
                         can_transform = False
                         break
-                elif isinstance(elem, Rest):
-                    pass  # Skip rests for now
-                else:
+                    midi_notes += resolved
+                elif type(elem) is not Rest:  # Skip rests for now
                     can_transform = False
                     break
 
             if can_transform and midi_notes:
-                # Apply homomorphism transformation
-                transformed_midi = [
-                    self._apply_homo_to_midi(m, mapping) for m in midi_notes
-                ]
+                # Transform and format each distinct note once per label
+                table = self._homo_midi_tables.setdefault(label, {})
+                codes: list[str] = []
+                for m in midi_notes:
+                    code = table.get(m)
+                    if code is None:
+                        code = table[m] = str(
+                            self._apply_homo_to_midi(m, mapping))
+                    codes.append(code)
                 # Clear the homo label (consumed)
                 self._current_homo_label = None
                 # Return as Pbind with transformed notes
-                note_seq = sc_pseq([str(m) for m in transformed_midi])
-                return sc_pbind([("midinote", note_seq), ("dur", "0.25")])
+                return sc_pbind([("midinote", sc_pseq(codes)), ("dur", "0.25")])
 
         # Fallback: emit as before (without transformation)
         inner = self._emit_voice_elements(homo.elements)
@@ -1687,15 +1847,7 @@ class SCEmitter:
             if len(inner) == 1:
                 return inner[0]
             return sc_pseq(inner)
-        return "Event.silent(0.25)"
-
-    def _lhs_name(self, rule: Rule) -> str:
-        """Get the primary LHS symbol name for a rule."""
-        for elem in rule.lhs:
-            name = self._symbol_name(elem)
-            if name:
-                return name
-        return f"gram{rule.grammar_num}_rule{rule.rule_num}"
+        return _EVENT_SILENT
 
     @staticmethod
     def _symbol_name(elem: RHSElement) -> str | None:
@@ -1713,6 +1865,88 @@ class SCEmitter:
             return f"{flag.name}{flag.op}{flag.value}"
         return flag.name
 
+    # RHS node type -> emitter method, used by _emit_element
+    _ELEMENT_EMITTERS: dict[type, Callable[[SCEmitter, Any], _ElementResult]] = {
+        Note: _emit_note,
+        Rest: _emit_rest,
+        UndeterminedRest: _emit_undetermined_rest,
+        NonTerminal: _emit_symbol_ref,
+        Variable: _emit_symbol_ref,
+        Wildcard: _emit_wildcard,
+        Polymetric: _emit_polymetric,
+        SpecialFn: _emit_special_fn,
+        Lambda: _emit_nothing,
+        HomoApply: _emit_homo,
+        TimeSig: _emit_time_sig,
+        Annotation: _emit_nothing,
+        Tie: _emit_tie,
+        QuotedSymbol: _emit_quoted_symbol,
+        ContextMarker: _emit_context_marker,
+        GotoDirective: _emit_goto,
+    }
+
+    # Lowercased special function name -> (minimum number of arguments,
+    # emitter method), used by _emit_special_fn
+    _SPECIAL_FN_EMITTERS: dict[
+        str, tuple[int, Callable[[SCEmitter, SpecialFn, str], _ElementResult]]
+    ] = {
+        "transpose": (1, _sf_transpose),
+        "vel": (1, _sf_vel),
+        "mm": (1, _sf_mm),
+        "mm_inline": (1, _sf_mm_inline),
+        "ins": (1, _sf_ins),
+        "pitchrange": (1, _sf_arg_as_comment),
+        "pitchbend": (1, _sf_detune),
+        "pitchcont": (0, _sf_pitchcont),
+        "striated": (0, _sf_striated),
+        "goto": (1, _sf_not_implemented),
+        "failed": (1, _sf_not_implemented),
+        "repeat": (1, _sf_repeat),
+        "destru": (0, _sf_destru),
+        "script": (1, _sf_script),
+        "staccato": (1, _sf_legato),
+        "legato": (1, _sf_legato),
+        # Phase 1
+        "chan": (1, _sf_chan),
+        "volume": (1, _sf_vel),
+        "mod": (1, _sf_detune),
+        "rndvel": (1, _sf_rndvel),
+        "rndtime": (0, _sf_rndtime),
+        "rest": (0, _sf_rest),
+        "velcont": (0, _sf_velcont),
+        "press": (1, _sf_press),
+        "step": (1, _sf_arg_as_comment),
+        "keyxpand": (1, _sf_arg_as_comment),
+        "part": (0, _sf_part),
+        "pitchstep": (0, _sf_pitchstep),
+        # Phase 2
+        "tempo": (1, _sf_tempo),
+        "scale": (0, _sf_scale),
+        "value": (2, _sf_value),
+        "retro": (0, _sf_consumed),
+        "rotate": (0, _sf_consumed),
+        "switchon": (1, _sf_switch),
+        "switchoff": (1, _sf_switch),
+        # MusicXML pedal markers
+        "sustainstart": (0, _sf_sustain_start),
+        "sustainstart_": (0, _sf_sustain_start),
+        "sustainstop": (0, _sf_sustain_stop),
+        "sustainstop_": (0, _sf_sustain_stop),
+        "sustainstopstart": (0, _sf_sustain_stop_start),
+        "sustainstopstart_": (0, _sf_sustain_stop_start),
+        "sostenutostart": (0, _sf_sostenuto_start),
+        "sostenutostart_": (0, _sf_sostenuto_start),
+        "sostenutostop": (0, _sf_sostenuto_stop),
+        "sostenutostop_": (0, _sf_sostenuto_stop),
+        "softstart": (0, _sf_soft_start),
+        "softstart_": (0, _sf_soft_start),
+        "softstop": (0, _sf_soft_stop),
+        "softstop_": (0, _sf_soft_stop),
+        # MusicXML slur markers
+        "legato_": (0, _sf_slur_start),
+        "nolegato_": (0, _sf_slur_end),
+    }
+
 
 def emit_scd(bp_file: BPFile, source_name: str = "unknown",
              start_symbol: str = "S", verbose: bool = False,
@@ -2,6 +2,8 @@
 
 from __future__ import annotations
 
+from functools import lru_cache
+
 
 def sc_header(title: str, source_file: str) -> str:
     """Generate the .scd file header."""
@@ -69,6 +71,25 @@ def sc_pbind(pairs: list[tuple[str, str]]) -> str:
     return f"Pbind(\n{_indent(inner)}\n)"
 
 
+# One-event Pbind for a single MIDI note on the default SynthDef, split
+# around the note number (see sc_pbind_note)
+_PBIND_NOTE_PREFIX = "Pbind(\\instrument, \\bp2sc_default, \\midinote, Pseq(["
+_PBIND_NOTE_SUFFIX = "], 1), \\dur, 0.25)"
+_PBIND_TIED_NOTE_SUFFIX = "], 1), \\dur, 0.25, \\legato, 2.0)"
+
+
+@lru_cache(maxsize=256)
+def sc_pbind_note(midi: str, tied: bool = False) -> str:
+    """Generate a Pbind playing one MIDI note once.
+
+    Pseq([n], 1) makes the Pbind produce exactly one event.  A tied note
+    gets legato 2.0, sustaining it through the next beat.  Cached: there
+    are only 128 MIDI note numbers.
+    """
+    suffix = _PBIND_TIED_NOTE_SUFFIX if tied else _PBIND_NOTE_SUFFIX
+    return _PBIND_NOTE_PREFIX + midi + suffix
+
+
 def sc_pseq(elements: list[str], repeats: str = "1") -> str:
     """Generate a Pseq."""
     if len(elements) <= 4:
@@ -127,8 +148,13 @@ def sc_play(pdef_name: str) -> str:
     return f"Pdef(\\{_sc_name(pdef_name)}).play;"
 
 
+@lru_cache(maxsize=4096)
 def _sc_name(name: str) -> str:
-    """Sanitize a name for SuperCollider symbol."""
+    """Sanitize a name for SuperCollider symbol.
+
+    Cached: the same few symbol names are formatted for every Pdef,
+    reference and play line.
+    """
     # Replace non-alphanumeric chars
     result = name.replace("'", "_p").replace('"', "_q").replace(" ", "_")
     # Ensure it starts with a letter
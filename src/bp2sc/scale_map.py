@@ -13,19 +13,25 @@ from __future__ import annotations
 
 import json
 import re
+from functools import cache, lru_cache
 from pathlib import Path
 
 # Load the mapping data from JSON
 _DATA_FILE = Path(__file__).parent / "data" / "scale_map.json"
-_SCALE_DATA: dict = {}
 
+
+@cache
 def _load_data() -> dict:
-    """Load scale mapping data from JSON file."""
-    global _SCALE_DATA
-    if not _SCALE_DATA:
-        with open(_DATA_FILE, "r", encoding="utf-8") as f:
-            _SCALE_DATA = json.load(f)
-    return _SCALE_DATA
+    """Load scale mapping data from JSON file (once).
+
+    Tuning and raga names are lowercased, as they are looked up by the
+    lowercased scale name.
+    """
+    with open(_DATA_FILE, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    for table in ("tunings", "ragas"):
+        data[table] = {k.lower(): v for k, v in data.get(table, {}).items()}
+    return data
 
 
 # Regex for key-quality scale names: C, D, E, F, G, A, B with optional #/b and maj/min
@@ -48,6 +54,28 @@ def _note_to_root(note: str, accidental: str) -> int:
     return base
 
 
+# Root argument forms accepted by parse_root_arg
+_RE_ANGLO_ROOT = re.compile(r'^([A-G])([#b]?)(\d)?$', re.IGNORECASE)
+_RE_OCTAVE_TAIL = re.compile(r'\d+$')
+
+# French solfege: dop4, rep4, mip4, fap4, solp4, lap4, sip4
+# (p = dièse/sharp in BP3 convention)
+_FRENCH_ROOTS = {
+    'do': 0, 'dop': 1, 'dod': 1, 'dob': 11,
+    're': 2, 'rep': 3, 'red': 3, 'reb': 1,
+    'mi': 4, 'mip': 5, 'mid': 5, 'mib': 3,
+    'fa': 5, 'fap': 6, 'fad': 6, 'fab': 4,
+    'sol': 7, 'solp': 8, 'sold': 8, 'solb': 6,
+    'la': 9, 'lap': 10, 'lad': 10, 'lab': 8,
+    'si': 11, 'sip': 0, 'sid': 0, 'sib': 10,
+}
+
+# Indian solfege: sa_4, ri_4, ga_4, ma_4, pa_4, dha_4, ni_4
+_INDIAN_ROOTS = {
+    'sa': 0, 'ri': 2, 'ga': 4, 'ma': 5, 'pa': 7, 'dha': 9, 'ni': 11
+}
+
+
 def parse_root_arg(arg: str) -> int:
     """Parse a root argument to a semitone offset (0-11).
 
@@ -66,35 +94,29 @@ def parse_root_arg(arg: str) -> int:
         return int(arg) % 12
 
     # Anglo notation: C4, D#5, Bb3
-    m = re.match(r'^([A-G])([#b]?)(\d)?$', arg, re.IGNORECASE)
+    m = _RE_ANGLO_ROOT.match(arg)
     if m:
         note, accidental = m.group(1).upper(), m.group(2) or ''
         return _note_to_root(note, accidental)
 
-    # French solfege: dop4, rep4, mip4, fap4, solp4, lap4, sip4
-    # (p = dièse/sharp in BP3 convention)
-    french_map = {
-        'do': 0, 'dop': 1, 'dod': 1, 'dob': 11,
-        're': 2, 'rep': 3, 'red': 3, 'reb': 1,
-        'mi': 4, 'mip': 5, 'mid': 5, 'mib': 3,
-        'fa': 5, 'fap': 6, 'fad': 6, 'fab': 4,
-        'sol': 7, 'solp': 8, 'sold': 8, 'solb': 6,
-        'la': 9, 'lap': 10, 'lad': 10, 'lab': 8,
-        'si': 11, 'sip': 0, 'sid': 0, 'sib': 10,
-    }
-    # Remove trailing digit(s)
-    note_part = re.sub(r'\d+$', '', arg.lower())
-    if note_part in french_map:
-        return french_map[note_part]
-
-    # Indian solfege: sa_4, ri_4, ga_4, ma_4, pa_4, dha_4, ni_4
-    indian_map = {
-        'sa': 0, 'ri': 2, 'ga': 4, 'ma': 5, 'pa': 7, 'dha': 9, 'ni': 11
-    }
-    # Remove trailing _N
-    note_part = re.sub(r'_\d+$', '', arg.lower())
-    if note_part in indian_map:
-        return indian_map[note_part]
+    # Split off the trailing octave digits once, for both solfege forms
+    lower = arg.lower()
+    tail = _RE_OCTAVE_TAIL.search(lower)
+    note_part = lower[:tail.start()] if tail else lower
+
+    # French solfege: dop4, rep4, mip4 (octave digits removed)
+    root = _FRENCH_ROOTS.get(note_part)
+    if root is not None:
+        return root
+
+    # Indian solfege: sa_4, ri_4 (trailing _N removed)
+    if tail and note_part.endswith('_'):
+        note_part = note_part[:-1]
+    else:
+        note_part = lower
+    root = _INDIAN_ROOTS.get(note_part)
+    if root is not None:
+        return root
 
     # Default: C = 0
     return 0
@@ -113,6 +135,13 @@ def resolve_scale(name: str, root_arg: str = "0") -> dict[str, str]:
         - "root": The root offset (0-11 as string)
         - "_unknown": "true" if the scale was not recognized (optional)
     """
+    # A copy: the cached dict must not be changed by the caller
+    return dict(_resolve_scale(name, root_arg))
+
+
+@lru_cache(maxsize=256)
+def _resolve_scale(name: str, root_arg: str) -> dict[str, str]:
+    """Cached body of resolve_scale(); scale names recur on every bar."""
     data = _load_data()
     name_lower = name.lower().strip()
 
@@ -121,18 +150,18 @@ def resolve_scale(name: str, root_arg: str = "0") -> dict[str, str]:
     if m:
         note, accidental = m.group(1).upper(), m.group(2) or ''
         root = _note_to_root(note, accidental)
-        scale_type = "Scale.major" if "maj" in name.lower() else "Scale.minor"
+        scale_type = "Scale.major" if "maj" in name_lower else "Scale.minor"
         return {"scale": scale_type, "root": str(root)}
 
     # 2. Check tunings lookup
-    if name_lower in data.get("tunings", {}):
-        tuning = data["tunings"][name_lower]
+    tuning = data["tunings"].get(name_lower)
+    if tuning is not None:
         root = parse_root_arg(root_arg)
         return {"tuning": tuning, "root": str(root)}
 
     # 3. Check ragas lookup
-    if name_lower in data.get("ragas", {}):
-        scale = data["ragas"][name_lower]
+    scale = data["ragas"].get(name_lower)
+    if scale is not None:
         root = parse_root_arg(root_arg)
         return {"scale": scale, "root": str(root)}
 
@@ -13,7 +13,7 @@ from __future__ import annotations
 import json
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Any
+from typing import Any, Callable
 
 
 @dataclass
@@ -69,14 +69,32 @@ class BP3Settings:
 
 def _get_value(data: dict, key: str, default: Any = None) -> Any:
     """Extract value from BP3 settings structure."""
-    if key not in data:
-        return default
-    entry = data[key]
+    entry = data.get(key, default)
     if isinstance(entry, dict) and "value" in entry:
         return entry["value"]
     return entry
 
 
+def _striated(val: Any) -> bool:
+    return int(val) == 1
+
+
+# (settings file key, BP3Settings attribute, converter); a value that
+# fails to convert leaves the default in place
+_SETTINGS_FIELDS: tuple[tuple[str, str, Callable[[Any], Any]], ...] = (
+    ("NoteConvention", "note_convention", int),
+    # Tempo (Pclock/Qclock)
+    ("Pclock", "pclock", float),
+    ("Qclock", "qclock", float),
+    ("DeftVelocity", "default_velocity", int),
+    ("DeftVolume", "default_volume", int),
+    ("C4key", "c4_key", int),
+    ("A4freq", "a4_freq", float),
+    ("Quantization", "quantization", int),
+    ("Nature_of_time", "striated_time", _striated),
+)
+
+
 def parse_settings_file(path: str | Path) -> BP3Settings:
     """Parse a BP3 settings file.
 
@@ -96,76 +114,13 @@ def parse_settings_file(path: str | Path) -> BP3Settings:
 
     settings = BP3Settings(name=name)
 
-    # Note convention
-    val = _get_value(data, "NoteConvention")
-    if val is not None:
-        try:
-            settings.note_convention = int(val)
-        except (ValueError, TypeError):
-            pass
-
-    # Tempo (Pclock/Qclock)
-    val = _get_value(data, "Pclock")
-    if val is not None:
-        try:
-            settings.pclock = float(val)
-        except (ValueError, TypeError):
-            pass
-
-    val = _get_value(data, "Qclock")
-    if val is not None:
-        try:
-            settings.qclock = float(val)
-        except (ValueError, TypeError):
-            pass
-
-    # Velocity
-    val = _get_value(data, "DeftVelocity")
-    if val is not None:
-        try:
-            settings.default_velocity = int(val)
-        except (ValueError, TypeError):
-            pass
-
-    # Volume
-    val = _get_value(data, "DeftVolume")
-    if val is not None:
-        try:
-            settings.default_volume = int(val)
-        except (ValueError, TypeError):
-            pass
-
-    # C4 key
-    val = _get_value(data, "C4key")
-    if val is not None:
-        try:
-            settings.c4_key = int(val)
-        except (ValueError, TypeError):
-            pass
-
-    # A4 frequency
-    val = _get_value(data, "A4freq")
-    if val is not None:
-        try:
-            settings.a4_freq = float(val)
-        except (ValueError, TypeError):
-            pass
-
-    # Quantization
-    val = _get_value(data, "Quantization")
-    if val is not None:
-        try:
-            settings.quantization = int(val)
-        except (ValueError, TypeError):
-            pass
-
-    # Striated time
-    val = _get_value(data, "Nature_of_time")
-    if val is not None:
-        try:
-            settings.striated_time = int(val) == 1
-        except (ValueError, TypeError):
-            pass
+    for key, attr, convert in _SETTINGS_FIELDS:
+        val = _get_value(data, key)
+        if val is not None:
+            try:
+                setattr(settings, attr, convert(val))
+            except (ValueError, TypeError):
+                pass
 
     return settings
 
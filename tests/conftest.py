@@ -0,0 +1,10 @@
+"""Shared pytest fixtures."""
+
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def _isolated_cache(tmp_path_factory, monkeypatch):
+    """Keep the on-disk parse cache out of the user's home directory."""
+    monkeypatch.setenv("BP2SC_CACHE_DIR", str(tmp_path_factory.mktemp("cache")))
+    monkeypatch.delenv("BP2SC_CACHE", raising=False)
@@ -7,6 +7,9 @@ Usage:
     events = trace_scd_file("output.scd", start_symbol="S", max_events=200)
     for e in events:
         print(e)  # {'type': 'note', 'midinote': 60, 'dur': 0.25, ...}
+
+    # Several files at once, one sclang process each
+    per_file = trace_scd_files(["a.scd", "b.scd"])
 """
 
 from __future__ import annotations
@@ -15,8 +18,10 @@ import re
 import subprocess
 import shutil
 import tempfile
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass, field
 from pathlib import Path
+from typing import Iterable
 
 
 @dataclass
@@ -104,6 +109,25 @@ def trace_scd_file(scd_path: str | Path, start_symbol: str = "S",
     return trace_scd_content(content, start_symbol, max_events, timeout)
 
 
+def trace_scd_files(scd_paths: Iterable[str | Path], start_symbol: str = "S",
+                    max_events: int = 200, timeout: float = 30.0,
+                    max_workers: int | None = None) -> list[list[TraceEvent]]:
+    """Trace events from several .scd files, one sclang process each.
+
+    sclang startup (about a second) dominates the cost of a trace, and
+    each trace only waits on its own subprocess, so the processes are
+    run side by side from a thread pool.
+
+    Returns:
+        One event list per file, in the order of scd_paths.
+    """
+    def trace(path: str | Path) -> list[TraceEvent]:
+        return trace_scd_file(path, start_symbol, max_events, timeout)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        return list(pool.map(trace, scd_paths))
+
+
 def _build_trace_script(scd_path: str, start_symbol: str,
                         max_events: int) -> str:
     """Build a sclang script that loads a .scd file and extracts events.
@@ -153,22 +177,21 @@ Pdef.all.do(_.stop);
 """
 
 
-# Regex for parsing trace output lines
-_RE_NOTE = re.compile(
-    r"BP2SC_EVENT (\d+): type=note midinote=([\d.]+) dur=([\d.]+) "
+# Regex for trace output events: note (groups 2-6) or rest (groups 7-8).
+# Neither shape can span a newline, so it is run over the whole output.
+_RE_EVENT = re.compile(
+    r"BP2SC_EVENT (\d+): type=(?:"
+    r"note midinote=([\d.]+) dur=([\d.]+) "
     r"stretch=([\d.]+) ctranspose=([-\d.]+) detune=([-\d.]+)"
-)
-_RE_REST = re.compile(
-    r"BP2SC_EVENT (\d+): type=rest dur=([\d.]+) stretch=([\d.]+)"
+    r"|rest dur=([\d.]+) stretch=([\d.]+))"
 )
 
 
 def _parse_trace_output(output: str) -> list[TraceEvent]:
     """Parse sclang trace output into TraceEvent objects."""
     events = []
-    for line in output.split("\n"):
-        m = _RE_NOTE.search(line)
-        if m:
+    for m in _RE_EVENT.finditer(output):
+        if m.group(2) is not None:
             events.append(TraceEvent(
                 index=int(m.group(1)),
                 type="note",
@@ -178,16 +201,12 @@ def _parse_trace_output(output: str) -> list[TraceEvent]:
                 ctranspose=float(m.group(5)),
                 detune=float(m.group(6)),
             ))
-            continue
-
-        m = _RE_REST.search(line)
-        if m:
+        else:
             events.append(TraceEvent(
                 index=int(m.group(1)),
                 type="rest",
-                dur=float(m.group(2)),
-                stretch=float(m.group(3)),
+                dur=float(m.group(7)),
+                stretch=float(m.group(8)),
             ))
-            continue
 
     return events
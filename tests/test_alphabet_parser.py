@@ -0,0 +1,171 @@
+"""Tests for alphabet_parser.py."""
+
+import pickle
+
+import pytest
+from bp2sc import alphabet_parser, disk_cache
+from bp2sc.alphabet_parser import (
+    parse_alphabet_file, parse_alphabet_dir, get_homomorphism_mapping,
+    index_homomorphisms,
+)
+
+
+def _write(tmp_path, name, text):
+    path = tmp_path / name
+    path.write_text(text, encoding="utf-8")
+    return path
+
+
+class TestParseAlphabetFile:
+    def test_mixed_file(self, tmp_path):
+        text = ("// c\n-mi.x\nek\ntin\n---\nm\n  a --> b\nc-->d\n"
+                "sync\nn\ne --> f\n-----\nlast\n")
+        af = parse_alphabet_file(_write(tmp_path, "-al.s", text))
+        assert af.file_refs == ["-mi.x"]
+        # A separator drops the pending name (tin)
+        assert af.terminals == ["ek", "last"]
+        assert get_homomorphism_mapping({"s": af}, "m") == {"a": "b", "c": "d"}
+        assert get_homomorphism_mapping({"s": af}, "n") == {"e": "f"}
+
+    def test_name_strips_prefix(self, tmp_path):
+        af = parse_alphabet_file(_write(tmp_path, "-al.notes", "a\n"))
+        assert af.name == "notes"
+
+    def test_terminals(self, tmp_path):
+        af = parse_alphabet_file(_write(tmp_path, "-al.t", "ek\ndo\ntin\n"))
+        assert af.terminals == ["ek", "do", "tin"]
+        assert af.homomorphisms == {}
+
+    def test_comments_and_file_refs(self, tmp_path):
+        text = "// header\n-mi.piano\n-ho.trans\nek\n"
+        af = parse_alphabet_file(_write(tmp_path, "-al.t", text))
+        assert af.file_refs == ["-mi.piano", "-ho.trans"]
+        assert af.terminals == ["ek"]
+
+    def test_homomorphism_section(self, tmp_path):
+        text = "mineur\nfa4 --> re4\nla4-->fa4\n  sol4   -->   mi4  \n"
+        af = parse_alphabet_file(_write(tmp_path, "-al.h", text))
+        assert list(af.homomorphisms) == ["mineur"]
+        assert af.homomorphisms["mineur"].rules[0] == ("fa4", "re4")
+        assert get_homomorphism_mapping({"h": af}, "mineur") == {
+            "fa4": "re4", "la4": "fa4", "sol4": "mi4",
+        }
+
+    def test_anonymous_section(self, tmp_path):
+        af = parse_alphabet_file(_write(tmp_path, "-al.h", "a --> b\n"))
+        assert list(af.homomorphisms) == ["*"]
+
+    def test_separator_closes_section(self, tmp_path):
+        text = "m1\na --> b\n-----\nm2\nc --> d\n"
+        af = parse_alphabet_file(_write(tmp_path, "-al.h", text))
+        assert list(af.homomorphisms) == ["m1", "m2"]
+
+    def test_arrow_needs_source_and_target(self, tmp_path):
+        text = "--> x\ny -->\n"
+        af = parse_alphabet_file(_write(tmp_path, "-al.h", text))
+        assert af.homomorphisms == {}
+        assert af.terminals == ["--> x", "y -->"]
+
+    def test_only_first_arrow_splits(self, tmp_path):
+        af = parse_alphabet_file(_write(tmp_path, "-al.h", "a --> b --> c\n"))
+        mapping = get_homomorphism_mapping({"h": af}, "*")
+        assert mapping == {"a": "b --> c"}
+
+    def test_directives_skipped(self, tmp_path):
+        af = parse_alphabet_file(_write(tmp_path, "-al.h", "sync\n*\nek\n"))
+        assert af.terminals == ["ek"]
+
+
+class TestParseAlphabetDir:
+    def test_only_alphabet_files(self, tmp_path):
+        _write(tmp_path, "-al.one", "a\n")
+        _write(tmp_path, "-al.two", "m\nx --> y\n")
+        _write(tmp_path, "-gr.other", "S --> a\n")
+        (tmp_path / "-al.subdir").mkdir()
+        result = parse_alphabet_dir(tmp_path)
+        assert sorted(result) == ["one", "two"]
+
+    def test_mapping_not_found(self, tmp_path):
+        _write(tmp_path, "-al.one", "a\n")
+        assert get_homomorphism_mapping(parse_alphabet_dir(tmp_path), "zz") is None
+
+    def test_missing_dir_is_empty(self, tmp_path):
+        assert parse_alphabet_dir(tmp_path / "missing") == {}
+
+    def test_file_path_is_empty(self, tmp_path):
+        assert parse_alphabet_dir(_write(tmp_path, "-al.one", "a\n")) == {}
+
+    def test_not_cached_by_default(self, tmp_path):
+        _write(tmp_path, "-al.one", "a\n")
+        parse_alphabet_dir(tmp_path)
+        assert not list(disk_cache.cache_dir().glob("*.pkl"))
+
+
+class TestHomomorphismIndex:
+    def test_mapping_is_cached(self, tmp_path):
+        af = parse_alphabet_file(_write(tmp_path, "-al.h", "m\na --> b\n"))
+        section = af.homomorphisms["m"]
+        assert section.mapping() is section.mapping()
+
+    def test_returned_mappings_are_copies(self, tmp_path):
+        af = parse_alphabet_file(_write(tmp_path, "-al.h", "m\na --> b\n"))
+        get_homomorphism_mapping({"h": af}, "m")["a"] = "z"
+        index_homomorphisms({"h": af})["m"]["x"] = "y"
+        assert get_homomorphism_mapping({"h": af}, "m") == {"a": "b"}
+
+    def test_first_file_wins(self, tmp_path):
+        one = parse_alphabet_file(_write(tmp_path, "-al.one", "m\na --> b\n"))
+        two = parse_alphabet_file(_write(tmp_path, "-al.two", "m\na --> c\nn\nx --> y\n"))
+        index = index_homomorphisms({"one": one, "two": two})
+        assert index == {"m": {"a": "b"}, "n": {"x": "y"}}
+
+
+class TestMidiMap:
+    def test_notes_and_positions(self, tmp_path):
+        af = parse_alphabet_file(_write(tmp_path, "-al.t", "ek\nC4\ntin\nek\nBb3\n"))
+        assert af.midi_map() == {"ek": 60, "C4": 60, "tin": 62, "Bb3": 58}
+
+
+class TestDirCache:
+    @pytest.fixture(autouse=True)
+    def _enable_cache(self, monkeypatch):
+        monkeypatch.setenv("BP2SC_CACHE", "1")
+
+    def test_warm_run_loads_from_cache(self, tmp_path, monkeypatch):
+        _write(tmp_path, "-al.h", "m\na --> b\n")
+        first = parse_alphabet_dir(tmp_path)
+        monkeypatch.setattr(alphabet_parser, "parse_alphabet_file", None)
+        assert parse_alphabet_dir(tmp_path) == first
+
+    def test_modified_file_invalidates(self, tmp_path):
+        path = _write(tmp_path, "-al.h", "m\na --> b\n")
+        parse_alphabet_dir(tmp_path)
+        path.write_text("m\na --> c\nx --> y\n", encoding="utf-8")
+        result = parse_alphabet_dir(tmp_path)
+        assert get_homomorphism_mapping(result, "m") == {"a": "c", "x": "y"}
+
+    def test_new_file_invalidates(self, tmp_path):
+        _write(tmp_path, "-al.one", "a\n")
+        parse_alphabet_dir(tmp_path)
+        _write(tmp_path, "-al.two", "b\n")
+        assert sorted(parse_alphabet_dir(tmp_path)) == ["one", "two"]
+
+    def test_midi_map_kept_in_cache(self, tmp_path):
+        _write(tmp_path, "-al.t", "ek\ntin\n")
+        parse_alphabet_dir(tmp_path)
+        cached = parse_alphabet_dir(tmp_path)["t"]
+        assert cached._midi_map == {"ek": 60, "tin": 61}
+
+    def test_corrupt_entry_is_a_miss(self, tmp_path):
+        _write(tmp_path, "-al.one", "a\n")
+        parse_alphabet_dir(tmp_path)
+        for entry in disk_cache.cache_dir().glob("*.pkl"):
+            entry.write_bytes(b"not a pickle")
+        assert parse_alphabet_dir(tmp_path)["one"].terminals == ["a"]
+
+    def test_wrong_type_entry_is_a_miss(self, tmp_path):
+        _write(tmp_path, "-al.one", "a\n")
+        parse_alphabet_dir(tmp_path)
+        for entry in disk_cache.cache_dir().glob("*.pkl"):
+            entry.write_bytes(pickle.dumps({"one": "not an alphabet"}))
+        assert parse_alphabet_dir(tmp_path)["one"].terminals == ["a"]
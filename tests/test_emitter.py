@@ -1,5 +1,7 @@
 """Tests for the SC emitter."""
 
+import dataclasses
+
 import pytest
 from bp2sc.grammar.parser import parse_text, parse_file
 from bp2sc.sc_emitter import emit_scd
@@ -150,6 +152,15 @@ class TestMultiSymbolLHS:
         )
         assert "Pdef(\\o1)" in o_body
 
+    def test_repeated_context_symbol_stripped_each_time(self):
+        """Each context occurrence strips one RHS occurrence, from the end."""
+        from bp2sc.sc_emitter import emit_scd_with_warnings
+        text = "ORD\ngram#1[1] |o| |m| |m| --> |m| |x| |m| |m|\n"
+        scd, warnings = emit_scd_with_warnings(parse_text(text), "test")
+        assert "Pseq([Pdef(\\m), Pdef(\\x)], 1)" in scd
+        stripped = [w for w in warnings if w.category == "context_stripped"]
+        assert len(stripped) == 2
+
     def test_ruwet_o_no_miny(self):
         """In Ruwet, Pdef(\\o) variants should not contain Pdef(\\miny)."""
         ast = parse_file("bp3-ctests/-gr.Ruwet")
@@ -291,6 +302,15 @@ class TestEmitPhase2SpecialFn:
         unsup = [w for w in warnings if w.category == "unsupported_fn"]
         assert len(unsup) == 0
 
+    def test_missing_args_treated_as_unknown(self):
+        """_transpose without its argument falls back to a comment."""
+        from bp2sc.sc_emitter import emit_scd_with_warnings
+        ast = parse_text("ORD\ngram#1[1] S --> _transpose _value(x) A\n")
+        scd, warnings = emit_scd_with_warnings(ast, "test")
+        unsup = [w.message for w in warnings if w.category == "unsupported_fn"]
+        assert unsup == ["_transpose() unknown, emitted as comment",
+                         "_value(x) unknown, emitted as comment"]
+
 
 class TestEmitFlags:
     """Phase 3: Flag-based conditional rules."""
@@ -457,6 +477,14 @@ class TestScaleRootParsing:
         assert parse_root_arg("12") == 0  # wraps
 
 
+class TestResolveScaleCache:
+    def test_result_is_a_fresh_dict(self):
+        from bp2sc.scale_map import resolve_scale
+        first = resolve_scale("gloubibolga", "0")
+        first.pop("_unknown")
+        assert resolve_scale("gloubibolga", "0")["_unknown"] == "true"
+
+
 class TestEmitScriptMidiProgram:
     """Phase B: _script(MIDI program N) -> program modifier."""
 
@@ -527,6 +555,13 @@ class TestEmitRndvel:
         assert "0.787" in scd or "0.63" in scd  # 100/127 or 80/127
 
 
+    def test_repeated_vel_keeps_one_group(self):
+        """_vel(80) fa4 _vel(80) sol4 -> one Pbind, not two"""
+        ast = parse_text("ORD\ngram#1[1] S --> _vel(80) fa4 _vel(80) sol4\n")
+        scd = emit_scd(ast, "test")
+        assert scd.count("Pbind") == 1
+
+
 class TestEmitPressModifier:
     """Phase E: _press(N) -> aftertouch modifier."""
 
@@ -731,6 +766,27 @@ class TestEmitTiedNotes:
         assert "legato" in scd
         assert "Event.silent" in scd
 
+    def test_overlapping_ties(self):
+        """C4& D4& &C4 &D4: both tie ends are held, not replayed."""
+        ast = parse_text("ORD\ngram#1[1] S --> C4& D4& &C4 &D4\n")
+        scd = emit_scd(ast, "test")
+        assert scd.count("Event.silent(0.25)") == 2
+
+    def test_tie_in_polymetric_voice(self):
+        """Tied notes inside {...} are emitted as SC code, not markers."""
+        ast = parse_text("ORD\ngram#1[1] S --> {C4& D4, &C4 E4}\n")
+        scd = emit_scd(ast, "test")
+        assert "TIE_" not in scd
+        assert "legato" in scd
+
+    def test_unmatched_tie_start_does_not_leak_into_next_rule(self):
+        """An open tie (C4&) is dropped at the end of its rule."""
+        ast = parse_text("ORD\ngram#1[1] S --> C4& D4\n"
+                         "gram#1[2] T --> &C4 E4\n")
+        scd = emit_scd(ast, "test")
+        assert "Event.silent" not in scd
+        assert scd.count("Pseq([60], 1)") == 2
+
 
 class TestEmitPedalMarkers:
     """MusicXML Import: Pedal markers _sustainstart_, _sustainstop_, etc."""
@@ -825,3 +881,165 @@ class TestEmitTempoInline:
         scd, warnings = emit_scd_with_warnings(ast, "test")
         unsup = [w for w in warnings if w.category == "unsupported_fn"]
         assert len(unsup) == 0, f"Unexpected unsupported_fn warnings: {unsup}"
+
+
+class TestEmitTerminals:
+    """NonTerminals without rules become terminal Pdefs."""
+
+    def _terminal_line(self, scd, name):
+        return next(line for line in scd.split("\n")
+                    if line.startswith(f"Pdef(\\{name}, Pbind("))
+
+    def test_anglo_note_names(self):
+        ast = parse_text("ORD\ngram#1[1] S --> C4 E5 Bb3\n")
+        scd = emit_scd(ast, "test")
+        assert "Pseq([60], 1)" in self._terminal_line(scd, "C4")
+        assert "Pseq([76], 1)" in self._terminal_line(scd, "E5")
+        assert "Pseq([58], 1)" in self._terminal_line(scd, "Bb3")
+
+    def test_other_names_numbered_in_order(self):
+        ast = parse_text("ORD\ngram#1[1] S --> ek C4 tin Hb3 ek\n")
+        scd = emit_scd(ast, "test")
+        assert "Pseq([60], 1)" in self._terminal_line(scd, "ek")
+        assert "Pseq([61], 1)" in self._terminal_line(scd, "tin")
+        assert "Pseq([62], 1)" in self._terminal_line(scd, "Hb3")
+
+    def test_nested_names_numbered_in_order(self):
+        ast = parse_text("ORD\ngram#1[1] S --> a {b, c {d, e}} f\n")
+        scd = emit_scd(ast, "test")
+        for midi, name in enumerate("abcdef", start=60):
+            assert f"Pseq([{midi}], 1)" in self._terminal_line(scd, name)
+
+
+class TestMultiBlockSymbols:
+    """Symbols defined in several blocks get a per-block Pdef name."""
+
+    GRAMMAR = (
+        "ORD[1]\ngram#1[1] S --> A B\ngram#1[2] A --> fa4\n"
+        "-----\nORD[2]\ngram#2[1] A --> sol4\ngram#2[2] B --> A A\n"
+    )
+
+    def test_pdef_names(self):
+        scd = emit_scd(parse_text(self.GRAMMAR), "test")
+        assert "Pdef(\\A_g1," in scd
+        assert "Pdef(\\A_g2," in scd
+
+    def test_refs_resolve_per_block(self):
+        scd = emit_scd(parse_text(self.GRAMMAR), "test")
+        # Block 1 refers to its own A; block 2 (B) to block 2's A
+        assert "Pseq([Pdef(\\A_g1), Pdef(\\B)], 1)" in scd
+        assert "Pseq([Pdef(\\A_g2), Pdef(\\A_g2)], 1)" in scd
+
+    def test_ref_from_other_block_uses_first_definition(self):
+        grammar = self.GRAMMAR + "-----\nORD[3]\ngram#3[1] C --> A\n"
+        scd = emit_scd(parse_text(grammar), "test")
+        assert "Pdef(\\C,\n\tPdef(\\A_g1)\n);" in scd
+
+
+class TestWarningSummaries:
+    TEXT = "-se.x\nORD\ngram#1[1] S --> ?1 ?2 4+4/4\n"
+
+    def _emitter(self):
+        from bp2sc.sc_emitter import SCEmitter
+        emitter = SCEmitter(parse_text(self.TEXT), "test")
+        emitter.emit()
+        return emitter
+
+    def test_summary_most_frequent_first(self):
+        summary = self._emitter().warnings_summary()
+        assert summary.split("\n") == [
+            "4 warning(s):",
+            "  approximation: 2",
+            "  missing_resource: 1",
+            "  time_sig_ignored: 1",
+        ]
+
+    def test_report_summary_section(self):
+        report = self._emitter().warnings_report()
+        assert report.endswith("--- Summary ---\n  approximation: 2\n"
+                               "  missing_resource: 1\n  time_sig_ignored: 1")
+
+    def test_counts_follow_direct_list_changes(self):
+        emitter = self._emitter()
+        del emitter.warnings[1:]
+        assert emitter.warnings_summary() == "1 warning(s):\n  missing_resource: 1"
+
+    def test_counts_follow_same_length_list_changes(self):
+        emitter = self._emitter()
+        emitter.warnings[1:] = [emitter.warnings[0]] * 3
+        assert emitter.warnings_summary() == "4 warning(s):\n  missing_resource: 4"
+
+    def test_report_lists_repeats_once(self):
+        from bp2sc.sc_emitter import SCEmitter
+        text = "ORD\ngram#1[1] S --> ?1 ?1 A\ngram#1[2] A --> ?1\n"
+        emitter = SCEmitter(parse_text(text), "test")
+        emitter.emit()
+        assert len(emitter.warnings) == 3
+        assert emitter.warnings[0] is emitter.warnings[1]
+        with pytest.raises(dataclasses.FrozenInstanceError):
+            emitter.warnings[0].message = "edited"
+        report = emitter.warnings_report().split("\n")
+        assert report[:3] == [
+            "=== 3 warning(s) ===",
+            "[approximation] gram#1[1] Wildcard ?1 emitted as Rest() (x2)",
+            "[approximation] gram#1[2] Wildcard ?1 emitted as Rest()",
+        ]
+
+
+class TestApplyHomoToMidi:
+    def _apply(self, midi, mapping):
+        from bp2sc.sc_emitter import SCEmitter
+        emitter = SCEmitter(parse_text("ORD\ngram#1[1] S --> fa4\n"), "test")
+        return emitter._apply_homo_to_midi(midi, mapping)
+
+    def test_french_names(self):
+        assert self._apply(65, {"fa4": "re4"}) == 62
+        assert self._apply(70, {"sib4": "dop5"}) == 73
+        assert self._apply(67, {"sol4": "solb3"}) == 54
+
+    def test_unmapped_or_unparsable_target(self):
+        assert self._apply(65, {"sol4": "re4"}) == 65
+        assert self._apply(65, {"fa4": "Re4"}) == 65
+        assert self._apply(65, {"fa4": "sold4"}) == 65
+
+
+class TestResolveSymbolToMidi:
+    def _emitter(self, text):
+        from bp2sc.sc_emitter import SCEmitter
+        return SCEmitter(parse_text(text), "test")
+
+    def test_inlines_first_rule(self):
+        emitter = self._emitter(
+            "ORD\ngram#1[1] S --> A B\ngram#1[2] A --> fa4 B\n"
+            "gram#1[3] B --> sol4 - la4\n")
+        assert emitter._resolve_symbol_to_midi("A") == [65, 67, 69]
+        assert emitter._resolve_symbol_to_midi("S") == [65, 67, 69, 67, 69]
+
+    def test_recursive_symbol_hits_depth_limit(self):
+        emitter = self._emitter("ORD\ngram#1[1] S --> fa4 S\n")
+        assert emitter._resolve_symbol_to_midi("S") == [65] * 11
+
+    def test_mutual_recursion_independent_of_order(self):
+        text = "ORD\ngram#1[1] A --> fa4 B\ngram#1[2] B --> sol4 A\n"
+        a_first = self._emitter(text)
+        b_first = self._emitter(text)
+        results_a = (a_first._resolve_symbol_to_midi("A"),
+                     a_first._resolve_symbol_to_midi("B"))
+        b_result = b_first._resolve_symbol_to_midi("B")
+        results_b = (b_first._resolve_symbol_to_midi("A"), b_result)
+        assert results_a == results_b
+        assert results_a[0] == [65, 67] * 5 + [65]
+        assert results_a[1] == [67, 65] * 5 + [67]
+
+
+class TestEmitHomoTransform:
+    def test_master_notes_and_symbols_transformed(self):
+        from bp2sc.sc_emitter import SCEmitter
+        text = "ORD\ngram#1[1] S --> (= fa4 - A fa4)\ngram#1[2] A --> la4\n"
+        emitter = SCEmitter(parse_text(text), "test")
+        emitter._homo_mappings = {"m": {"fa4": "re4", "la4": "do5"}}
+        emitter._current_homo_label = "m"
+        homo = emitter.bp.grammars[0].rules[0].rhs[0]
+        code = emitter._emit_homo(homo)
+        assert "\\midinote, Pseq([62, 72, 62], 1)" in code
+        assert emitter._current_homo_label is None
@@ -1,7 +1,7 @@
 """Tests for note_converter.py."""
 
 import pytest
-from bp2sc.note_converter import note_to_midi, detect_convention
+from bp2sc.note_converter import note_to_midi, notes_to_midi, detect_convention
 
 
 class TestFrenchSolfege:
@@ -57,6 +57,32 @@ class TestAnglo:
         assert note_to_midi("Bb", 5) == 82
 
 
+class TestNameCase:
+    def test_solfege_is_case_insensitive(self):
+        assert note_to_midi("Do", 4) == 60
+        assert note_to_midi("SA", 4) == 60
+
+    def test_anglo_is_case_sensitive(self):
+        with pytest.raises(ValueError):
+            note_to_midi("c", 4)
+
+
+class TestBatch:
+    def test_matches_scalar(self):
+        names = ["do", "Sa", "F#", "sib", "Bb"]
+        octaves = [4, 4, 3, 4, 5]
+        assert notes_to_midi(names, octaves) == [
+            note_to_midi(n, o) for n, o in zip(names, octaves)]
+
+    def test_unknown_name(self):
+        with pytest.raises(ValueError):
+            notes_to_midi(["do", "xx"], [4, 4])
+
+    def test_length_mismatch(self):
+        with pytest.raises(ValueError):
+            notes_to_midi(["do", "re"], [4])
+
+
 class TestDetectConvention:
     def test_french(self):
         assert detect_convention(["do", "re", "fa", "sol"]) == "french"
@@ -66,3 +92,13 @@ class TestDetectConvention:
 
     def test_unknown(self):
         assert detect_convention(["ek", "do", "tin"]) == "french"  # "do" triggers french
+
+    def test_french_wins_over_earlier_indian(self):
+        assert detect_convention(["sa", "ga", "do"]) == "french"
+
+    def test_indian_wins_over_anglo(self):
+        assert detect_convention(["C", "D", "sa"]) == "indian"
+
+    def test_anglo(self):
+        assert detect_convention(["C", "re"]) == "anglo"
+        assert detect_convention(["c", ""]) == "unknown"
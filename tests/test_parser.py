@@ -1,7 +1,9 @@
 """Tests for the BP3 parser."""
 
 import pytest
-from bp2sc.grammar.parser import parse_text, parse_file
+from bp2sc import disk_cache
+from bp2sc.grammar import parser as parser_module
+from bp2sc.grammar.parser import parse_text, parse_file, parse_files
 from bp2sc.ast_nodes import (
     BPFile, GrammarBlock, Rule, Weight, Flag,
     Note, Rest, NonTerminal, Variable, Wildcard,
@@ -325,3 +327,146 @@ class TestParseTiedNotes:
         rhs = ast.grammars[0].rules[0].rhs
         assert isinstance(rhs[0], Note)
         assert isinstance(rhs[1], Note)
+
+
+class TestParseElementEdgeCases:
+    def _rhs(self, text):
+        return parse_text(f"ORD\ngram#1[1] S --> {text}\n").grammars[0].rules[0].rhs
+
+    def test_unclosed_brackets_are_skipped(self):
+        assert self._rhs("{ A (= B") == [NonTerminal("A"), NonTerminal("B")]
+
+    def test_bare_fn_before_unclosed_paren(self):
+        # _vel( is neither a call nor a bare function nor a rest
+        assert self._rhs("_vel( A") == [NonTerminal("vel"), NonTerminal("A")]
+
+    def test_dash_rest_needs_separators(self):
+        assert self._rhs("- {-,A} x-") == [
+            Rest(determined=True),
+            Polymetric(voices=[[Rest(determined=True)], [NonTerminal("A")]]),
+            NonTerminal("x"),
+        ]
+
+    def test_mode_keyword_is_not_a_symbol(self):
+        assert self._rhs("ORD A") == [NonTerminal("RD"), NonTerminal("A")]
+
+
+class TestRepeatedRuleBodies:
+    def test_identical_bodies_get_own_lists(self):
+        ast = parse_text("ORD\ngram#1[1] S --> A B\nRND\ngram#2[1] S --> A B\n")
+        first, second = (b.rules[0] for b in ast.grammars)
+        assert first.rhs == second.rhs
+        assert (first.grammar_num, second.grammar_num) == (1, 2)
+        first.rhs.append(NonTerminal("C"))
+        assert second.rhs == [NonTerminal("A"), NonTerminal("B")]
+
+
+class TestTrailingAnnotations:
+    def _rule(self, text):
+        return parse_text(f"ORD\ngram#1[1] S --> {text}\n").grammars[0].rules[0]
+
+    def test_trailing_annotations_become_comment(self):
+        rule = self._rule("A [x] B [one] [two]")
+        assert rule.comment == "one two"
+        assert rule.rhs == [NonTerminal("A"), Annotation("x"), NonTerminal("B")]
+
+    def test_nested_bracket_starts_at_first_open(self):
+        assert self._rule("A [a[b]").comment == "a[b"
+
+    def test_no_annotation(self):
+        assert self._rule("A B").comment is None
+
+
+class TestSharedFlags:
+    def test_same_expression_shares_flag(self):
+        ast = parse_text("RND\ngram#1[1] /Ideas/ S --> A\ngram#1[2] /Ideas/ S --> B\n")
+        first, second = ast.grammars[0].rules
+        assert first.flags[0] is second.flags[0]
+        with pytest.raises(AttributeError):
+            first.flags[0].value = "1"
+
+
+class TestSharedValueNodes:
+    def test_repeated_symbols_share_nodes(self):
+        rhs = parse_text("ORD\ngram#1[1] S --> A do4 - A do4 -\n").grammars[0].rules[0].rhs
+        assert rhs[0] is rhs[3]
+        assert rhs[1] is rhs[4]
+        assert rhs[2] is rhs[5]
+
+    def test_value_nodes_are_frozen(self):
+        rhs = parse_text("ORD\ngram#1[1] S --> A\n").grammars[0].rules[0].rhs
+        with pytest.raises(AttributeError):
+            rhs[0].name = "B"
+
+    def test_rules_are_frozen_blocks_are_not(self):
+        ast = parse_text("ORD\ngram#1[1] S --> |x| _vel(80)\n")
+        block = ast.grammars[0]
+        rule = block.rules[0]
+        with pytest.raises(AttributeError):
+            rule.rule_num = 2
+        with pytest.raises(AttributeError):
+            rule.rhs[1].name = "ins"
+        block.label = "Effects"
+        assert block.label == "Effects"
+
+
+class TestParseFiles:
+    def _write(self, tmp_path, count):
+        paths = []
+        for i in range(count):
+            path = tmp_path / f"-gr.test{i}"
+            path.write_text(f"ORD\ngram#1[1] S --> A{i} do4\n", encoding="utf-8")
+            paths.append(path)
+        return paths
+
+    def test_serial(self, tmp_path):
+        paths = self._write(tmp_path, 3)
+        result = parse_files(paths)
+        assert list(result) == paths
+        assert result[paths[2]] == parse_file(paths[2])
+
+    def test_process_pool(self, tmp_path):
+        paths = self._write(tmp_path, 10)
+        result = parse_files(paths, max_workers=2)
+        assert list(result) == paths
+        for path in paths:
+            assert result[path] == parse_file(path)
+
+    def test_not_cached_by_default(self, tmp_path):
+        path = tmp_path / "-gr.cached"
+        path.write_text("ORD\ngram#1[1] S --> A\n", encoding="utf-8")
+        parse_file(path)
+        assert not list(disk_cache.cache_dir().glob("*.pkl"))
+
+
+class TestFileCache:
+    @pytest.fixture(autouse=True)
+    def _enable_cache(self, monkeypatch):
+        monkeypatch.setenv("BP2SC_CACHE", "1")
+
+    def test_warm_run_loads_from_cache(self, tmp_path, monkeypatch):
+        path = tmp_path / "-gr.cached"
+        path.write_text("ORD\ngram#1[1] S --> A B\n", encoding="utf-8")
+        first = parse_file(path)
+        monkeypatch.setattr(parser_module, "_parse_lines", None)
+        assert parse_file(path) == first
+
+    def test_modified_file_invalidates(self, tmp_path):
+        path = tmp_path / "-gr.cached"
+        path.write_text("ORD\ngram#1[1] S --> A\n", encoding="utf-8")
+        parse_file(path)
+        path.write_text("ORD\ngram#1[1] S --> A B C\n", encoding="utf-8")
+        assert len(parse_file(path).grammars[0].rules[0].rhs) == 3
+
+    def test_source_change_invalidates(self, tmp_path, monkeypatch):
+        path = tmp_path / "-gr.cached"
+        path.write_text("ORD\ngram#1[1] S --> A\n", encoding="utf-8")
+        parse_file(path)
+        monkeypatch.setattr(disk_cache, "_source_hash", lambda: "edited")
+        monkeypatch.setattr(parser_module, "_parse_lines", None)
+        with pytest.raises(TypeError):
+            parse_file(path)
+
+    def test_missing_file_still_raises(self, tmp_path):
+        with pytest.raises(FileNotFoundError):
+            parse_file(tmp_path / "-gr.missing")